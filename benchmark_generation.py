@@ -0,0 +1,148 @@
+"""
+Generation benchmarks - runs parts of the pipeline in memory (no SQL file written)
+
+Usage:
+    python benchmark_generation.py staffing [--seeds 5] [--instructors 30] [--students-per-class 30]
+    python benchmark_generation.py exam [--seeds 5] [--class-sizes 30,60,120]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+
+from modules.config import SPEC_FILE, MEDIA_BASE_PATH
+from modules.base_generator import SQLDataGenerator
+
+# Import function modules (they will attach to SQLDataGenerator)
+from modules import roles_permissions
+from modules import people_accounts
+from modules import organization
+from modules import calendar_dimension
+from modules import infrastructure
+from modules import academic
+from modules import courses
+from modules import enrollments
+from modules import assessments
+from modules import financial
+from modules import operational
+
+
+def build_generator(spec_file, staff_overrides=None, students_overrides=None):
+    """Create a generator quietly, with optional [staff] / [students] overrides"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = SQLDataGenerator(spec_file, os.path.join(script_dir, MEDIA_BASE_PATH))
+    generator.staff_config.update(staff_overrides or {})
+    generator.students_config.update(students_overrides or {})
+    return generator
+
+
+def run_until_course_classes(generator):
+    """Phases 1-6 of generate_all, stopping after course classes are scheduled"""
+    generator.create_roles_and_permissions()
+    generator.create_training_systems()
+    generator.create_faculties_and_departments()
+    generator.create_academic_years_and_semesters()
+    generator.create_calendar_dates()
+    generator.create_fixed_test_accounts()
+    generator.create_regular_staff()
+    generator.assign_faculty_deans()
+    generator.create_buildings_and_rooms()
+    generator.create_room_amenities()
+    generator.create_room_amenity_mappings()
+    generator.create_subjects()
+    generator.create_curricula()
+    generator.create_curriculum_details()
+    generator.create_classes()
+    generator.create_students()
+    generator.create_courses()
+
+    start = time.perf_counter()
+    generator.create_course_classes()
+    return time.perf_counter() - start
+
+
+def benchmark_staffing(args):
+    """Balanced (load-proportional) vs random faculty assignment -> course class scheduling effort"""
+    print(f"Staffing benchmark: {args.instructors} instructors, {args.students_per_class} students/class, "
+          f"{args.seeds} seeds")
+    print(f"{'assignment':<12}{'attempts':>12}{'per section':>14}{'skipped':>10}{'own dept':>10}{'seconds':>10}")
+
+    for mode in ('random', 'balanced'):
+        totals = {'scheduling_attempts': 0, 'sections_created': 0, 'sections_skipped': 0, 'department_matched': 0}
+        elapsed = 0.0
+
+        for seed in range(args.seeds):
+            random.seed(seed)
+            generator = build_generator(
+                args.spec,
+                staff_overrides={'regular_instructors': str(args.instructors), 'faculty_assignment': mode},
+                students_overrides={'students_per_class': str(args.students_per_class)}
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed += run_until_course_classes(generator)
+            for key in totals:
+                totals[key] += generator.course_class_stats[key]
+
+        sections = max(totals['sections_created'] + totals['sections_skipped'], 1)
+        print(f"{mode:<12}{totals['scheduling_attempts'] / args.seeds:>12.0f}"
+              f"{totals['scheduling_attempts'] / sections:>14.2f}"
+              f"{totals['sections_skipped'] / args.seeds:>10.1f}"
+              f"{totals['department_matched'] / max(totals['sections_created'], 1):>10.1%}"
+              f"{elapsed / args.seeds:>10.3f}")
+
+
+def benchmark_exam(args):
+    """Exam scheduling (definitions, entries, exam classes) at growing student counts"""
+    class_sizes = [int(size) for size in args.class_sizes.split(',')]
+    print(f"Exam benchmark: {args.seeds} seeds per class size")
+    print(f"{'per class':>10}{'students':>10}{'enrolled':>10}{'classes':>10}{'exams':>10}{'exam cls':>10}{'seconds':>10}")
+
+    for class_size in class_sizes:
+        totals = {'students': 0, 'enrollments': 0, 'course_classes': 0, 'exams': 0, 'exam_classes': 0}
+        elapsed = 0.0
+
+        for seed in range(args.seeds):
+            random.seed(seed)
+            generator = build_generator(args.spec, students_overrides={'students_per_class': str(class_size)})
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_until_course_classes(generator)
+                generator.create_student_enrollments()
+                start = time.perf_counter()
+                generator.create_exams_and_exam_entries()
+                elapsed += time.perf_counter() - start
+            totals['students'] += len(generator.data['students'])
+            totals['enrollments'] += len(generator.data['enrollments'])
+            totals['course_classes'] += len(generator.data['course_classes'])
+            totals['exams'] += len({ec['exam_id'] for ec in generator.data['exam_classes'].values()})
+            totals['exam_classes'] += len(generator.data['exam_classes'])
+
+        print(f"{class_size:>10}{totals['students'] / args.seeds:>10.0f}"
+              f"{totals['enrollments'] / args.seeds:>10.0f}"
+              f"{totals['course_classes'] / args.seeds:>10.0f}"
+              f"{totals['exams'] / args.seeds:>10.0f}"
+              f"{totals['exam_classes'] / args.seeds:>10.0f}"
+              f"{elapsed / args.seeds:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EduManagement data generation benchmarks")
+    parser.add_argument('benchmark', choices=['staffing', 'exam'])
+    parser.add_argument('--spec', default=SPEC_FILE)
+    parser.add_argument('--seeds', type=int, default=5)
+    parser.add_argument('--instructors', type=int, default=30)
+    parser.add_argument('--students-per-class', type=int, default=30)
+    parser.add_argument('--class-sizes', default='30,60,120', help="exam: comma-separated students per class")
+    args = parser.parse_args()
+
+    if args.benchmark == 'staffing':
+        benchmark_staffing(args)
+    elif args.benchmark == 'exam':
+        benchmark_exam(args)
+
+
+if __name__ == "__main__":
+    main()
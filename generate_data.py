@@ -18,6 +18,7 @@ from modules.base_generator import SQLDataGenerator
 from modules import roles_permissions
 from modules import people_accounts
 from modules import organization
+from modules import calendar_dimension
 from modules import infrastructure
 from modules import academic
 from modules import courses
@@ -1,6 +1,7 @@
 import random
 from datetime import datetime
 from .config import *
+from .prerequisites import PrerequisiteGraph
 
 def create_subjects(self):
     """
@@ -126,6 +127,9 @@ def create_subjects(self):
     
     self.add_statement(f"-- Creating {len(department_subjects)} specialized subjects")
     
+    # Optional 7th column: prerequisite subject code (resolved once every subject exists)
+    pending_prerequisites = []  # (subject dict, subject row, prerequisite code)
+    
     for line in department_subjects:
         parts = [p.strip() for p in line.split('|')]
         if len(parts) < 6:
@@ -137,6 +141,7 @@ def create_subjects(self):
         credits = int(parts[3])
         theory_hours = int(parts[4])
         practice_hours = int(parts[5])
+        prerequisite_code = parts[6] if len(parts) > 6 and parts[6] else None
         
         # Find matching department
         dept = next((d for d in self.data['departments'] if d['department_name'] == dept_name), None)
@@ -156,6 +161,7 @@ def create_subjects(self):
             'practice_hours': practice_hours,
             'is_general': False,  # CRITICAL FLAG
             'department_id': dept['department_id'],  # CRITICAL - must match curriculum department
+            'prerequisite_subject_id': None,  # Resolved below
             'fee_per_credit': float(self.course_config.get('fee_per_credit', 600000))
         })
         
@@ -177,10 +183,27 @@ def create_subjects(self):
             0,
             1
         ])
+        
+        if prerequisite_code:
+            pending_prerequisites.append((self.data['subjects'][-1], subject_rows[-1], prerequisite_code))
+    
+    # Resolve prerequisite codes -> subject ids
+    subject_id_by_code = {s['subject_code']: s['subject_id'] for s in self.data['subjects']}
+    for subject, row, prerequisite_code in pending_prerequisites:
+        prerequisite_id = subject_id_by_code.get(prerequisite_code)
+        if not prerequisite_id:
+            self.add_statement(f"-- WARNING: Prerequisite '{prerequisite_code}' not found for subject {subject['subject_code']}")
+            continue
+        subject['prerequisite_subject_id'] = prerequisite_id
+        row[8] = prerequisite_id  # prerequisite_subject_id
+    
+    # Prerequisite DAG (raises on cycles) used by enrollment generation
+    self.prerequisites = PrerequisiteGraph(self.data['subjects'])
     
     self.add_statement(f"-- Total subjects created: {len(subject_rows)}")
     self.add_statement(f"--   General: {len(general_subjects)}")
     self.add_statement(f"--   Specialized: {len(department_subjects)}")
+    self.add_statement(f"--   With prerequisite: {sum(1 for s in self.data['subjects'] if s.get('prerequisite_subject_id'))}")
     
     if len(subject_rows) == 0:
         raise RuntimeError(
@@ -2,6 +2,9 @@ import random
 from datetime import datetime, timedelta
 from collections import defaultdict
 from .config import *
+from .timetable import period_mask
+from .exam_timetable import (EXAM_SLOTS, ExamRoomAllocator, ExamRoomOccupancy, ExamTimetabler,
+                             ProctorRoster, exam_buckets, exam_mask, slot_periods)
 
 def create_exams_and_exam_entries(self):
     """
@@ -18,24 +21,169 @@ def create_exams_and_exam_entries(self):
     self.add_statement("-- IMPROVED: Exam entry submission dates vary 2-6 weeks before exam with realistic hours")
     
     exam_rows = []
-    exam_entry_rows = []
-    exam_class_rows = []
+    # UPDATED: Entries and exam classes are keyed by id (dicts keep insertion order for the
+    # bulk insert), so picking, existence checks and removals are O(1) instead of list scans
+    exam_entry_rows = {}                           # exam_entry_id -> row
+    exam_entry_class_ids = set()                   # course_class_ids with an exam entry
+    exam_class_rows = {}                           # exam_class_id -> row
+    exam_class_ids_by_class = defaultdict(list)    # course_class_id -> exam_class_ids
+    exam_class_bookings = {}                       # exam_class_id -> (semester_id, proctor_id, date, slot_idx)
     
-    # Initialize storage for exam_classes
-    self.data['exam_classes'] = []
+    # Initialize storage for exam_classes (exam_class_id -> exam class)
+    self.data['exam_classes'] = {}
     
     # Track created exams by course_id to avoid duplicates
     exams_by_course = {}
+    pending_exam_classes = []  # (exam_id, course_class) waiting for rooms - see step 5
     
     # GLOBAL: Track room usage across ALL courses to prevent conflicts
-    # Key: (room_id, date_str, hour, minute) -> True
-    global_exam_room_usage = {}
+    # UPDATED: (room_id, date) -> slot bitmask (modules/exam_timetable.py), O(1) per check
+    exam_room_usage = ExamRoomOccupancy()
     
     # Group course_classes by course
     course_classes_by_course = defaultdict(list)
     for cc in self.data['course_classes']:
         course_classes_by_course[cc['course_id']].append(cc)
     
+    # Proctors: least-loaded instructor (per semester) who neither teaches in the exam's
+    # weekday / periods nor already watches an exam in that slot - see modules/instructor_load.py
+    # UPDATED: teaching masks are precomputed once per semester and proctoring is tracked
+    # per (instructor, date), so there is no conflict-ignoring fallback any more
+    instructors_by_id = {i['instructor_id']: i for i in self.data['instructors']}
+    proctor_roster = ProctorRoster(self.data['course_classes'])
+    
+    def pick_proctor(semester_id, exam_date, slot_idx):
+        """Books the proctor's slot; the load is added by seat_exam once every room has a proctor"""
+        mask = exam_mask(self.calendar.weekday_code(exam_date), slot_idx)
+        proctor_id = self.instructor_load.pick(
+            semester_id, ('all', None), self.data['instructors'], mask,
+            free=lambda instructor_id: proctor_roster.is_free(semester_id, instructor_id, exam_date, slot_idx, mask))
+        if proctor_id is None:
+            return None
+        proctor_roster.book(proctor_id, exam_date, slot_idx)
+        return instructors_by_id[proctor_id]
+    
+    def add_exam_class(exam_id, course_class_id, room_id, monitor_instructor_id, start_time, duration, exam_status):
+        exam_class_id = self.generate_uuid()
+        exam_class_rows[exam_class_id] = [
+            exam_class_id,
+            exam_id,
+            course_class_id,
+            room_id,
+            monitor_instructor_id,
+            start_time,
+            duration,
+            exam_status
+        ]
+        # Store in self.data for potential future use
+        self.data['exam_classes'][exam_class_id] = {
+            'exam_class_id': exam_class_id,
+            'exam_id': exam_id,
+            'course_class_id': course_class_id,
+            'room_id': room_id,
+            'start_time': start_time
+        }
+        exam_class_ids_by_class[course_class_id].append(exam_class_id)
+        return exam_class_id
+    
+    def seat_exam(exam_id, cc, exam_date, slot_idx, exam_status):
+        """
+        Rooms for a course class's exam in this (date, slot) - the tightest free exam room, or several
+        when the class is split - with one free proctor per room. Books everything and returns the
+        rooms, or None (nothing booked) if the slot cannot take the class.
+        """
+        rooms = exam_rooms.fit(exam_room_usage, exam_date, slot_idx, max(class_sizes[cc['course_class_id']], 1))
+        if rooms is None:
+            return None
+        proctors = []
+        for room in rooms:
+            proctor = pick_proctor(cc['semester_id'], exam_date, slot_idx)
+            if proctor is None:
+                for booked in proctors:
+                    proctor_roster.release(booked['instructor_id'], exam_date, slot_idx)
+                return None
+            proctors.append(proctor)
+        
+        start_period, end_period = slot_periods(slot_idx)
+        for proctor in proctors:
+            self.instructor_load.add_load(cc['semester_id'], proctor['instructor_id'], end_period - start_period + 1)
+        
+        hour, minute, duration = EXAM_SLOTS[slot_idx]
+        start_time = datetime.combine(exam_date, datetime.min.time().replace(hour=hour, minute=minute))
+        for room, proctor in zip(rooms, proctors):
+            exam_room_usage.book(room['room_id'], exam_date, slot_idx)
+            exam_class_id = add_exam_class(exam_id, cc['course_class_id'], room['room_id'],
+                                           proctor['instructor_id'], start_time, duration, exam_status)
+            exam_class_bookings[exam_class_id] = (cc['semester_id'], proctor['instructor_id'], exam_date, slot_idx)
+        exam_timetable.assign(cc['course_class_id'], (exam_date, slot_idx))
+        return rooms
+    
+    def test_student_slot_clear(student_id, cc, exam_date, slot_idx):
+        """No lesson of the test student (semester owning the date) and no neighbouring exam in this slot"""
+        day = self.calendar.day(exam_date)
+        if day and day.semester_id and test_student_masks[(student_id, day.semester_id)] & exam_mask(day.weekday_code, slot_idx):
+            return False
+        return (exam_date, slot_idx) not in exam_timetable.taken(cc['course_class_id'])
+    
+    def remove_exam_classes(course_class_id):
+        """Drop every exam_class of a course class and free its proctor's slot and load; returns the removed rows"""
+        removed = [exam_class_rows.pop(exam_class_id) for exam_class_id in exam_class_ids_by_class.pop(course_class_id, [])]
+        for row in removed:
+            del self.data['exam_classes'][row[0]]
+            semester_id, proctor_id, exam_date, slot_idx = exam_class_bookings.pop(row[0])
+            proctor_roster.release(proctor_id, exam_date, slot_idx)
+            start_period, end_period = slot_periods(slot_idx)
+            self.instructor_load.remove_load(semester_id, proctor_id, end_period - start_period + 1)
+        return removed
+    
+    # ============================================================
+    # EXAM TIMETABLE: (date, slot) bucket per course class before any room is assigned
+    # ============================================================
+    # UPDATED: Classes sharing a student never get the same bucket (DSatur colouring of the
+    # conflict graph, see modules/exam_timetable.py) - replaces the post-load
+    # sql/fix/delete_conflicts.sql pass that hard-deleted clashing exam_class rows
+    courses_by_id = {c['course_id']: c for c in self.data['courses']}
+    test_student_ids = {account['student_id'] for name, account in self.data.get('fixed_accounts', {}).items()
+                        if name.startswith('student') and account.get('student_id')}
+    course_classes_by_id = {cc['course_class_id']: cc for cc in self.data['course_classes']}
+    
+    # Test students' weekly class masks: their exams also stay clear of their own lessons
+    test_student_masks = defaultdict(int)  # (student_id, semester_id) -> mask
+    test_student_classes = defaultdict(set)  # course_class_id -> test student ids
+    class_sizes = defaultdict(int)  # course_class_id -> enrolled students (exam seats needed)
+    for enrollment in self.data['enrollments']:
+        class_sizes[enrollment['course_class_id']] += 1
+        if enrollment['student_id'] in test_student_ids:
+            cc = course_classes_by_id.get(enrollment['course_class_id'])
+            if cc:
+                test_student_masks[(enrollment['student_id'], cc['semester_id'])] |= period_mask(
+                    cc['days'], cc['start_period'], cc['end_period'])
+                test_student_classes[cc['course_class_id']].add(enrollment['student_id'])
+    
+    exam_domains = {}
+    exam_windows = {}
+    for course_id, course_classes in course_classes_by_course.items():
+        course = courses_by_id.get(course_id)
+        if not course:
+            continue
+        buckets = exam_buckets(self.calendar.exam_dates(course['semester_id']))
+        for cc in course_classes:
+            domain = buckets
+            for student_id in test_student_classes.get(cc['course_class_id'], ()):
+                mask = test_student_masks[(student_id, cc['semester_id'])]
+                domain = [(exam_date, slot_idx) for exam_date, slot_idx in domain
+                          if not mask & exam_mask(self.calendar.weekday_code(exam_date), slot_idx)] or domain
+            exam_domains[cc['course_class_id']] = domain
+            exam_windows[cc['course_class_id']] = course['semester_id']
+    
+    # Buckets are filled by seats: a bucket holds classes up to the exam rooms' total capacity
+    exam_rooms = ExamRoomAllocator(self.data['rooms'])
+    exam_timetable = ExamTimetabler(exam_domains, self.data['enrollments'], exam_rooms.total_capacity,
+                                    {cc_id: max(class_sizes[cc_id], 1) for cc_id in exam_domains}, exam_windows)
+    exam_timetable.color()
+    self.add_statement(f"-- Exam timetable: {len(exam_timetable.colors)} course classes coloured into (date, slot) buckets, "
+                       f"{exam_timetable.clashes} student clashes left after recolouring")
+    
     # Get admin for reviewing exam entries
     admin_id = self.data['fixed_accounts']['admin']['admin_id']
     
@@ -59,7 +207,7 @@ def create_exams_and_exam_entries(self):
     ]
     
     for course_id, course_classes in course_classes_by_course.items():
-        course = next((c for c in self.data['courses'] if c['course_id'] == course_id), None)
+        course = courses_by_id.get(course_id)
         if not course:
             continue
             
@@ -110,8 +258,7 @@ def create_exams_and_exam_entries(self):
                 exam_entry_id = self.generate_uuid()
                 
                 # Display name (instructor's submission identifier)
-                instructor = next((i for i in self.data['instructors'] 
-                                if i['instructor_id'] == cc['instructor_id']), None)
+                instructor = instructors_by_id.get(cc['instructor_id'])
                 instructor_name = instructor['full_name'] if instructor else 'GV'
                 display_name = f"{course['subject_code']} - {instructor_name} - Lớp {cc['session_number']}"
                 
@@ -168,7 +315,7 @@ def create_exams_and_exam_entries(self):
                     # Review 1-3 days after submission for rejections (faster processing)
                     reviewed_at = submitted_at + timedelta(days=random.randint(1, 3), hours=random.randint(-2, 2))
                 
-                exam_entry_rows.append([
+                exam_entry_rows[exam_entry_id] = [
                     exam_entry_id,
                     exam_id,
                     cc['course_class_id'],
@@ -183,7 +330,8 @@ def create_exams_and_exam_entries(self):
                     reviewed_by,
                     reviewed_at,
                     submitted_at.strftime('%Y-%m-%d %H:%M:%S')  # Add created_at (submission time)
-                ])
+                ]
+                exam_entry_class_ids.add(cc['course_class_id'])
                 
                 if entry_status == 'approved':
                     submitted_entries.append({
@@ -206,16 +354,12 @@ def create_exams_and_exam_entries(self):
                 entry_code = entry_codes[idx] if idx < len(entry_codes) else f"E{idx+1}"
                 
                 # UPDATE the exam_entry row to mark it as picked with entry_code
-                # Find the row in exam_entry_rows
-                for i, row in enumerate(exam_entry_rows):
-                    if row[0] == entry['exam_entry_id']:  # exam_entry_id match
-                        # Update entry_code (index 3) and is_picked (index 8)
-                        exam_entry_rows[i][3] = entry_code
-                        exam_entry_rows[i][8] = True  # is_picked
-                        break
+                row = exam_entry_rows[entry['exam_entry_id']]
+                row[3] = entry_code  # entry_code
+                row[8] = True  # is_picked
         
         # ============================================================
-        # 4. CREATE EXAM_CLASS SCHEDULES
+        # 4. QUEUE EXAM_CLASS SCHEDULES (rooms are assigned per bucket in step 5)
         # ============================================================
         semester = next((s for s in self.data['semesters'] 
                         if s['semester_id'] == course['semester_id']), None)
@@ -223,250 +367,45 @@ def create_exams_and_exam_entries(self):
         if not semester:
             continue
         
-        # Exam period: last 2 weeks of semester
-        sem_end = semester['end_date']
-        exam_start = sem_end - timedelta(days=14)
-        
-        # Generate exam dates (weekdays only)
-        exam_dates = []
-        current = exam_start
-        while current <= sem_end:
-            if current.weekday() < 6:  # Monday to Saturday
-                exam_dates.append(current)
-            current += timedelta(days=1)
+        # Exam period: last 2 weeks of semester, Monday to Saturday (from the calendar dimension)
+        exam_dates = self.calendar.exam_dates(semester['semester_id'])
         
         if not exam_dates:
+            self.add_statement(f"-- WARNING: Semester {semester['semester_id']} has no exam window - "
+                               f"{len(course_classes)} course classes of {course['course_code']} get no exam")
             continue
         
-        # Exam time slots
-        exam_slots = [
-            (7, 30, 120),   # 7:30 AM, 2 hours
-            (10, 0, 120),   # 10:00 AM, 2 hours
-            (13, 30, 120),  # 1:30 PM, 2 hours
-            (16, 0, 120),   # 4:00 PM, 2 hours
-        ]
-        
-        # Use GLOBAL room usage tracking to prevent conflicts across all courses
-        # (not local to this course group)
-        
         for cc in course_classes:
-            # Try to schedule exam without conflicts
-            exam_scheduled = False
-            
-            for attempt in range(50):  # Increased attempts
-                exam_date = random.choice(exam_dates)
-                hour, minute, duration = random.choice(exam_slots)
-                start_time = datetime.combine(exam_date, datetime.min.time().replace(hour=hour, minute=minute))
-                room = random.choice(self.data['rooms'])
-                
-                # Create conflict check key: room + date + time slot
-                date_str = exam_date.strftime('%Y-%m-%d')
-                key = (room['room_id'], date_str, hour, minute)
-                
-                # Check for room conflicts (same room, same date, overlapping time)
-                room_conflict = False
-                
-                # Simple check: if exact same room, date, hour, minute already exists, it's a conflict
-                if key in global_exam_room_usage:
-                    room_conflict = True
-                else:
-                    # Check for time overlap (2-hour slots)
-                    for existing_key in global_exam_room_usage:
-                        existing_room, existing_date, existing_hour, existing_minute = existing_key
-                        if (existing_room == room['room_id'] and 
-                            existing_date == date_str):
-                            
-                            existing_start_minutes = existing_hour * 60 + existing_minute
-                            existing_end_minutes = existing_start_minutes + 120  # 2 hours
-                            current_start_minutes = hour * 60 + minute
-                            current_end_minutes = current_start_minutes + 120
-                            
-                            # Check overlap
-                            if not (current_end_minutes <= existing_start_minutes or 
-                                   current_start_minutes >= existing_end_minutes):
-                                room_conflict = True
-                                break
-                
-                if not room_conflict:
-                    # Try to find an instructor who doesn't have conflicts
-                    monitor_instructor = None
-                    
-                    # Shuffle the instructor list to get variety
-                    potential_instructors = list(self.data['instructors'])
-                    random.shuffle(potential_instructors)
-                    
-                    for potential_instructor in potential_instructors:
-                        instructor_id = potential_instructor['instructor_id']
-                        
-                        # Check if this instructor has course classes at the same time
-                        instructor_conflict = False
-                        exam_weekday = exam_date.weekday() + 2  # Convert to 1-7 (Monday=2, Tuesday=3, etc.)
-                        
-                        for course_class in self.data['course_classes']:
-                            if course_class['instructor_id'] == instructor_id:
-                                # Check if course class is in the same semester and has overlapping time
-                                cc_days = course_class.get('days', [])
-                                if exam_weekday in cc_days:
-                                    cc_start = course_class.get('start_period', 0)
-                                    cc_end = course_class.get('end_period', 0)
-                                    
-                                    # Convert exam time to periods more accurately
-                                    # Period 1 = 6:00-7:00, Period 2 = 7:00-8:00, etc.
-                                    # So 7:30 AM = Period 2, 13:30 PM = Period 8
-                                    if hour <= 6:
-                                        exam_start_period = 1
-                                    elif hour <= 12:
-                                        exam_start_period = hour - 5  # 7:00 AM = Period 2
-                                    else:
-                                        exam_start_period = hour - 5  # 13:00 PM = Period 8
-                                    
-                                    exam_end_period = exam_start_period + 1  # 2-hour exam = 2 periods
-                                    
-                                    # Check for period overlap
-                                    if not (exam_end_period <= cc_start or exam_start_period >= cc_end):
-                                        instructor_conflict = True
-                                        break
-                        
-                        if not instructor_conflict:
-                            monitor_instructor = potential_instructor
-                            break
-                    
-                    if monitor_instructor is None:
-                        # Fallback: use any instructor if no conflict-free one found
-                        # But prefer someone who's NOT the test instructor to avoid conflicts
-                        test_instructor_id = self.data['fixed_accounts'].get('instructor', {}).get('instructor_id')
-                        available_instructors = [
-                            instr for instr in self.data['instructors']
-                            if instr['instructor_id'] != test_instructor_id
-                        ]
-                        if available_instructors:
-                            monitor_instructor = random.choice(available_instructors)
-                        else:
-                            monitor_instructor = random.choice(self.data['instructors'])
-                    
-                    global_exam_room_usage[key] = True
-                    
-                    exam_class_id = self.generate_uuid()
-                    
-                    exam_class_rows.append([
-                        exam_class_id,
-                        exam_id,
-                        cc['course_class_id'],
-                        room['room_id'],
-                        monitor_instructor['instructor_id'],
-                        start_time,
-                        duration,
-                        'scheduled'
-                    ])
-                    
-                    # Store in self.data for potential future use
-                    self.data['exam_classes'].append({
-                        'exam_class_id': exam_class_id,
-                        'exam_id': exam_id,
-                        'course_class_id': cc['course_class_id'],
-                        'room_id': room['room_id'],
-                        'start_time': start_time
-                    })
-                    
-                    exam_scheduled = True
+            pending_exam_classes.append((exam_id, cc))
+    
+    # ============================================================
+    # 5. EXAM ROOMS: first-fit decreasing per (date, slot) bucket
+    # ============================================================
+    # UPDATED: Rooms follow enrollment counts - each bucket seats its classes largest first in the
+    # tightest free exam / classroom / lecture_hall room, splitting a class over several rooms
+    # (one proctor each) when no single room is big enough. A class its bucket cannot take
+    # (rooms or proctors) moves to another bucket none of its neighbours uses.
+    classes_by_bucket = defaultdict(list)
+    for exam_id, cc in pending_exam_classes:
+        classes_by_bucket[exam_timetable.colors[cc['course_class_id']]].append((exam_id, cc))
+    
+    split_exams = 0
+    for bucket_classes in classes_by_bucket.values():
+        bucket_classes.sort(key=lambda item: -class_sizes[item[1]['course_class_id']])
+        for exam_id, cc in bucket_classes:
+            rooms = None
+            for exam_date, slot_idx in exam_timetable.options(cc['course_class_id']):
+                rooms = seat_exam(exam_id, cc, exam_date, slot_idx, 'scheduled')
+                if rooms is not None:
                     break
             
-            if not exam_scheduled:
-                # Fallback: try different room and time combinations more systematically
-                fallback_scheduled = False
-                for backup_room in self.data['rooms']:
-                    if fallback_scheduled:
-                        break
-                    for backup_date in exam_dates:
-                        if fallback_scheduled:
-                            break
-                        for backup_hour, backup_minute, backup_duration in exam_slots:
-                            backup_start_time = datetime.combine(backup_date, datetime.min.time().replace(hour=backup_hour, minute=backup_minute))
-                            
-                            # Check for conflicts with this backup combination
-                            backup_date_str = backup_date.strftime('%Y-%m-%d')
-                            backup_key = (backup_room['room_id'], backup_date_str, backup_hour, backup_minute)
-                            
-                            backup_conflict = False
-                            for existing_key in global_exam_room_usage:
-                                existing_room, existing_date, existing_hour, existing_minute = existing_key
-                                if (existing_room == backup_room['room_id'] and 
-                                    existing_date == backup_date_str):
-                                    # Check for time overlap
-                                    existing_start_minutes = existing_hour * 60 + existing_minute
-                                    existing_end_minutes = existing_start_minutes + 120
-                                    backup_start_minutes = backup_hour * 60 + backup_minute
-                                    backup_end_minutes = backup_start_minutes + 120
-                                    
-                                    if not (backup_end_minutes <= existing_start_minutes or 
-                                           backup_start_minutes >= existing_end_minutes):
-                                        backup_conflict = True
-                                        break
-                            
-                            if not backup_conflict:
-                                # Try to find an instructor who doesn't have conflicts for fallback
-                                monitor_instructor = None
-                                for potential_instructor in self.data['instructors']:
-                                    instructor_id = potential_instructor['instructor_id']
-                                    
-                                    # Check if this instructor has course classes at the same time
-                                    instructor_conflict = False
-                                    backup_weekday = backup_date.weekday() + 1  # Convert to 1-7 (Monday=1)
-                                    
-                                    for course_class in self.data['course_classes']:
-                                        if course_class['instructor_id'] == instructor_id:
-                                            # Check if course class is in the same semester and has overlapping time
-                                            cc_days = course_class.get('days', [])
-                                            if backup_weekday in cc_days:
-                                                cc_start = course_class.get('start_period', 0)
-                                                cc_end = course_class.get('end_period', 0)
-                                                
-                                                # Convert exam time to periods (approximately)
-                                                exam_period = backup_hour - 6  # Rough conversion: 7:00 AM = period 1
-                                                exam_end_period = exam_period + 2  # 2-hour exam
-                                                
-                                                # Check for period overlap
-                                                if not (exam_end_period <= cc_start or exam_period >= cc_end):
-                                                    instructor_conflict = True
-                                                    break
-                                    
-                                    if not instructor_conflict:
-                                        monitor_instructor = potential_instructor
-                                        break
-                                
-                                if monitor_instructor is None:
-                                    # Fallback: use any instructor if no conflict-free one found
-                                    monitor_instructor = random.choice(self.data['instructors'])
-                                
-                                global_exam_room_usage[backup_key] = True
-                                
-                                exam_class_id = self.generate_uuid()
-                                
-                                exam_class_rows.append([
-                                    exam_class_id,
-                                    exam_id,
-                                    cc['course_class_id'],
-                                    backup_room['room_id'],
-                                    monitor_instructor['instructor_id'],
-                                    backup_start_time,
-                                    backup_duration,
-                                    'scheduled'
-                                ])
-                                
-                                self.data['exam_classes'].append({
-                                    'exam_class_id': exam_class_id,
-                                    'exam_id': exam_id,
-                                    'course_class_id': cc['course_class_id'],
-                                    'room_id': backup_room['room_id'],
-                                    'start_time': backup_start_time
-                                })
-                                
-                                fallback_scheduled = True
-                                break
-                
-                # If still not scheduled, skip this exam to avoid conflicts
-                if not fallback_scheduled:
-                    self.add_statement(f"-- WARNING: Could not schedule exam for course_class {cc['course_class_id']} without conflicts")
+            if rooms is None:
+                self.add_statement(f"-- WARNING: Could not schedule exam for course_class {cc['course_class_id']} without conflicts")
+            elif len(rooms) > 1:
+                split_exams += 1
+    
+    self.add_statement(f"-- Exam rooms: {len(exam_class_rows)} exam_class rows for {len(pending_exam_classes)} course classes "
+                       f"({split_exams} split across rooms)")
     
     # SPECIAL HANDLING FOR ALL TEST STUDENTS: Create exam schedules for summer 2024-2025 courses
     # with specific dates: 2 exams on 11/6 (completed), 2 on 11/12 (upcoming), 2 on 11/19 (scheduled)
@@ -526,8 +465,7 @@ def create_exams_and_exam_entries(self):
             # Get course classes for these enrollments
             test_student_course_classes = []
             for enrollment in test_student_summer_enrollments:
-                cc = next((c for c in self.data['course_classes'] 
-                          if c['course_class_id'] == enrollment['course_class_id']), None)
+                cc = course_classes_by_id.get(enrollment['course_class_id'])
                 if cc:
                     test_student_course_classes.append(cc)
             
@@ -535,22 +473,15 @@ def create_exams_and_exam_entries(self):
             test_student_course_class_ids = {cc['course_class_id'] for cc in test_student_course_classes}
             
             # Remove exam_class entries that were already created for these course classes
+            # (also from self.data['exam_classes'])
             exam_class_rows_to_remove = []
-            self.data_exam_classes_to_remove = []
-            
-            for i in range(len(exam_class_rows) - 1, -1, -1):
-                if exam_class_rows[i][2] in test_student_course_class_ids:  # course_class_id is at index 2
-                    exam_class_rows_to_remove.append(exam_class_rows.pop(i))
-            
-            # Also remove from self.data['exam_classes']
-            for i in range(len(self.data['exam_classes']) - 1, -1, -1):
-                if self.data['exam_classes'][i]['course_class_id'] in test_student_course_class_ids:
-                    self.data_exam_classes_to_remove.append(self.data['exam_classes'].pop(i))
+            for course_class_id in test_student_course_class_ids:
+                exam_class_rows_to_remove.extend(remove_exam_classes(course_class_id))
             
             if exam_class_rows_to_remove:
                 self.add_statement(f"-- TEST STUDENT: Removed {len(exam_class_rows_to_remove)} existing exam_class entries to override with specific dates")
             
-            # Note: We do NOT clear global_exam_room_usage here because we want to respect existing conflicts
+            # Note: We do NOT clear exam_room_usage here because we want to respect existing conflicts
             # The test student logic will find available time slots that don't conflict with regular exams
             
             # Work with available course classes (even if less than 6, we'll still create exams)
@@ -564,8 +495,7 @@ def create_exams_and_exam_entries(self):
                 # Take up to 6 courses (or all if less than 6)
                 num_courses_to_use = min(6, len(test_student_course_classes))
                 for cc in test_student_course_classes[:num_courses_to_use]:
-                    course = next((c for c in self.data['courses'] 
-                                 if c['course_id'] == cc['course_id']), None)
+                    course = courses_by_id.get(cc['course_id'])
                     if course:
                         test_student_courses.append({
                             'course': course,
@@ -612,20 +542,21 @@ def create_exams_and_exam_entries(self):
                     # Remove zero-count assignments
                     exam_date_assignments = [(date, count) for date, count in exam_date_assignments if count > 0]
                 
-                # Exam time slots: (hour, minute, duration_minutes)
-                exam_slots = [
-                    (7, 30, 120),   # 7:30 AM, 2 hours
-                    (10, 0, 120),   # 10:00 AM, 2 hours
-                    (13, 30, 120),  # 1:30 PM, 2 hours
-                    (16, 0, 120),   # 4:00 PM, 2 hours
-                ]
+                exam_slots = EXAM_SLOTS
                 
                 # Track which time slots are used for each specific date to prevent conflicts
                 # Each date gets its own tracking to ensure unique time slots
                 date_slot_usage = {}
                 for target_date in [exam_date_past_1, exam_date_past_2, exam_date_upcoming_1, 
                                    exam_date_upcoming_2, exam_date_future_1, exam_date_future_2]:
-                    date_slot_usage[target_date.strftime('%Y-%m-%d')] = set()
+                    date_slot_usage[self.calendar.date_str(target_date)] = set()
+                
+                # FIXED: Slots of the test student's other exams are taken too
+                for other_cc_id, student_ids in test_student_classes.items():
+                    if test_student_id in student_ids and other_cc_id not in test_student_course_class_ids:
+                        bucket = exam_timetable.colors.get(other_cc_id)
+                        if bucket and self.calendar.date_str(bucket[0]) in date_slot_usage:
+                            date_slot_usage[self.calendar.date_str(bucket[0])].add(bucket[1])
                 
                 # Also track room usage per date+time to avoid double booking
                 date_time_room_usage = {}
@@ -638,7 +569,7 @@ def create_exams_and_exam_entries(self):
                     else:
                         exam_status = 'scheduled'  # Upcoming or future
                     
-                    exam_date_str = exam_date.strftime('%Y-%m-%d')
+                    exam_date_str = self.calendar.date_str(exam_date)
                     
                     for i in range(count):
                         if course_idx >= len(test_student_courses):
@@ -676,14 +607,11 @@ def create_exams_and_exam_entries(self):
                             exams_by_course[course['course_id']] = exam_id
                         
                         # Create exam_entry if it doesn't exist
-                        exam_entry_exists = any(
-                            row[2] == cc['course_class_id'] for row in exam_entry_rows
-                        )
+                        exam_entry_exists = cc['course_class_id'] in exam_entry_class_ids
                         
                         if not exam_entry_exists:
                             exam_entry_id = self.generate_uuid()
-                            instructor = next((i for i in self.data['instructors'] 
-                                            if i['instructor_id'] == cc['instructor_id']), None)
+                            instructor = instructors_by_id.get(cc['instructor_id'])
                             instructor_name = instructor['full_name'] if instructor else 'GV'
                             display_name = f"{course['subject_code']} - {instructor_name} - Lớp {cc.get('session_number', 1)}"
                             
@@ -705,7 +633,7 @@ def create_exams_and_exam_entries(self):
                             )
                             reviewed_at = submitted_at + timedelta(days=random.randint(2, 7))
                             
-                            exam_entry_rows.append([
+                            exam_entry_rows[exam_entry_id] = [
                                 exam_entry_id,
                                 exam_id,
                                 cc['course_class_id'],
@@ -720,7 +648,8 @@ def create_exams_and_exam_entries(self):
                                 admin_id,  # reviewed_by
                                 reviewed_at,  # reviewed_at
                                 submitted_at.strftime('%Y-%m-%d %H:%M:%S')  # created_at
-                            ])
+                            ]
+                            exam_entry_class_ids.add(cc['course_class_id'])
                         
                         # Find an available time slot for this specific date
                         exam_scheduled = False
@@ -739,6 +668,11 @@ def create_exams_and_exam_entries(self):
                             
                             hour, minute, slot_duration = exam_slots[slot_idx]
                             
+                            # FIXED: Not while the test student has a lesson, nor while a class
+                            # sharing students with this one sits its exam
+                            if not test_student_slot_clear(test_student_id, cc, exam_date, slot_idx):
+                                continue
+                            
                             # Create unique key for this date+time combination (GLOBAL check)
                             date_time_key = f"{exam_date_str}_{hour:02d}_{minute:02d}"
                             
@@ -746,200 +680,48 @@ def create_exams_and_exam_entries(self):
                             if date_time_key in date_time_room_usage:
                                 continue
                             
-                            # Try different rooms for this time slot
-                            available_rooms = [r for r in self.data['rooms'] if r.get('room_type') in ['exam', 'classroom', 'lecture_hall']]
-                            if not available_rooms:
-                                available_rooms = self.data['rooms']  # Fallback to all rooms
+                            # UPDATED: Exam rooms sized to the class (split if needed), one free proctor each
+                            rooms = seat_exam(exam_id, cc, exam_date, slot_idx, exam_status)
+                            if rooms is None:
+                                continue
                             
-                            # Shuffle rooms to get variety
-                            random.shuffle(available_rooms)
+                            # Mark this slot and date+time combination as used
+                            used_slots_for_date.add(slot_idx)
+                            date_time_room_usage[date_time_key] = rooms[0]['room_id']
                             
-                            room_found = False
-                            for room in available_rooms:
-                                # Check if this room+date+time combination conflicts with global usage
-                                conflict_key = (room['room_id'], exam_date_str, hour, minute)
-                                
-                                # Check for conflicts with global exam usage
-                                room_conflict = False
-                                
-                                # Simple check: if exact same room, date, hour, minute already exists globally
-                                if conflict_key in global_exam_room_usage:
-                                    room_conflict = True
-                                else:
-                                    # Check for time overlap (2-hour slots) in global usage
-                                    for existing_key in global_exam_room_usage:
-                                        existing_room, existing_date, existing_hour, existing_minute = existing_key
-                                        if (existing_room == room['room_id'] and 
-                                            existing_date == exam_date_str):
-                                            
-                                            existing_start_minutes = existing_hour * 60 + existing_minute
-                                            existing_end_minutes = existing_start_minutes + 120
-                                            current_start_minutes = hour * 60 + minute
-                                            current_end_minutes = current_start_minutes + 120
-                                            
-                                            # Check overlap
-                                            if not (current_end_minutes <= existing_start_minutes or 
-                                                   current_start_minutes >= existing_end_minutes):
-                                                room_conflict = True
-                                                break
-                                
-                                if not room_conflict:
-                                    # Try to find an instructor who doesn't have conflicts
-                                    monitor_instructor = None
-                                    
-                                    # Shuffle the instructor list to get variety
-                                    potential_instructors = list(self.data['instructors'])
-                                    random.shuffle(potential_instructors)
-                                    
-                                    for potential_instructor in potential_instructors:
-                                        instructor_id = potential_instructor['instructor_id']
-                                        
-                                        # Check if this instructor has course classes at the same time
-                                        instructor_conflict = False
-                                        exam_weekday = exam_date.weekday() + 2  # Convert to 1-7 (Monday=2, Tuesday=3, etc.)
-                                        
-                                        for course_class in self.data['course_classes']:
-                                            if course_class['instructor_id'] == instructor_id:
-                                                # Check if course class is in the same semester and has overlapping time
-                                                cc_days = course_class.get('days', [])
-                                                if exam_weekday in cc_days:
-                                                    cc_start = course_class.get('start_period', 0)
-                                                    cc_end = course_class.get('end_period', 0)
-                                                    
-                                                    # Convert exam time to periods more accurately
-                                                    # Period 1 = 6:00-7:00, Period 2 = 7:00-8:00, etc.
-                                                    # So 7:30 AM = Period 2, 13:30 PM = Period 8
-                                                    if hour <= 6:
-                                                        exam_start_period = 1
-                                                    elif hour <= 12:
-                                                        exam_start_period = hour - 5  # 7:00 AM = Period 2
-                                                    else:
-                                                        exam_start_period = hour - 5  # 13:00 PM = Period 8
-                                                    
-                                                    exam_end_period = exam_start_period + 1  # 2-hour exam = 2 periods
-                                                    
-                                                    # Check for period overlap
-                                                    if not (exam_end_period <= cc_start or exam_start_period >= cc_end):
-                                                        instructor_conflict = True
-                                                        break
-                                        
-                                        if not instructor_conflict:
-                                            monitor_instructor = potential_instructor
-                                            break
-                                    
-                                    if monitor_instructor is None:
-                                        # Fallback: use any instructor if no conflict-free one found
-                                        # But prefer someone who's NOT the test instructor to avoid conflicts
-                                        test_instructor_id = self.data['fixed_accounts'].get('instructor', {}).get('instructor_id')
-                                        available_instructors = [
-                                            instr for instr in self.data['instructors']
-                                            if instr['instructor_id'] != test_instructor_id
-                                        ]
-                                        if available_instructors:
-                                            monitor_instructor = random.choice(available_instructors)
-                                        else:
-                                            monitor_instructor = random.choice(self.data['instructors'])
-                                    
-                                    # Found available slot, room, and instructor - now create exam
-                                    exam_class_id = self.generate_uuid()
-                                    
-                                    # Mark this slot and date+time combination as used
-                                    used_slots_for_date.add(slot_idx)
-                                    date_time_room_usage[date_time_key] = room['room_id']
-                                    global_exam_room_usage[conflict_key] = True
-                                    
-                                    exam_datetime = datetime.combine(exam_date, datetime.min.time().replace(hour=hour, minute=minute))
-                                    
-                                    exam_class_rows.append([
-                                        exam_class_id,
-                                        exam_id,
-                                        cc['course_class_id'],
-                                        room['room_id'],
-                                        monitor_instructor['instructor_id'],
-                                        exam_datetime,
-                                        slot_duration,
-                                        exam_status
-                                    ])
-                                    
-                                    self.data['exam_classes'].append({
-                                        'exam_class_id': exam_class_id,
-                                        'exam_id': exam_id,
-                                        'course_class_id': cc['course_class_id'],
-                                        'room_id': room['room_id'],
-                                        'start_time': exam_datetime
-                                    })
-                                    
-                                    exam_scheduled = True
-                                    room_found = True
-                                    time_str = f"{hour:02d}:{minute:02d}"
-                                    self.add_statement(f"-- TEST STUDENT: Exam scheduled for {course['subject_code']} on {exam_date} at {time_str} in {room.get('room_code', 'Room')} (status: {exam_status}) [Slot {slot_idx+1}]")
-                                    break
-                            
-                            if room_found:
-                                break
+                            exam_scheduled = True
+                            time_str = f"{hour:02d}:{minute:02d}"
+                            room_codes = ', '.join(room.get('room_code', 'Room') for room in rooms)
+                            self.add_statement(f"-- TEST STUDENT: Exam scheduled for {course['subject_code']} on {exam_date} at {time_str} in {room_codes} (status: {exam_status}) [Slot {slot_idx+1}]")
+                            break
                         
                         if not exam_scheduled:
-                            # Fallback: force schedule with any available room and unused slot
-                            # Find any unused slot for this date
-                            unused_slot_idx = None
-                            for slot_idx in range(len(exam_slots)):
-                                if slot_idx not in used_slots_for_date:
-                                    unused_slot_idx = slot_idx
+                            # Fallback: any slot of this date left unused by the test student
+                            # (another test student may share its time) - still clash-free
+                            clear_slots = [k for k in range(len(exam_slots))
+                                           if k not in used_slots_for_date
+                                           and test_student_slot_clear(test_student_id, cc, exam_date, k)]
+                            
+                            rooms = None
+                            for slot_idx in clear_slots:
+                                rooms = seat_exam(exam_id, cc, exam_date, slot_idx, exam_status)
+                                if rooms is not None:
                                     break
                             
-                            if unused_slot_idx is not None:
-                                hour, minute, slot_duration = exam_slots[unused_slot_idx]
-                                
-                                # Try to find a room that doesn't conflict
-                                available_rooms = list(self.data['rooms'])
-                                random.shuffle(available_rooms)
-                                
-                                room = None
-                                for candidate_room in available_rooms:
-                                    fallback_key = (candidate_room['room_id'], exam_date_str, hour, minute)
-                                    if fallback_key not in global_exam_room_usage:
-                                        room = candidate_room
-                                        break
-                                
-                                # If no conflict-free room found, use any room
-                                if room is None:
-                                    room = random.choice(available_rooms)
-                                    fallback_key = (room['room_id'], exam_date_str, hour, minute)
-                                
-                                monitor_instructor = random.choice(self.data['instructors'])
-                                
-                                exam_class_id = self.generate_uuid()
-                                exam_datetime = datetime.combine(exam_date, datetime.min.time().replace(hour=hour, minute=minute))
+                            if rooms is not None:
+                                hour, minute, slot_duration = exam_slots[slot_idx]
                                 
                                 # Mark slot and date+time as used
-                                used_slots_for_date.add(unused_slot_idx)
+                                used_slots_for_date.add(slot_idx)
                                 date_time_key = f"{exam_date_str}_{hour:02d}_{minute:02d}"
-                                date_time_room_usage[date_time_key] = room['room_id']
-                                global_exam_room_usage[fallback_key] = True
-                                
-                                exam_class_rows.append([
-                                    exam_class_id,
-                                    exam_id,
-                                    cc['course_class_id'],
-                                    room['room_id'],
-                                    monitor_instructor['instructor_id'],
-                                    exam_datetime,
-                                    slot_duration,
-                                    exam_status
-                                ])
-                                
-                                self.data['exam_classes'].append({
-                                    'exam_class_id': exam_class_id,
-                                    'exam_id': exam_id,
-                                    'course_class_id': cc['course_class_id'],
-                                    'room_id': room['room_id'],
-                                    'start_time': exam_datetime
-                                })
+                                date_time_room_usage[date_time_key] = rooms[0]['room_id']
                                 
                                 time_str = f"{hour:02d}:{minute:02d}"
-                                self.add_statement(f"-- TEST STUDENT: Exam scheduled (fallback) for {course['subject_code']} on {exam_date} at {time_str} (status: {exam_status}) [Slot {unused_slot_idx+1}]")
+                                self.add_statement(f"-- TEST STUDENT: Exam scheduled (fallback) for {course['subject_code']} on {exam_date} at {time_str} (status: {exam_status}) [Slot {slot_idx+1}]")
+                            elif clear_slots:
+                                self.add_statement(f"-- ERROR: Could not schedule exam for {course['subject_code']} on {exam_date} - no free room or proctor")
                             else:
-                                # All slots for this date are used - this shouldn't happen with proper logic
+                                # No slot of this date is free of the student's lessons and other exams
                                 self.add_statement(f"-- ERROR: Could not schedule exam for {course['subject_code']} on {exam_date} - all time slots used")
                         
                         course_idx += 1
@@ -963,13 +745,13 @@ def create_exams_and_exam_entries(self):
                     'display_name', 'question_file_path', 'answer_file_path',
                     'duration_minutes', 'is_picked', 'entry_status', 'rejection_reason',
                     'reviewed_by', 'reviewed_at', 'created_at'],
-                    exam_entry_rows)
+                    list(exam_entry_rows.values()))
     
     # Insert exam_class schedules
     self.bulk_insert('exam_class',
                     ['exam_class_id', 'exam_id', 'course_class_id', 'room_id',
                     'monitor_instructor_id', 'start_time', 'duration_minutes', 'exam_status'],
-                    exam_class_rows)
+                    list(exam_class_rows.values()))
 
 
 # Bind the function to SQLDataGenerator
@@ -1,13 +1,26 @@
 from .spec_parser import SpecParser
 from .media_scanner import MediaScanner
+from .unique_ids import UniqueIdentifiers
+from .curriculum_index import CurriculumIndex
+from .timetable import TimetableEngine
+from .instructor_load import InstructorLoadBalancer
 import uuid
 import os
 import hmac
 import hashlib
 import base64
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
 from .config import *
 
+def hash_password(password, salt_bytes):
+    """HMAC-SHA512(salt, password), base64 encoded - module level so worker processes can pickle it"""
+    h = hmac.new(salt_bytes, password.encode('utf-8'), hashlib.sha512)
+    return base64.b64encode(h.digest()).decode('utf-8')
+
+def _hash_password_pair(pair):
+    return hash_password(*pair)
+
 def generate_theme_insert_from_file(file_path):
     """
     Reads a theme configuration text file and generates SQL INSERT statement.
@@ -80,6 +93,24 @@ class SQLDataGenerator:
         # Initialize media scanner
         self.media_scanner = MediaScanner(media_base_path)
         
+        # Collision-free phone / citizen_id / login generators shared by every person
+        self.unique_ids = UniqueIdentifiers()
+        
+        # Academic calendar (date dimension), built with the semesters
+        self.calendar = None
+        
+        # Curriculum -> subjects index, filled by create_curriculum_details
+        self.curriculum_index = CurriculumIndex()
+        
+        # Subject prerequisite DAG, built by create_subjects
+        self.prerequisites = None
+        
+        # Room / instructor weekly occupancy per semester, filled by create_course_classes
+        self.timetable = TimetableEngine()
+        
+        # Least-loaded instructor per semester (sections and exam proctoring)
+        self.instructor_load = InstructorLoadBalancer(self.timetable)
+        
         self.data = {
             'persons': [],
             'user_accounts': [],
@@ -118,6 +149,18 @@ class SQLDataGenerator:
     def generate_uuid(self):
         return str(uuid.uuid4()).upper()
     
+    def generate_uuids(self, count):
+        """Generate many uppercase UUID4 strings from a single os.urandom call"""
+        raw = bytearray(os.urandom(16 * count))
+        # Stamp version 4 / RFC 4122 variant bits, same as uuid.uuid4()
+        raw[6::16] = bytes((b & 0x0F) | 0x40 for b in raw[6::16])
+        raw[8::16] = bytes((b & 0x3F) | 0x80 for b in raw[8::16])
+        hex_str = raw.hex().upper()
+        return [
+            f"{hex_str[i:i+8]}-{hex_str[i+8:i+12]}-{hex_str[i+12:i+16]}-{hex_str[i+16:i+20]}-{hex_str[i+20:i+32]}"
+            for i in range(0, 32 * count, 32)
+        ]
+    
     def format_value(self, value):
         if value is None:
             return 'NULL'
@@ -155,8 +198,26 @@ class SQLDataGenerator:
         self.sql_statements.append(statement)
     
     def create_password_hash(self, password, salt_bytes):
-        h = hmac.new(salt_bytes, password.encode('utf-8'), hashlib.sha512)
-        return base64.b64encode(h.digest()).decode('utf-8')
+        return hash_password(password, salt_bytes)
+    
+    def create_password_hashes(self, pairs):
+        """
+        Hash many (password, salt_bytes) pairs, returned in input order.
+        Identical pairs are hashed once; large batches are spread over a process pool.
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        workers = int(self.test_config.get('hash_workers', 0)) or os.cpu_count() or 1
+        threshold = int(self.test_config.get('hash_parallel_threshold', PASSWORD_HASH_PARALLEL_THRESHOLD))
+        
+        if workers > 1 and len(unique_pairs) >= threshold:
+            chunksize = max(1, len(unique_pairs) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                hashes = list(pool.map(_hash_password_pair, unique_pairs, chunksize=chunksize))
+        else:
+            hashes = [hash_password(password, salt) for password, salt in unique_pairs]
+        
+        lookup = dict(zip(unique_pairs, hashes))
+        return [lookup[pair] for pair in pairs]
 
     def cleanup_empty_course_classes(self):
         """
@@ -402,6 +463,7 @@ PRINT 'Fall 2025 course classes preserved for upcoming registration';"""
         self.create_training_systems()
         self.create_faculties_and_departments()
         self.create_academic_years_and_semesters()
+        self.create_calendar_dates()
         
         # =========================================================================
         # PHASE 3: PEOPLE & ACCOUNTS (MOVED DOWN - AFTER FACULTIES EXIST)
@@ -544,25 +606,9 @@ PRINT 'Fall 2025 course classes preserved for upcoming registration';"""
         
         self.add_statement("\n-- =========================================================================")
         
-        # =========================================================================
-        # PHASE 14: CONFLICT RESOLUTION - DELETE CONFLICTING ENTRIES
-        # =========================================================================
-        self.add_statement("\n-- =========================================================================")
-        self.add_statement("-- PHASE 14: CONFLICT RESOLUTION - DELETE CONFLICTING ENTRIES")
-        self.add_statement("-- =========================================================================")
-        
-        # Read and append delete_conflicts.sql content
-        delete_conflicts_sql_path = r'database-qldh\sql\fix\delete_conflicts.sql'
-        try:
-            with open(delete_conflicts_sql_path, 'r', encoding='utf-8-sig') as f:
-                delete_conflicts_content = f.read().strip()
-                self.add_statement(delete_conflicts_content)
-        except FileNotFoundError:
-            self.add_statement(f"-- Warning: delete_conflicts.sql file not found at {delete_conflicts_sql_path}")
-        except Exception as e:
-            self.add_statement(f"-- Error reading delete_conflicts.sql: {str(e)}")
-        
-        self.add_statement("\n-- =========================================================================")
+        # NOTE: No post-load conflict-delete phase - create_exams_and_exam_entries
+        # timetables exams around shared students, test accounts' lessons and proctors'
+        # teaching up front (sql/fix/delete_conflicts.sql is kept for existing databases)
         
         # =========================================================================
         # FINAL STATISTICS
@@ -0,0 +1,181 @@
+"""
+Academic calendar / date dimension
+Built once after semesters exist; every module reads weekdays, semester weeks,
+exam windows and period clock times from here instead of recomputing them
+"""
+
+import random
+from collections import namedtuple
+from datetime import datetime, date, time, timedelta
+
+# Weekday codes follow course_class.day_of_week: Monday = 2 ... Sunday = 8
+WEEKDAY_CODES = [2, 3, 4, 5, 6, 7, 8]
+
+# Period p runs (5 + p):00 - (6 + p):00, i.e. period 1 = 6:00-7:00, period 12 = 17:00-18:00
+PERIOD_CLOCK = {period: (time(5 + period, 0), time(6 + period, 0)) for period in range(1, 13)}
+
+# Exam window: last 14 days of the semester, Monday to Saturday
+EXAM_WINDOW_DAYS = 14
+
+CalendarDay = namedtuple('CalendarDay', [
+    'calendar_date', 'date_str', 'weekday_code', 'is_weekend',
+    'semester_id', 'academic_year_id', 'week_of_semester', 'is_exam_day'
+])
+
+
+def to_next_monday(d):
+    """Move to next Monday if not already Monday"""
+    return d + timedelta(days=(7 - d.weekday()) % 7)
+
+
+def to_next_sunday(d):
+    """Move to next Sunday if not already Sunday"""
+    return d + timedelta(days=(6 - d.weekday()) % 7)
+
+
+def to_prev_monday(d):
+    """Move to previous Monday if not already Monday"""
+    return d - timedelta(days=d.weekday())
+
+
+def clock_to_period(hour):
+    """Period containing a clock hour (7:30 -> period 2, 13:30 -> period 8)"""
+    return 1 if hour <= 6 else hour - 5
+
+
+class AcademicCalendar:
+    """Every date between the first semester start and the last semester end"""
+
+    def __init__(self, semesters):
+        self.days = {}
+        self.semesters = {s['semester_id']: s for s in semesters}
+        self._semester_dates = {}
+        self._exam_dates = {}
+        self._week_dates = {}
+        self._parsed = {}
+
+        if not semesters:
+            return
+
+        first = min(s['start_date'] for s in semesters)
+        last = max(s['end_date'] for s in semesters)
+
+        # Semester lookup per date (semesters do not overlap)
+        owner = {}
+        for sem in sorted(semesters, key=lambda s: s['start_date']):
+            exam_start = sem['end_date'] - timedelta(days=EXAM_WINDOW_DAYS)
+            dates = []
+            current = sem['start_date']
+            while current <= sem['end_date']:
+                owner.setdefault(current, (sem, exam_start))
+                dates.append(current)
+                current += timedelta(days=1)
+            self._semester_dates[sem['semester_id']] = dates
+            # FIXED: The exam window hangs off end_date alone, so a semester whose generated
+            # start_date falls after its end_date still gets one
+            self._exam_dates[sem['semester_id']] = [
+                exam_start + timedelta(days=offset)
+                for offset in range(EXAM_WINDOW_DAYS + 1)
+                if (exam_start + timedelta(days=offset)).weekday() < 6
+            ]
+
+        current = first
+        while current <= last:
+            weekday = current.weekday()
+            sem, exam_start = owner.get(current, (None, None))
+            week = (current - sem['start_date']).days // 7 + 1 if sem else None
+            day = CalendarDay(
+                calendar_date=current,
+                date_str=current.strftime('%Y-%m-%d'),
+                weekday_code=WEEKDAY_CODES[weekday],
+                is_weekend=weekday >= 5,
+                semester_id=sem['semester_id'] if sem else None,
+                academic_year_id=sem['academic_year_id'] if sem else None,
+                week_of_semester=week,
+                is_exam_day=bool(sem) and current >= exam_start and weekday < 6
+            )
+            self.days[current] = day
+            if sem:
+                self._week_dates[(sem['semester_id'], week, day.weekday_code)] = current
+            current += timedelta(days=1)
+
+    def as_date(self, value):
+        """Accept a date or 'YYYY-MM-DD' string"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if value not in self._parsed:
+            self._parsed[value] = datetime.strptime(value, '%Y-%m-%d').date()
+        return self._parsed[value]
+
+    def day(self, value):
+        return self.days.get(self.as_date(value))
+
+    def date_str(self, value):
+        d = self.as_date(value)
+        day = self.days.get(d)
+        return day.date_str if day else d.strftime('%Y-%m-%d')
+
+    def weekday_code(self, value):
+        d = self.as_date(value)
+        day = self.days.get(d)
+        return day.weekday_code if day else WEEKDAY_CODES[d.weekday()]
+
+    def semester(self, semester_id):
+        return self.semesters.get(semester_id)
+
+    def semester_dates(self, semester_id):
+        return self._semester_dates.get(semester_id, [])
+
+    def random_semester_date(self, semester_id):
+        dates = self._semester_dates.get(semester_id)
+        return random.choice(dates) if dates else None
+
+    def exam_dates(self, semester_id):
+        """Exam-window dates (Mon-Sat) of a semester"""
+        return self._exam_dates.get(semester_id, [])
+
+    def weeks_in_semester(self, semester_id):
+        dates = self._semester_dates.get(semester_id)
+        return (len(dates) + 6) // 7 if dates else 0
+
+    def date_for(self, semester_id, week, weekday_code):
+        """Date of a given semester week (1-based) and weekday code, or None if outside the semester"""
+        return self._week_dates.get((semester_id, week, weekday_code))
+
+
+def create_calendar_dates(self):
+    """Emit the calendar dimension as the calendar_date and class_period tables"""
+    self.add_statement("\n-- ==================== CALENDAR DATES ====================")
+    self.add_statement("-- One row per date from the first semester start to the last semester end")
+    self.add_statement("-- weekday_code matches course_class.day_of_week (Monday = 2 ... Sunday = 8)")
+
+    calendar_rows = [
+        [day.calendar_date, day.weekday_code, day.is_weekend, day.semester_id,
+         day.academic_year_id, day.week_of_semester, day.is_exam_day]
+        for day in self.calendar.days.values()
+    ]
+
+    exam_days = sum(1 for day in self.calendar.days.values() if day.is_exam_day)
+    self.add_statement(f"-- Total dates: {len(calendar_rows)}, exam-window days: {exam_days}")
+
+    self.bulk_insert('calendar_date',
+                    ['calendar_date', 'weekday_code', 'is_weekend', 'semester_id',
+                    'academic_year_id', 'week_of_semester', 'is_exam_day'],
+                    calendar_rows)
+
+    # Period-to-clock mapping, so portal queries can join periods instead of computing hours
+    period_rows = [
+        [period, start.strftime('%H:%M:%S'), end.strftime('%H:%M:%S')]
+        for period, (start, end) in PERIOD_CLOCK.items()
+    ]
+    self.add_statement(f"-- Class periods: {len(period_rows)}")
+
+    self.bulk_insert('class_period',
+                    ['period', 'start_time', 'end_time'],
+                    period_rows)
+
+
+from modules.base_generator import SQLDataGenerator
+SQLDataGenerator.create_calendar_dates = create_calendar_dates
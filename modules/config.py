@@ -15,4 +15,21 @@ MEDIA_BUCKETS = {
     'regulations': 'regulations'
 }
 
-MEDIA_BASE_PATH = R'medias'
\ No newline at end of file
+MEDIA_BASE_PATH = R'medias'
+
+# ==================== MEDIA DEDUPLICATION ====================
+# Content hashes are cached here (inside MEDIA_BASE_PATH) and reused while
+# a file's size and mtime are unchanged
+MEDIA_MANIFEST_FILE = '.media_manifest.json'
+MEDIA_HASH_WORKERS = 8
+
+# ==================== PASSWORD HASHING ====================
+# Generated accounts are only hashed when [test_accounts] hash_generated_passwords: true.
+# Below this many distinct (password, salt) pairs hashing stays in-process,
+# since pool start-up costs more than HMAC-SHA512 itself
+PASSWORD_HASH_PARALLEL_THRESHOLD = 200000
+
+# ==================== COURSE CLASS SCHEDULING ====================
+# Semesters are scheduled independently; [courses] schedule_workers (0 = one per CPU)
+# worker processes are only used once this many sections are planned
+SCHEDULE_PARALLEL_THRESHOLD = 5000
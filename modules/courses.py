@@ -1,7 +1,75 @@
+import os
 import random
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, date
 from .config import *
+from .timetable import SCHEDULE_PATTERNS, RoomAllocator, TimetableEngine
+from .instructor_load import InstructorLoadBalancer
+
+try:
+    import numpy as np
+except ImportError:  # Vectorized demand is optional; fall back to per-cohort loops
+    np = None
+
+
+def estimate_course_demand(self):
+    """
+    Expected students per course_id, computed per cohort instead of per student
+    - A cohort is (curriculum_id, class_start_year); its students share eligibility
+    - Curriculum courses from the cohort's start year onwards: every student of the cohort
+    - Other courses: each student shows interest with 30% chance (binomial per cohort x course)
+    - Future semesters (2026+, Spring/Summer 2025) have no demand
+    """
+    cohort_sizes = defaultdict(int)
+    for student in self.data['students']:
+        curriculum_id = self.curriculum_index.class_curriculum.get(student['class_id'])
+        if self.curriculum_index.subjects_for(curriculum_id):
+            cohort_sizes[(curriculum_id, student['class_start_year'])] += 1
+    
+    courses = [c for c in self.data['courses']
+               if c['start_year'] <= 2025
+               and not (c['start_year'] == 2025 and c['semester_type'] in ('spring', 'summer'))]
+    cohorts = list(cohort_sizes)
+    course_demand = defaultdict(int)
+    if not courses or not cohorts:
+        return course_demand
+    
+    if np is not None:
+        # Cohort x course incidence: curriculum membership and start-year eligibility
+        subject_index = {}
+        course_subjects = np.array([subject_index.setdefault(c['subject_id'], len(subject_index)) for c in courses])
+        curriculum = np.zeros((len(cohorts), len(subject_index)), dtype=bool)
+        for row, (curriculum_id, _) in enumerate(cohorts):
+            cols = [subject_index[sid] for sid in self.curriculum_index.subjects_for(curriculum_id) if sid in subject_index]
+            curriculum[row, cols] = True
+        in_curriculum = curriculum[:, course_subjects]
+        
+        start_years = np.array([start_year for _, start_year in cohorts])
+        course_years = np.array([c['start_year'] for c in courses])
+        eligible = course_years[None, :] >= start_years[:, None]
+        sizes = np.array([cohort_sizes[cohort] for cohort in cohorts])
+        
+        rng = np.random.default_rng(random.getrandbits(64))
+        required = sizes @ (in_curriculum & eligible)
+        elective_pool = np.where(~in_curriculum & eligible, sizes[:, None], 0)
+        interested = rng.binomial(elective_pool, 0.3).sum(axis=0)
+        
+        for course, count in zip(courses, (required + interested).tolist()):
+            if count:
+                course_demand[course['course_id']] = count
+        return course_demand
+    
+    for (curriculum_id, start_year), size in cohort_sizes.items():
+        curriculum_subject_ids = self.curriculum_index.subjects_for(curriculum_id)
+        for course in courses:
+            if course['start_year'] < start_year:
+                continue
+            if course['subject_id'] in curriculum_subject_ids:
+                course_demand[course['course_id']] += size
+            else:
+                course_demand[course['course_id']] += random.binomialvariate(size, 0.3)
+    return course_demand
 
 def create_courses(self):
     """
@@ -19,9 +87,7 @@ def create_courses(self):
     fee = float(self.course_config.get('fee_per_credit', 60))
     
     # UPDATED: Build curriculum demand to prioritize needed subjects
-    curriculum_subjects = set()
-    for cd in self.data.get('curriculum_details', []):
-        curriculum_subjects.add(cd['subject_id'])
+    curriculum_subjects = self.curriculum_index.all_subjects
     
     # Separate subjects into curriculum vs non-curriculum
     curriculum_subject_list = [s for s in self.data['subjects'] if s['subject_id'] in curriculum_subjects]
@@ -60,7 +126,7 @@ def create_courses(self):
                     test_class = next((c for c in self.data['classes'] if c['class_id'] == test_student['class_id']), None)
                     if test_class:
                         test_curriculum_id = test_class.get('curriculum_id')
-                        test_curriculum_subjects = {cd['subject_id'] for cd in self.data.get('curriculum_details', []) if cd['curriculum_id'] == test_curriculum_id}
+                        test_curriculum_subjects = self.curriculum_index.subjects_for(test_curriculum_id)
                         # pick up to 6 subjects from the test student's curriculum to force into fall offerings
                         preferred = [s for s in curriculum_subject_list if s['subject_id'] in test_curriculum_subjects]
                         if preferred:
@@ -118,6 +184,136 @@ def create_courses(self):
     self.bulk_insert('course', ['course_id', 'subject_id', 'semester_id', 'course_code', 'fee_per_credit', 'course_status'], course_rows)
 
 
+def schedule_semester_sections(job):
+    """
+    Place every section of one semester (a worker-process job when scheduling runs in parallel)
+    - Room AND instructor occupancy as (day x period) bitmasks (see modules/timetable.py)
+    - Tightest-fitting free room, least-loaded free instructor
+    - Seeded per semester, so the result does not depend on which process runs it
+    Returns placements per course_id (room_id None = skipped), the semester's timetable and loads
+    """
+    outer_state = random.getstate()
+    random.seed(job['seed'])
+    try:
+        semester_id = job['semester_id']
+        timetable = TimetableEngine()
+        semester_timetable = timetable.semester(semester_id)
+        instructor_load = InstructorLoadBalancer(timetable)
+        room_allocator = RoomAllocator(job['rooms'])
+        instructors = job['instructors']
+        test_instructor_id = job['test_instructor_id']
+        min_per_section = job['min_per_section']
+        max_per_section = job['max_per_section']
+        
+        # UPDATED: Instructor pools per department / faculty - staff are sized to each
+        # department's load, so sections draw from the owning department first
+        department_pools = defaultdict(list)
+        faculty_pools = defaultdict(list)
+        for inst in instructors:
+            if inst.get('department_id'):
+                department_pools[inst['department_id']].append(inst)
+            if inst.get('faculty_id'):
+                faculty_pools[inst['faculty_id']].append(inst)
+        
+        placements = defaultdict(list)
+        stats = {'scheduling_attempts': 0, 'department_matched': 0, 'seats_assigned': 0, 'seats_offered': 0}
+        
+        for plan in job['plans']:
+            num_students = plan['num_students']
+            num_sections = plan['num_sections']
+            
+            # General subjects (no department) are taught from the whole staff
+            dept_id = plan['department_id']
+            faculty_id = job['faculty_by_department'].get(dept_id)
+            if department_pools.get(dept_id):
+                preferred_pool = (('department', dept_id), department_pools[dept_id])
+            elif faculty_pools.get(faculty_id):
+                preferred_pool = (('faculty', faculty_id), faculty_pools[faculty_id])
+            else:
+                preferred_pool = (('all', None), instructors)
+            
+            room_type_groups = room_allocator.room_type_groups(plan['practice_heavy'])
+            
+            for session_idx in range(num_sections):
+                # FIXED: Better capacity calculation (decided before placement so the room can fit it)
+                if session_idx == num_sections - 1:
+                    remaining = num_students - (session_idx * max_per_section)
+                    session_max_students = min(remaining + 5, max_per_section)
+                else:
+                    session_max_students = random.randint(min_per_section, max_per_section)
+                
+                prefer_test_instructor = (plan['start_year'] == 2025 and plan['semester_type'] == 'fall'
+                                          and random.random() < 0.3)
+                
+                # Enumerate feasible placements directly instead of random trial:
+                # rooms that hold the section first (preferred types, other teaching rooms, anything),
+                # then undersized rooms as a last resort
+                patterns = random.sample(SCHEDULE_PATTERNS, len(SCHEDULE_PATTERNS))
+                room_passes = ([(group, False) for group in room_type_groups] +
+                               [(group, True) for group in room_type_groups])
+                
+                placement = None
+                for room_types, allow_undersized in room_passes:
+                    for pattern in list(patterns):
+                        days, time_slot, mask = pattern
+                        stats['scheduling_attempts'] += 1
+                        room = room_allocator.find(semester_timetable, room_types, session_max_students, mask,
+                                                   allow_undersized=allow_undersized)
+                        if room is None:
+                            continue
+                        
+                        # UPDATED: Least-loaded free instructor for this slot - owning department
+                        # (or faculty) first, then anyone on staff
+                        instructor_id = None
+                        if prefer_test_instructor and semester_timetable.instructor_free(test_instructor_id, mask):
+                            instructor_id = test_instructor_id
+                        if instructor_id is None:
+                            for pool_key, pool in (preferred_pool, (('all', None), instructors)):
+                                instructor_id = instructor_load.pick(semester_id, pool_key, pool, mask)
+                                if instructor_id:
+                                    if pool_key[0] == 'department':
+                                        stats['department_matched'] += 1
+                                    break
+                        if instructor_id is None:
+                            patterns.remove(pattern)  # No instructor free in this slot - skip it in later passes
+                            continue
+                        
+                        placement = (room, instructor_id, days, time_slot, mask)
+                        break
+                    if placement:
+                        break
+                
+                if placement is None:
+                    placements[plan['course_id']].append({'session_idx': session_idx, 'room_id': None})
+                    continue
+                
+                room, instructor_id, days, time_slot, mask = placement
+                # FIXED: Mark the slot as used for BOTH room AND instructor
+                semester_timetable.book(room['room_id'], instructor_id, mask)
+                instructor_load.add_load(semester_id, instructor_id, len(days) * (time_slot[1] - time_slot[0] + 1))
+                stats['seats_assigned'] += session_max_students
+                stats['seats_offered'] += room['capacity']
+                
+                placements[plan['course_id']].append({
+                    'session_idx': session_idx,
+                    'room_id': room['room_id'],
+                    'instructor_id': instructor_id,
+                    'days': days,
+                    'time_slot': time_slot,
+                    'max_students': session_max_students,
+                })
+        
+        return {
+            'semester_id': semester_id,
+            'placements': dict(placements),
+            'timetable': semester_timetable,
+            'loads': dict(instructor_load.loads[semester_id]),
+            'stats': stats,
+        }
+    finally:
+        random.setstate(outer_state)
+
+
 def create_course_classes(self):
     """
     FIXED: Create course classes with proper conflict detection
@@ -134,116 +330,28 @@ def create_course_classes(self):
     # Get admin user for grade approval
     admin_id = self.data['fixed_accounts']['admin']['admin_id']
     
-    # Calculate students who NEED each course (based on curriculum)
-    course_demand = defaultdict(set)
-    
-    # UPDATED: More inclusive demand calculation
-    for student in self.data['students']:
-        class_id = student['class_id']
-        cls = next((c for c in self.data['classes'] if c['class_id'] == class_id), None)
-        if not cls:
-            continue
-        
-        curriculum_id = cls.get('curriculum_id')
-        if not curriculum_id:
-            continue
-        
-        curriculum_subject_ids = set()
-        for cd in self.data.get('curriculum_details', []):
-            if cd['curriculum_id'] == curriculum_id:
-                curriculum_subject_ids.add(cd['subject_id'])
-        
-        if not curriculum_subject_ids:
-            continue
-        
-        student_start_year = student['class_start_year']
-        
-        for course in self.data['courses']:
-            # UPDATED: Include curriculum courses + some electives for variety
-            is_curriculum_course = course['subject_id'] in curriculum_subject_ids
-            is_elective_course = course['subject_id'] not in curriculum_subject_ids
-            
-            # Students can take:
-            # 1. All curriculum courses from their start year onwards
-            # 2. Some elective courses (30% chance) for academic diversity
-            should_add_demand = False
-            
-            if is_curriculum_course and course['start_year'] >= student_start_year:
-                # Skip future years and future semesters in 2025
-                if course['start_year'] > 2025:
-                    continue
-                if course['start_year'] == 2025 and course['semester_type'] in ('spring', 'summer'):
-                    continue
-                should_add_demand = True
-            
-            elif is_elective_course and course['start_year'] >= student_start_year:
-                # Skip future years and future semesters in 2025
-                if course['start_year'] > 2025:
-                    continue
-                if course['start_year'] == 2025 and course['semester_type'] in ('spring', 'summer'):
-                    continue
-                # 30% of students show interest in elective courses
-                if random.random() < 0.3:
-                    should_add_demand = True
-            
-            if should_add_demand:
-                course_demand[course['course_id']].add(student['student_id'])
-    
+    # Students who NEED each course (based on curriculum) - counts per course_id
+    course_demand = estimate_course_demand(self)
+
     # SPECIAL: Ensure test student creates demand for summer 2024-2025 courses
     # This ensures course classes are created for summer 2024-2025 even if no other students need them
     test_student_id = self.data['fixed_accounts'].get('student', {}).get('student_id')
     if test_student_id:
         test_student = next((s for s in self.data['students'] if s['student_id'] == test_student_id), None)
-        if test_student:
-            test_student_class_id = test_student['class_id']
-            test_student_class = next((c for c in self.data['classes'] if c['class_id'] == test_student_class_id), None)
-            if test_student_class:
-                curriculum_id = test_student_class.get('curriculum_id')
-                curriculum_subject_ids = set()
-                for cd in self.data.get('curriculum_details', []):
-                    if cd['curriculum_id'] == curriculum_id:
-                        curriculum_subject_ids.add(cd['subject_id'])
-                
-                # Find summer 2024-2025 semester
-                summer_2024_2025_semester = None
-                for sem in self.data['semesters']:
-                    if sem['start_year'] == 2024 and sem['semester_type'] == 'summer':
-                        summer_2024_2025_semester = sem
-                        break
-                
-                if summer_2024_2025_semester:
-                    # Add demand for all summer 2024-2025 courses (curriculum and non-curriculum)
-                    for course in self.data['courses']:
-                        if course['semester_id'] == summer_2024_2025_semester['semester_id']:
-                            course_demand[course['course_id']].add(test_student_id)
-    
-    # Day combinations for scheduling
-    day_combinations = [
-        [2, 4],    # Mon, Wed
-        [3, 5],    # Tue, Thu
-        [2, 5],    # Mon, Thu
-        [3, 6],    # Tue, Fri
-        [4, 6],    # Wed, Fri
-        [2, 3],    # Mon, Tue
-        [4, 5],    # Wed, Thu
-        [5, 6],    # Thu, Fri
-    ]
-    
-    # Time slots
-    time_slots = [
-        (1, 5),
-        (6, 9),
-        (10, 12)
-    ]
-    
-    # FIXED: Track room usage with proper conflict detection
-    # Key: (room_id, semester_id, day, period) -> course_class_id
-    room_usage = {}
-    
-    # FIXED: Track instructor usage to prevent scheduling conflicts
-    # Key: (instructor_id, semester_id, day, period) -> course_class_id
-    instructor_usage = {}
-    
+        if test_student and self.curriculum_index.class_curriculum.get(test_student['class_id']) is not None:
+            # Find summer 2024-2025 semester
+            summer_2024_2025_semester = None
+            for sem in self.data['semesters']:
+                if sem['start_year'] == 2024 and sem['semester_type'] == 'summer':
+                    summer_2024_2025_semester = sem
+                    break
+
+            if summer_2024_2025_semester:
+                # Add demand for all summer 2024-2025 courses (curriculum and non-curriculum)
+                for course in self.data['courses']:
+                    if course['semester_id'] == summer_2024_2025_semester['semester_id']:
+                        course_demand[course['course_id']] += 1
+
     grade_workflow_stats = {
         'approved': 0,
         'pending': 0,
@@ -254,6 +362,12 @@ def create_course_classes(self):
     sections_created = 0
     sections_skipped = 0
     
+    # FIXED: Better section calculation (25-45 students per section)
+    min_per_section = 25
+    max_per_section = 45
+    
+    subject_department = {s['subject_id']: s.get('department_id') for s in self.data['subjects']}
+    
     # UPDATED: Create course classes for:
     # - Past semesters (start_year < 2025) - already completed
     # - Summer 2024-2025 (start_year == 2024 and semester_type == 'summer') - current/ongoing semester
@@ -262,6 +376,9 @@ def create_course_classes(self):
     # - Spring/Summer 2025 (start_year == 2025 and semester_type != 'fall') - future semesters
     # - Any year > 2025 - future academic years
     
+    # UPDATED: Section plans grouped by semester - room / instructor occupancy is per semester,
+    # so every semester is an independent scheduling job
+    plans_by_semester = defaultdict(list)
     for course in self.data['courses']:
         # Filter: Skip future years (2026+)
         if course['start_year'] > 2025:
@@ -280,8 +397,7 @@ def create_course_classes(self):
         if total_hours == 0:
             continue
         
-        potential_students = course_demand.get(course['course_id'], set())
-        num_students = len(potential_students)
+        num_students = course_demand.get(course['course_id'], 0)
         
         # For summer 2024-2025, ensure at least one course class is created even with minimal demand
         # This is important for test student enrollment
@@ -295,235 +411,248 @@ def create_course_classes(self):
         if is_summer_2024_2025 and num_students == 0:
             num_students = 1  # Create at least 1 section for test student
         
-        # FIXED: Better section calculation (25-45 students per section)
-        min_per_section = 25
-        max_per_section = 45
-        num_sections = max(1, (num_students + max_per_section - 1) // max_per_section)
-        
-        for session_idx in range(num_sections):
-            # Try to find conflict-free slot
-            scheduled = False
-            attempts = 0
-            max_attempts = 200
+        plans_by_semester[course['semester_id']].append({
+            'course_id': course['course_id'],
+            'start_year': course['start_year'],
+            'semester_type': course['semester_type'],
+            'department_id': subject_department.get(course['subject_id']),
+            'practice_heavy': course['practice_hours'] >= course['theory_hours'],
+            'num_students': num_students,
+            'num_sections': max(1, (num_students + max_per_section - 1) // max_per_section),
+        })
+    
+    # One job per semester, each with its own seed drawn (in semester order) from the main RNG,
+    # so placements are identical whether jobs run in-process or in worker processes
+    rooms = [{'room_id': r['room_id'], 'capacity': r['capacity'], 'room_type': r['room_type']}
+             for r in self.data['rooms']]
+    instructors = [{'instructor_id': i['instructor_id'], 'department_id': i.get('department_id'),
+                    'faculty_id': i.get('faculty_id')} for i in self.data['instructors']]
+    jobs = [{
+        'semester_id': semester['semester_id'],
+        'seed': random.getrandbits(64),
+        'plans': plans_by_semester[semester['semester_id']],
+        'rooms': rooms,
+        'instructors': instructors,
+        'faculty_by_department': {d['department_id']: d['faculty_id'] for d in self.data['departments']},
+        'test_instructor_id': self.data['fixed_accounts']['instructor']['instructor_id'],
+        'min_per_section': min_per_section,
+        'max_per_section': max_per_section,
+    } for semester in self.data['semesters'] if semester['semester_id'] in plans_by_semester]
+    
+    workers = int(self.course_config.get('schedule_workers', 0)) or os.cpu_count() or 1
+    threshold = int(self.course_config.get('schedule_parallel_threshold', SCHEDULE_PARALLEL_THRESHOLD))
+    total_sections = sum(plan['num_sections'] for job in jobs for plan in job['plans'])
+    
+    if workers > 1 and len(jobs) > 1 and total_sections >= threshold:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(schedule_semester_sections, jobs))
+    else:
+        results = [schedule_semester_sections(job) for job in jobs]
+    
+    # Merge: occupancy and load go back onto the generator (exam proctoring reads them)
+    placements_by_course = {}
+    schedule_stats = {'scheduling_attempts': 0, 'department_matched': 0, 'seats_assigned': 0, 'seats_offered': 0}
+    for result in results:
+        self.timetable.semesters[result['semester_id']] = result['timetable']
+        self.instructor_load.loads[result['semester_id']].update(result['loads'])
+        placements_by_course.update(result['placements'])
+        for key in schedule_stats:
+            schedule_stats[key] += result['stats'][key]
+    scheduling_attempts = schedule_stats['scheduling_attempts']
+    department_matched = schedule_stats['department_matched']
+    seats_assigned = schedule_stats['seats_assigned']
+    seats_offered = schedule_stats['seats_offered']
+    
+    # Rows in course order (stable for any worker count); uuids and the grade workflow
+    # are drawn here in the main process
+    for course in self.data['courses']:
+        for placement in placements_by_course.get(course['course_id'], []):
+            session_idx = placement['session_idx']
+            if placement['room_id'] is None:
+                sections_skipped += 1
+                self.add_statement(f"-- SKIPPED: {course['subject_code']} section {session_idx+1} (no conflict-free slot)")
+                continue
             
-            while not scheduled and attempts < max_attempts:
-                attempts += 1
-                
-                # FIXED: Select instructor INSIDE the loop to try different instructors
-                if course['start_year'] == 2025 and course['semester_type'] == 'fall' and random.random() < 0.3:
-                    instructor_id = self.data['fixed_accounts']['instructor']['instructor_id']
-                else:
-                    instructor_id = random.choice(self.data['instructors'])['instructor_id']
-                
-                room = random.choice(self.data['rooms'])
-                days = random.choice(day_combinations)
-                time_slot = random.choice(time_slots)
-                
-                # FIXED: Check BOTH room AND instructor conflicts
-                conflict = False
-                for day in days:
-                    for period in range(time_slot[0], time_slot[1] + 1):
-                        # Check room conflict
-                        room_key = (room['room_id'], course['semester_id'], day, period)
-                        if room_key in room_usage:
-                            conflict = True
-                            break
-                        
-                        # Check instructor conflict
-                        instructor_key = (instructor_id, course['semester_id'], day, period)
-                        if instructor_key in instructor_usage:
-                            conflict = True
-                            break
-                    
-                    if conflict:
-                        break
-                
-                if not conflict:
-                    course_class_id = self.generate_uuid()
-                    
-                    # Generate course class code: format {course_code}_{section_number}
-                    # Example: CS1012025FALL_1, CS1012025FALL_2, etc.
-                    course_class_code = f"{course['course_code']}_{session_idx + 1}"
-                    
-                    # FIXED: Mark ALL time slots as used for BOTH room AND instructor
-                    for day in days:
-                        for period in range(time_slot[0], time_slot[1] + 1):
-                            room_key = (room['room_id'], course['semester_id'], day, period)
-                            room_usage[room_key] = course_class_id
-                            
-                            instructor_key = (instructor_id, course['semester_id'], day, period)
-                            instructor_usage[instructor_key] = course_class_id
-                    
-                    # Calculate dates
-                    course_start_date = course['semester_start']
-                    course_end_date = course['semester_end']
-                    
-                    if isinstance(course_start_date, str):
-                        course_start_date = datetime.strptime(course_start_date, '%Y-%m-%d').date()
-                    if isinstance(course_end_date, str):
-                        course_end_date = datetime.strptime(course_end_date, '%Y-%m-%d').date()
-                    
-                    first_day = days[0]
-                    semester_weekday = course_start_date.weekday()
-                    target_weekday = first_day - 2
-                    days_until_first = (target_weekday - semester_weekday) % 7
-                    actual_start_date = course_start_date + timedelta(days=days_until_first)
-                    
-                    # FIXED: Better capacity calculation
-                    if session_idx == num_sections - 1:
-                        remaining = num_students - (session_idx * max_per_section)
-                        session_max_students = min(remaining + 5, max_per_section)
-                    else:
-                        session_max_students = random.randint(min_per_section, max_per_section)
-                    
-                    # Determine grade submission status
-                    # Current date: November 13, 2025 (end of Summer 2025)
-                    current_date = datetime(2025, 11, 13).date()
-                    
-                    # Summer 2025: attendance + midterm completed, but no final grades yet
-                    is_summer_2025 = (course['start_year'] == 2025 and course['semester_type'] == 'summer')
-                    summer_2025_midterm_completed = is_summer_2025  # Summer 2025 has completed midterms by November
-                    
-                    # Summer 2024-2025 ends around July 2025, so it should be PAST by November 2025  
-                    is_summer_2024_2025 = (course['start_year'] == 2024 and course['semester_type'] == 'summer')
-                    summer_2024_2025_ended = is_summer_2024_2025 and course_end_date < current_date
-                    
-                    is_past = (course['start_year'] < 2024) or \
-                             (course['start_year'] == 2024 and course['semester_type'] in ('fall', 'spring')) or \
-                             summer_2024_2025_ended
-                    is_current = (course['start_year'] == 2025 and course['semester_type'] == 'fall')
-                    is_summer_2025_midterm_phase = summer_2025_midterm_completed
-                    
-                    # FIXED: Summer 2024-2025 should have 'approved' status by default
-                    grade_submission_status = 'approved' if is_summer_2024_2025 else 'draft'
-                    grade_submitted_at = None
-                    grade_approved_at = None
-                    grade_approved_by = None
-                    grade_submission_note = None
-                    grade_approval_note = None
-                    
-                    if is_past:
-                        grade_submission_status = 'approved'
-                        semester_end_date = course_end_date
-                        submit_date = datetime.combine(semester_end_date, datetime.min.time()) - timedelta(days=random.randint(3, 7))
-                        grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
-                        approve_date = submit_date + timedelta(days=random.randint(1, 3))
-                        grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
-                        grade_approved_by = admin_id
-                        grade_submission_note = 'All grades completed and verified'
-                        grade_approval_note = 'Approved - grades are accurate'
-                        grade_workflow_stats['approved'] += 1
+            room_id = placement['room_id']
+            instructor_id = placement['instructor_id']
+            days = placement['days']
+            time_slot = placement['time_slot']
+            session_max_students = placement['max_students']
+            
+            course_class_id = self.generate_uuid()
+            
+            # Generate course class code: format {course_code}_{section_number}
+            # Example: CS1012025FALL_1, CS1012025FALL_2, etc.
+            course_class_code = f"{course['course_code']}_{session_idx + 1}"
+            
+            # Calculate dates
+            course_start_date = course['semester_start']
+            course_end_date = course['semester_end']
+            
+            course_start_date = self.calendar.as_date(course_start_date)
+            course_end_date = self.calendar.as_date(course_end_date)
+            
+            # First class meeting: the first day's weekday in week 1 (calendar dimension)
+            first_day = days[0]
+            actual_start_date = self.calendar.date_for(course['semester_id'], 1, first_day)
+            if actual_start_date is None:
+                days_until_first = (first_day - 2 - course_start_date.weekday()) % 7
+                actual_start_date = course_start_date + timedelta(days=days_until_first)
+            
+            # Determine grade submission status
+            # Current date: November 13, 2025 (end of Summer 2025)
+            current_date = datetime(2025, 11, 13).date()
+            
+            # Summer 2025: attendance + midterm completed, but no final grades yet
+            is_summer_2025 = (course['start_year'] == 2025 and course['semester_type'] == 'summer')
+            summer_2025_midterm_completed = is_summer_2025  # Summer 2025 has completed midterms by November
+            
+            # Summer 2024-2025 ends around July 2025, so it should be PAST by November 2025  
+            is_summer_2024_2025 = (course['start_year'] == 2024 and course['semester_type'] == 'summer')
+            summer_2024_2025_ended = is_summer_2024_2025 and course_end_date < current_date
+            
+            is_past = (course['start_year'] < 2024) or \
+                     (course['start_year'] == 2024 and course['semester_type'] in ('fall', 'spring')) or \
+                     summer_2024_2025_ended
+            is_current = (course['start_year'] == 2025 and course['semester_type'] == 'fall')
+            is_summer_2025_midterm_phase = summer_2025_midterm_completed
+            
+            # FIXED: Summer 2024-2025 should have 'approved' status by default
+            grade_submission_status = 'approved' if is_summer_2024_2025 else 'draft'
+            grade_submitted_at = None
+            grade_approved_at = None
+            grade_approved_by = None
+            grade_submission_note = None
+            grade_approval_note = None
+            
+            if is_past:
+                grade_submission_status = 'approved'
+                semester_end_date = course_end_date
+                submit_date = datetime.combine(semester_end_date, datetime.min.time()) - timedelta(days=random.randint(3, 7))
+                grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
+                approve_date = submit_date + timedelta(days=random.randint(1, 3))
+                grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
+                grade_approved_by = admin_id
+                grade_submission_note = 'All grades completed and verified'
+                grade_approval_note = 'Approved - grades are accurate'
+                grade_workflow_stats['approved'] += 1
 
-                    elif is_summer_2024_2025:
-                        # Summer 2024-2025: Midterm phase completed (attendance + midterm approved, NO final)
-                        grade_submission_status = 'approved'
-                        submit_date = datetime(2025, 8, random.randint(1, 15))
-                        grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
-                        approve_date = submit_date + timedelta(days=random.randint(1, 3))
-                        grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
-                        grade_approved_by = admin_id
-                        grade_submission_note = 'Summer 2024-2025 midterm grades completed'
-                        grade_approval_note = 'Approved - attendance and midterm grades verified'
-                        grade_workflow_stats['approved'] += 1
+            elif is_summer_2024_2025:
+                # Summer 2024-2025: Midterm phase completed (attendance + midterm approved, NO final)
+                grade_submission_status = 'approved'
+                submit_date = datetime(2025, 8, random.randint(1, 15))
+                grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
+                approve_date = submit_date + timedelta(days=random.randint(1, 3))
+                grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
+                grade_approved_by = admin_id
+                grade_submission_note = 'Summer 2024-2025 midterm grades completed'
+                grade_approval_note = 'Approved - attendance and midterm grades verified'
+                grade_workflow_stats['approved'] += 1
 
-                    elif is_summer_2025_midterm_phase:
-                        # Summer 2025: Midterm phase completed, attendance + midterm grades approved
+            elif is_summer_2025_midterm_phase:
+                # Summer 2025: Midterm phase completed, attendance + midterm grades approved
+                grade_submission_status = 'approved'
+                # Midterm grades were submitted in September 2025
+                submit_date = datetime(2025, 9, random.randint(15, 25))
+                grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
+                approve_date = submit_date + timedelta(days=random.randint(1, 3))
+                grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
+                grade_approved_by = admin_id
+                grade_submission_note = 'Summer 2025 midterm grades completed'
+                grade_approval_note = 'Approved - attendance and midterm grades verified'
+                grade_workflow_stats['approved'] += 1
+                
+            elif is_current:
+                # Fall 2025 - current registration period
+                    rand = random.random()
+                    if rand < 0.40:
+                        grade_submission_status = 'draft'
+                        grade_workflow_stats['draft'] += 1
+                    elif rand < 0.70:
+                        grade_submission_status = 'pending'
+                        submit_date = datetime.now() - timedelta(days=random.randint(1, 5))
+                        grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
+                        grade_submission_note = 'Midterm grades ready for review'
+                        grade_workflow_stats['pending'] += 1
+                    else:
                         grade_submission_status = 'approved'
-                        # Midterm grades were submitted in September 2025
-                        submit_date = datetime(2025, 9, random.randint(15, 25))
+                        submit_date = datetime.now() - timedelta(days=random.randint(10, 20))
                         grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
                         approve_date = submit_date + timedelta(days=random.randint(1, 3))
                         grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
                         grade_approved_by = admin_id
-                        grade_submission_note = 'Summer 2025 midterm grades completed'
-                        grade_approval_note = 'Approved - attendance and midterm grades verified'
+                        grade_submission_note = 'Early midterm submission'
+                        grade_approval_note = 'Approved - early submission verified'
                         grade_workflow_stats['approved'] += 1
-                        
-                    elif is_current:
-                        # Fall 2025 - current registration period
-                            rand = random.random()
-                            if rand < 0.40:
-                                grade_submission_status = 'draft'
-                                grade_workflow_stats['draft'] += 1
-                            elif rand < 0.70:
-                                grade_submission_status = 'pending'
-                                submit_date = datetime.now() - timedelta(days=random.randint(1, 5))
-                                grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
-                                grade_submission_note = 'Midterm grades ready for review'
-                                grade_workflow_stats['pending'] += 1
-                            else:
-                                grade_submission_status = 'approved'
-                                submit_date = datetime.now() - timedelta(days=random.randint(10, 20))
-                                grade_submitted_at = submit_date.strftime('%Y-%m-%d %H:%M:%S')
-                                approve_date = submit_date + timedelta(days=random.randint(1, 3))
-                                grade_approved_at = approve_date.strftime('%Y-%m-%d %H:%M:%S')
-                                grade_approved_by = admin_id
-                                grade_submission_note = 'Early midterm submission'
-                                grade_approval_note = 'Approved - early submission verified'
-                                grade_workflow_stats['approved'] += 1
-                    
-                    # Store metadata
-                    self.data['course_classes'].append({
-                        'course_class_id': course_class_id,
-                        'course_id': course['course_id'],
-                        'course_class_code': course_class_code,
-                        'subject_id': course['subject_id'],
-                        'subject_code': course['subject_code'],
-                        'subject_name': course['subject_name'],
-                        'semester_id': course['semester_id'],
-                        'semester_start': course['semester_start'],
-                        'semester_end': course['semester_end'],
-                        'course_class_start': actual_start_date,  # FIXED: Add actual course class dates
-                        'course_class_end': course_end_date,      # FIXED: Add actual course class dates  
-                        'start_year': course['start_year'],
-                        'semester_type': course['semester_type'],
-                        'instructor_id': instructor_id,
-                        'room_id': room['room_id'],
-                        'days': days,
-                        'start_period': time_slot[0],
-                        'end_period': time_slot[1],
-                        'max_students': session_max_students,
-                        'session_number': session_idx + 1,
-                        'enrolled_count': 0,  # Will be updated during enrollment
-                        'grade_submission_status': grade_submission_status,
-                        'grade_submitted_at': grade_submitted_at,
-                        'grade_approved_at': grade_approved_at,
-                        'grade_approved_by': grade_approved_by,
-                        'grade_submission_note': grade_submission_note,
-                        'grade_approval_note': grade_approval_note
-                    })
-                    
-                    course_class_rows.append([
-                        course_class_id,
-                        course['course_id'],
-                        instructor_id,
-                        room['room_id'],
-                        course_class_code,
-                        actual_start_date,
-                        course_end_date,
-                        session_max_students,
-                        days[0],
-                        time_slot[0],
-                        time_slot[1],
-                        'active',
-                        grade_submission_status,
-                        grade_submitted_at,
-                        grade_approved_at,
-                        grade_approved_by,
-                        grade_submission_note,
-                        grade_approval_note
-                    ])
-                    
-                    sections_created += 1
-                    scheduled = True
             
-            if not scheduled:
-                sections_skipped += 1
-                self.add_statement(f"-- SKIPPED: {course['subject_code']} section {session_idx+1} (no conflict-free slot)")
+            # Store metadata
+            self.data['course_classes'].append({
+                'course_class_id': course_class_id,
+                'course_id': course['course_id'],
+                'course_class_code': course_class_code,
+                'subject_id': course['subject_id'],
+                'subject_code': course['subject_code'],
+                'subject_name': course['subject_name'],
+                'semester_id': course['semester_id'],
+                'semester_start': course['semester_start'],
+                'semester_end': course['semester_end'],
+                'course_class_start': actual_start_date,  # FIXED: Add actual course class dates
+                'course_class_end': course_end_date,      # FIXED: Add actual course class dates  
+                'start_year': course['start_year'],
+                'semester_type': course['semester_type'],
+                'instructor_id': instructor_id,
+                'room_id': room_id,
+                'days': days,
+                'start_period': time_slot[0],
+                'end_period': time_slot[1],
+                'max_students': session_max_students,
+                'session_number': session_idx + 1,
+                'enrolled_count': 0,  # Will be updated during enrollment
+                'grade_submission_status': grade_submission_status,
+                'grade_submitted_at': grade_submitted_at,
+                'grade_approved_at': grade_approved_at,
+                'grade_approved_by': grade_approved_by,
+                'grade_submission_note': grade_submission_note,
+                'grade_approval_note': grade_approval_note
+            })
+            
+            course_class_rows.append([
+                course_class_id,
+                course['course_id'],
+                instructor_id,
+                room_id,
+                course_class_code,
+                actual_start_date,
+                course_end_date,
+                session_max_students,
+                days[0],
+                time_slot[0],
+                time_slot[1],
+                'active',
+                grade_submission_status,
+                grade_submitted_at,
+                grade_approved_at,
+                grade_approved_by,
+                grade_submission_note,
+                grade_approval_note
+            ])
+            
+            sections_created += 1
     
     self.add_statement(f"\n-- Courses with no student demand: {courses_with_no_demand}")
     self.add_statement(f"-- Sections created: {sections_created}")
     self.add_statement(f"-- Sections skipped (conflicts): {sections_skipped}")
+    self.add_statement(f"-- Scheduling attempts: {scheduling_attempts} "
+                       f"({scheduling_attempts / max(sections_created + sections_skipped, 1):.2f} per section)")
+    self.add_statement(f"-- Sections taught by the subject's own department: {department_matched}")
+    self.add_statement(f"-- Room utilization (section size / room capacity): {seats_assigned / max(seats_offered, 1):.1%}")
+    self.course_class_stats = {
+        'department_matched': department_matched,
+        'sections_created': sections_created,
+        'sections_skipped': sections_skipped,
+        'scheduling_attempts': scheduling_attempts,
+        'room_utilization': seats_assigned / max(seats_offered, 1),
+    }
     self.add_statement(f"-- Grade workflow distribution:")
     self.add_statement(f"--   Approved: {grade_workflow_stats['approved']}")
     self.add_statement(f"--   Pending: {grade_workflow_stats['pending']}")
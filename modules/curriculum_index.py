@@ -0,0 +1,46 @@
+"""
+Curriculum -> subject index
+Filled while curriculum details are created, so later phases never rescan
+self.data['curriculum_details'] per student
+"""
+
+from collections import defaultdict
+
+EMPTY_SUBJECTS = frozenset()
+
+
+class CurriculumIndex:
+    """curriculum_id -> frozenset(subject_id), plus a (year_index, semester_index) breakdown"""
+
+    def __init__(self):
+        self._subjects = defaultdict(set)
+        self._by_term = defaultdict(lambda: defaultdict(set))
+        self.subjects = {}            # curriculum_id -> frozenset(subject_id)
+        self.by_term = {}             # curriculum_id -> {(year_index, semester_index): frozenset(subject_id)}
+        self.all_subjects = EMPTY_SUBJECTS
+        self.class_curriculum = {}    # class_id -> curriculum_id
+
+    def add(self, curriculum_id, subject_id, academic_year_index, semester_index):
+        self._subjects[curriculum_id].add(subject_id)
+        self._by_term[curriculum_id][(academic_year_index, semester_index)].add(subject_id)
+
+    def freeze(self):
+        """Materialize the frozensets once all curriculum details are added"""
+        self.subjects = {cid: frozenset(ids) for cid, ids in self._subjects.items()}
+        self.by_term = {
+            cid: {term: frozenset(ids) for term, ids in terms.items()}
+            for cid, terms in self._by_term.items()
+        }
+        self.all_subjects = frozenset().union(*self.subjects.values())
+
+    def register_classes(self, classes):
+        self.class_curriculum = {c['class_id']: c.get('curriculum_id') for c in classes}
+
+    def subjects_for(self, curriculum_id):
+        return self.subjects.get(curriculum_id, EMPTY_SUBJECTS)
+
+    def subjects_for_class(self, class_id):
+        return self.subjects.get(self.class_curriculum.get(class_id), EMPTY_SUBJECTS)
+
+    def subjects_for_term(self, curriculum_id, academic_year_index, semester_index):
+        return self.by_term.get(curriculum_id, {}).get((academic_year_index, semester_index), EMPTY_SUBJECTS)
@@ -1,38 +1,385 @@
+import os
 import random
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from heapq import heappop, heappush
 from .config import *
+from .timetable import period_mask
+from .grade_engine import GradeEngine
+
+GRADE_NOTES = [
+    "Kết quả tốt",
+    "Cần cải thiện",
+    "Xuất sắc",
+    "Đi học đều đặn",
+    "Nộp bài muộn",
+    "Tham gia tích cực",
+    "Tiến bộ đều đặn",
+    "Có tiềm năng",
+    "Hiểu bài tốt",
+    "Cần cố gắng hơn",
+    "Chuẩn bị bài kỹ",
+    "Kết quả thi tốt",
+    "Có tiến bộ theo thời gian",
+    "Nền tảng vững chắc",
+    "Sáng tạo trong giải quyết",
+    "Tinh thần hợp tác tốt",
+    "Kỹ năng kỹ thuật tốt",
+    "Cần cải thiện giao tiếp",
+    "Khả năng giải quyết vấn đề tốt",
+    "Đạt yêu cầu",
+    "Thái độ học tập tốt",
+    "Cần chú ý hơn trong lớp",
+    "Hoàn thành đầy đủ bài tập",
+    "Có ý thức tự học",
+    "Tương tác tốt với bạn bè",
+    None, None, None  # 30% chance of no note
+]
+
+# Course total = 0.1 * attendance + 0.3 * midterm + 0.6 * final (sql/test/ChatBot.sql)
+GRADE_WEIGHTS = (0.1, 0.3, 0.6)
+# A course is passed (earns its credits, grade D or better) from this total - "Điểm đạt từ 4.0"
+# (sql/test/ChatBot.sql); verify_test_student_credits.sql uses 5.0, but D counts in the GPA
+PASSING_GRADE = 4.0
+# 10-point total -> 4-point grade (A, B+, B, C+, C, D+, D; below PASSING_GRADE is F = 0)
+GRADE_POINTS = ((8.5, 4.0), (8.0, 3.5), (7.0, 3.0), (6.5, 2.5), (5.5, 2.0), (5.0, 1.5), (PASSING_GRADE, 1.0))
+
+# Semester groups a student's eligible courses are drawn from, in priority order
+ENROLLMENT_BUCKETS = ('summer_2024_2025', 'fall_2025', 'other')
+
+
+# Semester eligibility (same for every student of a start year):
+# - Past semesters (start_year < 2025) - all types (fall, spring, summer)
+# - Spring 2024-2025 (start_year == 2024, semester_type == 'spring') - past/completed
+# - Summer 2024-2025 (start_year == 2024, semester_type == 'summer') - current/ongoing
+# - Fall 2025 (start_year == 2025, semester_type == 'fall') - current registration period
+# Exclude:
+# - Future semesters (start_year > 2025)
+# - Spring/Summer 2025 (start_year == 2025, semester_type in ('spring', 'summer')) - future
+def semester_bucket(course):
+    if course['start_year'] > 2025:
+        return None
+    if course['start_year'] == 2025 and course['semester_type'] in ('spring', 'summer'):
+        return None
+    if course['start_year'] == 2024 and course['semester_type'] == 'summer':
+        return 'summer_2024_2025'
+    if course['start_year'] == 2025 and course['semester_type'] == 'fall':
+        return 'fall_2025'
+    return 'other'
+
+
+def grade_point(total):
+    for threshold, points in GRADE_POINTS:
+        if total >= threshold:
+            return points
+    return 0.0
+
+
+def cohort_courses(courses_by_bucket, curriculum_subject_ids, start_year):
+    """bucket -> (curriculum courses, elective courses) open to a cohort starting in start_year"""
+    buckets = {}
+    for bucket in ENROLLMENT_BUCKETS:
+        in_range = [c for c in courses_by_bucket.get(bucket, []) if c['start_year'] >= start_year]
+        buckets[bucket] = (
+            [c for c in in_range if c['subject_id'] in curriculum_subject_ids],
+            [c for c in in_range if c['subject_id'] not in curriculum_subject_ids]
+        )
+    return buckets
+
+
+class StudentRecords:
+    """
+    Per-student enrollment state
+    - Subject bitset per semester: a prerequisite counts as completed only if it was
+      taken in a semester that ended before the target one started
+    - Weekly schedule per semester as a (day x period) bitmask (modules/timetable.py);
+      each section's mask is computed once, a conflict check is one AND
+    """
+
+    def __init__(self, prerequisites, semester_bounds, section_masks):
+        self.prerequisites = prerequisites
+        self.semester_bounds = semester_bounds
+        self.section_masks = section_masks
+        self.term_masks = defaultdict(lambda: defaultdict(int))
+        self.schedules = defaultdict(lambda: defaultdict(int))
+
+    def completed_mask(self, student_id, semester_id):
+        target_start = self.semester_bounds[semester_id][0]
+        mask = 0
+        for sem_id, bits in self.term_masks[student_id].items():
+            if self.semester_bounds[sem_id][1] < target_start:
+                mask |= bits
+        return mask
+
+    def prerequisites_met(self, student_id, course):
+        if not self.prerequisites.has_prerequisites(course['subject_id']):
+            return True
+        return self.prerequisites.satisfied(course['subject_id'],
+                                            self.completed_mask(student_id, course['semester_id']))
+
+    def has_schedule_conflict(self, student_id, cc):
+        return bool(self.schedules[student_id][cc['semester_id']] & self.section_masks[cc['course_class_id']])
+
+    def mark(self, student_id, course, cc):
+        self.term_masks[student_id][course['semester_id']] |= self.prerequisites.bit(course['subject_id'])
+        self.schedules[student_id][cc['semester_id']] |= self.section_masks[cc['course_class_id']]
+
+
+def enroll_student_shard(job):
+    """
+    Phase 1 enrollment for one shard of students (a worker-process job when sharded)
+    - Seats come from the shard's quota per section, not cc['enrolled_count'], so
+      shards share no mutable state
+    - Seeded per shard (seed None = keep using the caller's random stream)
+    Returns placements (student_id, course_id, course_class_id, forced) in order,
+    misses (student_id, course_id, is_senior) where only seats were lacking, and counters
+    """
+    outer_state = None
+    if job['seed'] is not None:
+        outer_state = random.getstate()
+        random.seed(job['seed'])
+    try:
+        prerequisites = job['prerequisites']
+        semester_bounds = job['semester_bounds']
+        course_classes_by_course_semester = job['sections']
+        courses_by_subject = job['courses_by_subject']
+        seats = dict(job['quotas'])  # course_class_id -> seats this shard may still fill
+        records = StudentRecords(prerequisites, semester_bounds, job['section_masks'])
+        enrolled_combinations = set()
+        placements = []
+        misses = []
+        stats = {'students': 0, 'conflicts': 0, 'skipped': 0, 'forced': 0, 'forced_clashes': 0,
+                 'prerequisite_blocked': 0, 'seniors': 0, 'full_curriculum': 0}
+        
+        for student in job['students']:
+            student_id = student['student_id']
+            curriculum_id = job['class_curriculum'].get(student['class_id'])
+            curriculum_subject_ids = job['curricula'].get(curriculum_id)
+            if not curriculum_subject_ids:
+                continue
+            stats['students'] += 1
+            
+            student_start_year = student['class_start_year']
+            
+            is_senior = student_start_year <= 2022
+            if is_senior:
+                stats['seniors'] += 1
+            
+            enrolled_subjects_for_student = set()
+            
+            # Eligible courses: all curriculum courses of the cohort
+            # + each elective with 20% chance (drawn as a binomial count, then sampled)
+            # FIXED: Prioritize summer 2024-2025 and current semester courses
+            cohort = job['eligibility'][(curriculum_id, student_start_year)]
+            bucket_courses = {}
+            for bucket in ENROLLMENT_BUCKETS:
+                curriculum_courses, elective_courses = cohort[bucket]
+                elective_count = random.binomialvariate(len(elective_courses), 0.2) if elective_courses else 0
+                courses = curriculum_courses + random.sample(elective_courses, elective_count)
+                # Shuffle each group separately
+                random.shuffle(courses)
+                bucket_courses[bucket] = courses
+            
+            summer_2024_2025_courses = bucket_courses['summer_2024_2025']
+            fall_2025_courses = bucket_courses['fall_2025']
+            other_courses = bucket_courses['other']
+            eligible_count = len(summer_2024_2025_courses) + len(fall_2025_courses) + len(other_courses)
+            
+            # Prioritize: summer 2024-2025 > fall 2025 > others
+            prioritized_courses = summer_2024_2025_courses + fall_2025_courses + other_courses
+            
+            # SPECIAL HANDLING FOR TEST STUDENTS: Enroll in more past courses
+            is_test_student = student_id in job['test_student_ids']
+            
+            # FIXED: Enroll in ~70% of eligible courses, but ensure summer 2024-2025 courses are prioritized
+            # For test student, enroll in ~90% of eligible courses to ensure more past enrollments
+            enrollment_rate = 0.9 if is_test_student else 0.7
+            num_to_enroll = int(eligible_count * enrollment_rate)
+            # Ensure at least some summer 2024-2025 courses are enrolled if available
+            if summer_2024_2025_courses and not is_senior:
+                # Enroll in at least 50% of summer 2024-2025 courses
+                min_summer_enroll = max(1, int(len(summer_2024_2025_courses) * 0.5))
+                num_to_enroll = max(num_to_enroll, min_summer_enroll + len(fall_2025_courses))
+            
+            # For test student, ensure they enroll in most past courses (prioritize past over current)
+            if is_test_student:
+                # Separate past courses (completed) from current courses
+                past_courses = [c for c in other_courses if c['start_year'] < 2024 or 
+                               (c['start_year'] == 2024 and c['semester_type'] in ('fall', 'spring'))]
+                current_courses = summer_2024_2025_courses + fall_2025_courses
+                
+                # Enroll in ~95% of past courses and all current courses
+                past_enroll_count = int(len(past_courses) * 0.95)
+                num_to_enroll = max(num_to_enroll, past_enroll_count + len(current_courses))
+                # Re-prioritize: past courses first, then current
+                prioritized_courses = past_courses + current_courses
+            
+            courses_to_enroll = prioritized_courses[:num_to_enroll] if not is_senior else prioritized_courses
+            
+            # Courses with prerequisites go last, in chronological (then topological) order,
+            # so every prerequisite the student takes is already in their bitset when checked
+            courses_with_prerequisites = [c for c in courses_to_enroll if prerequisites.has_prerequisites(c['subject_id'])]
+            if courses_with_prerequisites:
+                courses_with_prerequisites.sort(key=lambda c: (semester_bounds[c['semester_id']][0],
+                                                               prerequisites.topo_rank[c['subject_id']]))
+                courses_to_enroll = [c for c in courses_to_enroll
+                                     if not prerequisites.has_prerequisites(c['subject_id'])] + courses_with_prerequisites
+            
+            for course in courses_to_enroll:
+                # FIXED: Prevent enrolling in multiple courses of the same subject
+                if course['subject_id'] in enrolled_subjects_for_student:
+                    continue  # Skip if already enrolled in this subject
+                
+                if not records.prerequisites_met(student_id, course):
+                    stats['prerequisite_blocked'] += 1
+                    continue
+                    
+                key = (course['course_id'], course['semester_id'])
+                available_classes = course_classes_by_course_semester.get(key, [])
+                if not available_classes:
+                    continue
+                
+                # FIXED: Shuffle sections to distribute enrollment evenly
+                random.shuffle(available_classes)
+                
+                # Find conflict-free section with available space (in this shard's quota)
+                assigned_course_class = None
+                lacked_seats = False
+                for cc in available_classes:
+                    enrollment_key = (student_id, cc['course_class_id'])
+                    if enrollment_key in enrolled_combinations:
+                        continue
+                    
+                    # Check if class is full
+                    if seats.get(cc['course_class_id'], 0) <= 0:
+                        lacked_seats = True
+                        continue
+                    
+                    # Check schedule conflicts
+                    if records.has_schedule_conflict(student_id, cc):
+                        stats['conflicts'] += 1
+                    else:
+                        assigned_course_class = cc
+                        seats[cc['course_class_id']] -= 1
+                        break
+                
+                if not assigned_course_class:
+                    if not is_senior:
+                        stats['skipped'] += 1
+                    if lacked_seats:
+                        misses.append((student_id, course['course_id'], is_senior))
+                    continue
+                
+                # Mark as enrolled
+                enrolled_combinations.add((student_id, assigned_course_class['course_class_id']))
+                enrolled_subjects_for_student.add(course['subject_id'])
+                records.mark(student_id, course, assigned_course_class)  # Adds it to the schedule too
+                placements.append((student_id, course['course_id'], assigned_course_class['course_class_id'], False))
+            
+            # Force-enroll seniors in missing subjects
+            if is_senior:
+                missing_subjects = curriculum_subject_ids - enrolled_subjects_for_student
+                
+                if not missing_subjects:
+                    stats['full_curriculum'] += 1
+                
+                # Topological order: a missing prerequisite is force-enrolled before its dependents
+                for subject_id in sorted(missing_subjects, key=prerequisites.topo_rank.get):
+                    # FIXED: Double-check that subject is still missing (not enrolled during normal enrollment)
+                    if subject_id in enrolled_subjects_for_student:
+                        continue  # Skip if already enrolled through normal process
+                        
+                    available_courses = courses_by_subject.get(subject_id, [])
+                    if not available_courses:
+                        continue
+                    
+                    # Include past and current semesters for senior enrollment
+                    # Past: start_year < 2025 (all types) OR Spring 2024-2025
+                    # Current: Fall 2025 OR Summer 2024-2025
+                    available_courses = [c for c in available_courses 
+                                        if c['start_year'] < 2025 or 
+                                        (c['start_year'] == 2024 and c['semester_type'] == 'summer') or
+                                        (c['start_year'] == 2025 and c['semester_type'] == 'fall')]
+                    
+                    if not available_courses:
+                        continue
+                    
+                    available_courses.sort(key=lambda c: (
+                        c['start_year'],
+                        {'fall': 1, 'spring': 2, 'summer': 3}[c['semester_type']]
+                    ))
+                    
+                    # Sections of courses whose prerequisites are already completed, earliest first
+                    candidates = []
+                    for course in available_courses:
+                        if not records.prerequisites_met(student_id, course):
+                            continue
+                        key = (course['course_id'], course['semester_id'])
+                        for cc in course_classes_by_course_semester.get(key, []):
+                            if (student_id, cc['course_class_id']) not in enrolled_combinations:
+                                candidates.append((course, cc))
+                    
+                    if not candidates:
+                        if prerequisites.has_prerequisites(subject_id):
+                            stats['prerequisite_blocked'] += 1
+                        continue
+                    
+                    # FIXED: First conflict-free section of any course/semester; only when the
+                    # subject has none left does the senior take a clashing one
+                    course, cc = next(((course, cc) for course, cc in candidates
+                                       if not records.has_schedule_conflict(student_id, cc)),
+                                      candidates[0])
+                    if records.has_schedule_conflict(student_id, cc):
+                        stats['forced_clashes'] += 1
+                    
+                    # FORCE ENROLL (ignore capacity)
+                    enrolled_combinations.add((student_id, cc['course_class_id']))
+                    enrolled_subjects_for_student.add(subject_id)
+                    records.mark(student_id, course, cc)
+                    placements.append((student_id, course['course_id'], cc['course_class_id'], True))
+                    stats['forced'] += 1
+                
+                if not (curriculum_subject_ids - enrolled_subjects_for_student):
+                    stats['full_curriculum'] += 1
+        
+        return {'placements': placements, 'misses': misses, 'stats': stats}
+    finally:
+        if outer_state is not None:
+            random.setstate(outer_state)
+
+
+def partition_students(students, shard_count):
+    """Whole classes per shard, largest classes first onto the lightest shard; student order is kept"""
+    if shard_count <= 1:
+        return [list(students)]
+    class_sizes = defaultdict(int)
+    for student in students:
+        class_sizes[student['class_id']] += 1
+    shard_of_class = {}
+    heap = [(0, shard) for shard in range(shard_count)]
+    for class_id, size in sorted(class_sizes.items(), key=lambda item: -item[1]):
+        load, shard = heappop(heap)
+        shard_of_class[class_id] = shard
+        heappush(heap, (load + size, shard))
+    shards = [[] for _ in range(shard_count)]
+    for student in students:
+        shards[shard_of_class[student['class_id']]].append(student)
+    return [shard for shard in shards if shard]
+
+
+def allocate_seat_quotas(free_seats, demand):
+    """Split free seats between shards in proportion to demand (largest remainder); equal split if no demand"""
+    total = sum(demand)
+    weights = demand if total > 0 else [1] * len(demand)
+    total = sum(weights)
+    shares = [free_seats * w / total for w in weights]
+    quotas = [int(share) for share in shares]
+    leftover = free_seats - sum(quotas)
+    for idx in sorted(range(len(shares)), key=lambda i: quotas[i] - shares[i])[:leftover]:
+        quotas[idx] += 1
+    return quotas
 
-def generate_random_grade_note():
-    """Generate a random short grade note for instructors"""
-    notes = [
-        "Kết quả tốt",
-        "Cần cải thiện",
-        "Xuất sắc",
-        "Đi học đều đặn",
-        "Nộp bài muộn",
-        "Tham gia tích cực",
-        "Tiến bộ đều đặn",
-        "Có tiềm năng",
-        "Hiểu bài tốt",
-        "Cần cố gắng hơn",
-        "Chuẩn bị bài kỹ",
-        "Kết quả thi tốt",
-        "Có tiến bộ theo thời gian",
-        "Nền tảng vững chắc",
-        "Sáng tạo trong giải quyết",
-        "Tinh thần hợp tác tốt",
-        "Kỹ năng kỹ thuật tốt",
-        "Cần cải thiện giao tiếp",
-        "Khả năng giải quyết vấn đề tốt",
-        "Đạt yêu cầu",
-        "Thái độ học tập tốt",
-        "Cần chú ý hơn trong lớp",
-        "Hoàn thành đầy đủ bài tập",
-        "Có ý thức tự học",
-        "Tương tác tốt với bạn bè",
-        None, None, None  # 30% chance of no note
-    ]
-    return random.choice(notes)
 
 def create_student_enrollments(self):
     """
@@ -67,22 +414,40 @@ def create_student_enrollments(self):
     for course in self.data['courses']:
         courses_by_subject[course['subject_id']].append(course)
     
-    # Grade ranges
-    att_min = 7.0
-    att_max = 10.0
-    mid_min = 5.0
-    mid_max = 9.5
-    fin_min = 5.0
-    fin_max = 9.5
     
-    student_schedules = defaultdict(lambda: defaultdict(list))
+    # UPDATED: Per-student prerequisite bitsets and weekly schedule masks (StudentRecords);
+    # each section's mask is computed once, a conflict check is one AND
+    section_masks = {cc['course_class_id']: period_mask(cc['days'], cc['start_period'], cc['end_period'])
+                     for cc in self.data['course_classes']}
     conflict_count = 0
     skipped_count = 0
     forced_enrollment_count = 0
+    forced_clash_count = 0
     
     students_with_full_curriculum = 0
     total_senior_students = 0
     
+    prerequisites = self.prerequisites
+    semester_bounds = {s['semester_id']: (s['start_date'], s['end_date']) for s in self.data['semesters']}
+    records = StudentRecords(prerequisites, semester_bounds, section_masks)
+    prerequisite_blocked = 0
+    prerequisites_met = records.prerequisites_met
+    has_schedule_conflict = records.has_schedule_conflict
+    
+    # UPDATED: Inverted indexes maintained as enrollments are added, so the test-student
+    # and backfill passes never rescan self.data['enrollments']
+    courses_by_id = {c['course_id']: c for c in self.data['courses']}
+    enrolled_subjects_by_student = defaultdict(set)     # student_id -> subject_ids (all semesters)
+    student_semester_courses = defaultdict(list)        # (student_id, semester_id) -> course_ids
+    section_enrollment_counts = defaultdict(int)        # course_class_id -> enrollments
+    
+    def mark_enrolled(student_id, course, cc):
+        """Record an enrollment in the prerequisite bitset, the weekly schedule mask and the indexes"""
+        records.mark(student_id, course, cc)
+        enrolled_subjects_by_student[student_id].add(course['subject_id'])
+        student_semester_courses[(student_id, course['semester_id'])].append(course['course_id'])
+        section_enrollment_counts[cc['course_class_id']] += 1
+    
     stats = {
         'total_enrollments': 0,
         'enrolled_students': 0,
@@ -92,316 +457,202 @@ def create_student_enrollments(self):
         'no_grades_yet': 0
     }
 
+    courses_by_bucket = defaultdict(list)
+    for course in self.data['courses']:
+        bucket = semester_bucket(course)
+        if bucket:
+            courses_by_bucket[bucket].append(course)
+    
+    # Cohort eligibility: (curriculum_id, class_start_year) -> bucket -> (curriculum courses, elective courses)
+    # Computed once per cohort; each student only samples electives from it
+    cohort_eligibility = {}
+    
+    def eligibility_for(curriculum_id, start_year):
+        key = (curriculum_id, start_year)
+        if key not in cohort_eligibility:
+            cohort_eligibility[key] = cohort_courses(courses_by_bucket, self.curriculum_index.subjects_for(curriculum_id),
+                                                     start_year)
+        return cohort_eligibility[key]
+    
+    test_student_ids = {
+        account_data.get('student_id')
+        for account_name, account_data in self.data.get('fixed_accounts', {}).items()
+        if account_name.startswith('student') and account_data.get('student_id')
+    }
+
     # PHASE 1: CREATE ENROLLMENTS
-    for student in self.data['students']:
-        class_id = student['class_id']
-        cls = next((c for c in self.data['classes'] if c['class_id'] == class_id), None)
-        if not cls:
-            continue
-        
-        curriculum_id = cls.get('curriculum_id')
-        if not curriculum_id:
-            continue
-        
-        curriculum_subject_ids = set()
-        for cd in self.data.get('curriculum_details', []):
-            if cd['curriculum_id'] == curriculum_id:
-                curriculum_subject_ids.add(cd['subject_id'])
-        
-        if not curriculum_subject_ids:
-            continue
-        
-        is_fixed = student.get('is_fixed', False)
-        student_start_year = student['class_start_year']
-        
-        is_senior = student_start_year <= 2022
-        if is_senior:
-            total_senior_students += 1
-        
-        enrolled_subjects_for_student = set()
-        student_has_enrolled = False
-        
-        # Get all eligible courses for this student
-        # UPDATED: More inclusive eligibility - curriculum + electives
-        # Eligible courses include:
-        # - Past semesters (start_year < 2025) - all types (fall, spring, summer)
-        # - Spring 2024-2025 (start_year == 2024, semester_type == 'spring') - past/completed
-        # - Summer 2024-2025 (start_year == 2024, semester_type == 'summer') - current/ongoing
-        # - Fall 2025 (start_year == 2025, semester_type == 'fall') - current registration period
-        # Exclude:
-        # - Future semesters (start_year > 2025)
-        # - Spring/Summer 2025 (start_year == 2025, semester_type in ('spring', 'summer')) - future
-        eligible_courses = []
-        for course in self.data['courses']:
-            # Check semester eligibility first
-            if course['start_year'] < student_start_year:
-                continue
-            if course['start_year'] > 2025:
-                continue
-            # Exclude Spring/Summer 2025 (future semesters)
-            if course['start_year'] == 2025 and course['semester_type'] in ('spring', 'summer'):
+    # UPDATED: Students are split into shards of whole classes ([enrollment] shards, default 1).
+    # Each shard enrolls against its own seat quota per section, in a worker process when
+    # sharded; results are merged in shard order, then leftover seats are reconciled
+    shard_count = max(1, int(self.enrollment_config.get('shards', 1)))
+    shards = partition_students(self.data['students'], shard_count)
+    
+    shard_curricula = {}
+    shard_eligibility = []
+    for shard_students in shards:
+        eligibility = {}
+        for student in shard_students:
+            curriculum_id = self.curriculum_index.class_curriculum.get(student['class_id'])
+            curriculum_subject_ids = self.curriculum_index.subjects_for(curriculum_id)
+            if not curriculum_subject_ids:
                 continue
-            
-            # UPDATED: Include both curriculum and elective courses
-            is_curriculum_course = course['subject_id'] in curriculum_subject_ids
-            is_elective_course = course['subject_id'] not in curriculum_subject_ids
-            
-            if is_curriculum_course:
-                # Always include curriculum courses
-                eligible_courses.append(course)
-            elif is_elective_course and random.random() < 0.2:
-                # 20% chance to include elective courses for variety
-                eligible_courses.append(course)
-        
-        # FIXED: Prioritize summer 2024-2025 and current semester courses
-        # Separate summer 2024-2025 and fall 2025 courses from others
-        summer_2024_2025_courses = [c for c in eligible_courses 
-                                     if c['start_year'] == 2024 and c['semester_type'] == 'summer']
-        fall_2025_courses = [c for c in eligible_courses 
-                            if c['start_year'] == 2025 and c['semester_type'] == 'fall']
-        other_courses = [c for c in eligible_courses 
-                        if c not in summer_2024_2025_courses and c not in fall_2025_courses]
-        
-        # Shuffle each group separately
-        random.shuffle(summer_2024_2025_courses)
-        random.shuffle(fall_2025_courses)
-        random.shuffle(other_courses)
-        
-        # Prioritize: summer 2024-2025 > fall 2025 > others
-        prioritized_courses = summer_2024_2025_courses + fall_2025_courses + other_courses
+            shard_curricula[curriculum_id] = curriculum_subject_ids
+            cohort = (curriculum_id, student['class_start_year'])
+            if cohort not in eligibility:
+                eligibility[cohort] = eligibility_for(*cohort)
+        shard_eligibility.append(eligibility)
+    
+    # Seat quotas: one shard gets every free seat; otherwise each section's free seats are
+    # split by the shards' expected demand for its course (curriculum = 1, elective = 0.2 per student)
+    free_seats = {cc['course_class_id']: cc['max_students'] - cc['enrolled_count'] for cc in self.data['course_classes']}
+    if len(shards) == 1:
+        shard_quotas = [free_seats]
+    else:
+        shard_demand = []
+        for shard_students, eligibility in zip(shards, shard_eligibility):
+            cohort_sizes = defaultdict(int)
+            for student in shard_students:
+                curriculum_id = self.curriculum_index.class_curriculum.get(student['class_id'])
+                if (curriculum_id, student['class_start_year']) in eligibility:
+                    cohort_sizes[(curriculum_id, student['class_start_year'])] += 1
+            demand = defaultdict(float)
+            for cohort, size in cohort_sizes.items():
+                for bucket in ENROLLMENT_BUCKETS:
+                    curriculum_courses, elective_courses = eligibility[cohort][bucket]
+                    for course in curriculum_courses:
+                        demand[course['course_id']] += size
+                    for course in elective_courses:
+                        demand[course['course_id']] += size * 0.2
+            shard_demand.append(demand)
+        shard_quotas = [{} for _ in shards]
+        for cc in self.data['course_classes']:
+            quotas = allocate_seat_quotas(max(0, free_seats[cc['course_class_id']]),
+                                          [demand.get(cc['course_id'], 0) for demand in shard_demand])
+            for shard_quota, quota in zip(shard_quotas, quotas):
+                shard_quota[cc['course_class_id']] = quota
+    
+    jobs = [{
+        'seed': random.getrandbits(64) if len(shards) > 1 else None,
+        'students': shard_students,
+        'eligibility': eligibility,
+        'quotas': quotas,
+        'curricula': shard_curricula,
+        'class_curriculum': self.curriculum_index.class_curriculum,
+        'test_student_ids': test_student_ids,
+        'sections': course_classes_by_course_semester,
+        'section_masks': section_masks,
+        'courses_by_subject': courses_by_subject,
+        'prerequisites': prerequisites,
+        'semester_bounds': semester_bounds,
+    } for shard_students, eligibility, quotas in zip(shards, shard_eligibility, shard_quotas)]
+    
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(enroll_student_shard, jobs))
+    else:
+        results = [enroll_student_shard(job) for job in jobs]
+    
+    def enrollment_status(course):
+        # Current date: November 13, 2025 (end of Summer 2025)
+        # Summer 2024-2025 ends around July 2025, so it should be PAST by November 2025
+        # Summer 2025 is still registered (midterm phase completed), Fall 2025 is current
+        is_summer_2024_2025 = (course['start_year'] == 2024 and course['semester_type'] == 'summer')
+        summer_2024_2025_ended = is_summer_2024_2025 and course['semester_end'] < date(2025, 11, 13)
         
-        # SPECIAL HANDLING FOR TEST STUDENTS: Enroll in more past courses
-        # Check if this is any test student
-        is_test_student = False
-        for account_name, account_data in self.data.get('fixed_accounts', {}).items():
-            if account_name.startswith('student') and account_data.get('student_id') == student['student_id']:
-                is_test_student = True
-                break
+        is_past = (course['start_year'] < 2024) or \
+                 (course['start_year'] == 2024 and course['semester_type'] in ('fall', 'spring')) or \
+                 (course['start_year'] == 2025 and course['semester_type'] == 'spring') or \
+                 summer_2024_2025_ended
+        return 'completed' if is_past else 'registered'
+    
+    def add_enrollment(student_id, course, cc, status):
+        enrolled_combinations.add((student_id, cc['course_class_id']))
+        mark_enrolled(student_id, course, cc)
         
-        # FIXED: Enroll in ~70% of eligible courses, but ensure summer 2024-2025 courses are prioritized
-        # For test student, enroll in ~90% of eligible courses to ensure more past enrollments
-        enrollment_rate = 0.9 if is_test_student else 0.7
-        num_to_enroll = int(len(eligible_courses) * enrollment_rate)
-        # Ensure at least some summer 2024-2025 courses are enrolled if available
-        if summer_2024_2025_courses and not is_senior:
-            # Enroll in at least 50% of summer 2024-2025 courses
-            min_summer_enroll = max(1, int(len(summer_2024_2025_courses) * 0.5))
-            num_to_enroll = max(num_to_enroll, min_summer_enroll + len(fall_2025_courses))
+        enrollment_id = self.generate_uuid()
+        enrollment_rows.append([
+            enrollment_id,
+            student_id,
+            cc['course_class_id'],
+            course['semester_start'],
+            status,
+            None, None
+        ])
         
-        # For test student, ensure they enroll in most past courses (prioritize past over current)
-        if is_test_student:
-            # Separate past courses (completed) from current courses
-            past_courses = [c for c in other_courses if c['start_year'] < 2024 or 
-                           (c['start_year'] == 2024 and c['semester_type'] in ('fall', 'spring'))]
-            current_courses = summer_2024_2025_courses + fall_2025_courses
-            
-            # Enroll in ~95% of past courses and all current courses
-            past_enroll_count = int(len(past_courses) * 0.95)
-            num_to_enroll = max(num_to_enroll, past_enroll_count + len(current_courses))
-            # Re-prioritize: past courses first, then current
-            prioritized_courses = past_courses + current_courses
+        self.data['enrollments'].append({
+            'enrollment_id': enrollment_id,
+            'student_id': student_id,
+            'course_class_id': cc['course_class_id'],
+            'course_id': course['course_id'],
+            'semester_id': course['semester_id'],
+            'credits': course['credits'],
+            'enrollment_date': course['semester_start'],
+            'status': status
+        })
         
-        courses_to_enroll = prioritized_courses[:num_to_enroll] if not is_senior else prioritized_courses
+        stats['total_enrollments'] += 1
+    
+    # Merge: seats, indexes and rows are applied in the main process, shard by shard
+    course_classes_by_id = {cc['course_class_id']: cc for cc in self.data['course_classes']}
+    enrolled_student_ids = set()
+    processed_students = 0
+    for result in results:
+        for student_id, course_id, course_class_id, forced in result['placements']:
+            course = courses_by_id[course_id]
+            cc = course_classes_by_id[course_class_id]
+            if forced:
+                add_enrollment(student_id, course, cc, 'completed')
+            else:
+                cc['enrolled_count'] += 1  # FIXED: Properly track enrollment
+                enrolled_student_ids.add(student_id)
+                add_enrollment(student_id, course, cc, enrollment_status(course))
         
-        for course in courses_to_enroll:
-            # FIXED: Prevent enrolling in multiple courses of the same subject
-            if course['subject_id'] in enrolled_subjects_for_student:
-                continue  # Skip if already enrolled in this subject
-                
-            key = (course['course_id'], course['semester_id'])
-            available_classes = course_classes_by_course_semester.get(key, [])
-            if not available_classes:
+        shard_stats = result['stats']
+        processed_students += shard_stats['students']
+        conflict_count += shard_stats['conflicts']
+        skipped_count += shard_stats['skipped']
+        forced_enrollment_count += shard_stats['forced']
+        forced_clash_count += shard_stats['forced_clashes']
+        prerequisite_blocked += shard_stats['prerequisite_blocked']
+        total_senior_students += shard_stats['seniors']
+        students_with_full_curriculum += shard_stats['full_curriculum']
+    
+    # Reconciliation: seats left in one shard's quota go to students of other shards that
+    # missed the course only for lack of quota (same subject / conflict / capacity rules)
+    reconciled_count = 0
+    for result in results:
+        for student_id, course_id, is_senior in result['misses']:
+            course = courses_by_id[course_id]
+            if course['subject_id'] in enrolled_subjects_by_student[student_id]:
                 continue
-            
-            # FIXED: Shuffle sections to distribute enrollment evenly
-            random.shuffle(available_classes)
-            
-            # Find conflict-free section with available space
-            assigned_course_class = None
-            for cc in available_classes:
-                enrollment_key = (student['student_id'], cc['course_class_id'])
-                if enrollment_key in enrolled_combinations:
-                    continue
-                
-                # Check if class is full
+            for cc in course_classes_by_course_semester.get((course_id, course['semester_id']), []):
                 if cc['enrolled_count'] >= cc['max_students']:
                     continue
-                
-                # Check schedule conflicts
-                has_conflict = False
-                semester_schedule = student_schedules[student['student_id']][cc['semester_id']]
-                
-                for day in cc['days']:
-                    for existing_schedule in semester_schedule:
-                        existing_day, existing_start, existing_end = existing_schedule
-                        if day == existing_day:
-                            if not (cc['end_period'] < existing_start or cc['start_period'] > existing_end):
-                                has_conflict = True
-                                conflict_count += 1
-                                break
-                    if has_conflict:
-                        break
-                
-                if not has_conflict:
-                    assigned_course_class = cc
-                    cc['enrolled_count'] += 1  # FIXED: Properly track enrollment
-                    break
-            
-            if not assigned_course_class:
-                if not is_senior:
-                    skipped_count += 1
-                continue
-            
-            # Mark as enrolled
-            enrollment_key = (student['student_id'], assigned_course_class['course_class_id'])
-            enrolled_combinations.add(enrollment_key)
-            enrolled_subjects_for_student.add(course['subject_id'])
-            student_has_enrolled = True
-            
-            # Add to schedule
-            for day in assigned_course_class['days']:
-                student_schedules[student['student_id']][assigned_course_class['semester_id']].append((
-                    day,
-                    assigned_course_class['start_period'],
-                    assigned_course_class['end_period']
-                ))
-            
-            enrollment_id = self.generate_uuid()
-            
-            # Determine enrollment status:
-            # Current date: November 13, 2025 (end of Summer 2025)
-            from datetime import datetime
-            current_date = datetime(2025, 11, 13).date()
-            
-            # Summer 2025: midterm phase completed, but not fully finished (no final grades)
-            is_summer_2025 = (course['start_year'] == 2025 and course['semester_type'] == 'summer')
-            
-            # Summer 2024-2025 ends around July 2025, so it should be PAST by November 2025
-            is_summer_2024_2025 = (course['start_year'] == 2024 and course['semester_type'] == 'summer')
-            summer_2024_2025_ended = is_summer_2024_2025 and course['semester_end'] < current_date
-            
-            is_past = (course['start_year'] < 2024) or \
-                     (course['start_year'] == 2024 and course['semester_type'] in ('fall', 'spring')) or \
-                     (course['start_year'] == 2025 and course['semester_type'] == 'spring') or \
-                     summer_2024_2025_ended
-            is_current = (course['start_year'] == 2025 and course['semester_type'] == 'fall')
-            is_summer_2025_midterm = is_summer_2025  # Summer 2025 in midterm completion phase
-            
-            # Enrollment status based on semester phase
-            if is_past:
-                status = 'completed'
-            elif is_summer_2025_midterm:
-                status = 'registered'  # Still registered, midterm phase completed
-            else:
-                status = 'registered'  # Current semesters
-            
-            enrollment_rows.append([
-                enrollment_id,
-                student['student_id'],
-                assigned_course_class['course_class_id'],
-                course['semester_start'],
-                status,
-                None, None
-            ])
-            
-            self.data['enrollments'].append({
-                'enrollment_id': enrollment_id,
-                'student_id': student['student_id'],
-                'course_class_id': assigned_course_class['course_class_id'],
-                'course_id': course['course_id'],
-                'semester_id': course['semester_id'],
-                'credits': course['credits'],
-                'enrollment_date': course['semester_start'],
-                'status': status
-            })
-            
-            stats['total_enrollments'] += 1
-        
-        if student_has_enrolled:
-            stats['enrolled_students'] += 1
-        else:
-            stats['not_enrolled'] += 1
-        
-        # Force-enroll seniors in missing subjects
-        if is_senior:
-            missing_subjects = curriculum_subject_ids - enrolled_subjects_for_student
-            
-            if not missing_subjects:
-                students_with_full_curriculum += 1
-            
-            for subject_id in missing_subjects:
-                # FIXED: Double-check that subject is still missing (not enrolled during normal enrollment)
-                if subject_id in enrolled_subjects_for_student:
-                    continue  # Skip if already enrolled through normal process
-                    
-                available_courses = courses_by_subject.get(subject_id, [])
-                if not available_courses:
+                if (student_id, cc['course_class_id']) in enrolled_combinations:
                     continue
-                
-                # Include past and current semesters for senior enrollment
-                # Past: start_year < 2025 (all types) OR Spring 2024-2025
-                # Current: Fall 2025 OR Summer 2024-2025
-                available_courses = [c for c in available_courses 
-                                    if c['start_year'] < 2025 or 
-                                    (c['start_year'] == 2024 and c['semester_type'] == 'summer') or
-                                    (c['start_year'] == 2025 and c['semester_type'] == 'fall')]
-                
-                if not available_courses:
+                if has_schedule_conflict(student_id, cc):
                     continue
-                
-                available_courses.sort(key=lambda c: (
-                    c['start_year'],
-                    {'fall': 1, 'spring': 2, 'summer': 3}[c['semester_type']]
-                ))
-                
-                enrolled_in_missing = False
-                for course in available_courses:
-                    key = (course['course_id'], course['semester_id'])
-                    available_classes = course_classes_by_course_semester.get(key, [])
-                    if not available_classes:
-                        continue
-                    
-                    for cc in available_classes:
-                        enrollment_key = (student['student_id'], cc['course_class_id'])
-                        if enrollment_key in enrolled_combinations:
-                            continue
-                        
-                        # FORCE ENROLL (ignore capacity)
-                        enrolled_combinations.add(enrollment_key)
-                        enrolled_subjects_for_student.add(subject_id)
-                        forced_enrollment_count += 1
-                        
-                        enrollment_id = self.generate_uuid()
-                        
-                        enrollment_rows.append([
-                            enrollment_id,
-                            student['student_id'],
-                            cc['course_class_id'],
-                            course['semester_start'],
-                            'completed',
-                            None, None
-                        ])
-                        
-                        self.data['enrollments'].append({
-                            'enrollment_id': enrollment_id,
-                            'student_id': student['student_id'],
-                            'course_class_id': cc['course_class_id'],
-                            'course_id': course['course_id'],
-                            'semester_id': course['semester_id'],
-                            'credits': course['credits'],
-                            'enrollment_date': course['semester_start'],
-                            'status': 'completed'
-                        })
-                        
-                        stats['total_enrollments'] += 1
-                        enrolled_in_missing = True
-                        break
-                    
-                    if enrolled_in_missing:
-                        break
-            
-            if not (curriculum_subject_ids - enrolled_subjects_for_student):
-                students_with_full_curriculum += 1
+                cc['enrolled_count'] += 1
+                enrolled_student_ids.add(student_id)
+                add_enrollment(student_id, course, cc, enrollment_status(course))
+                reconciled_count += 1
+                if not is_senior:
+                    skipped_count -= 1
+                break
+    
+    # Quotas never exceed the free seats, so normal enrollments cannot overflow a section
+    overflowing = [cc for cc in self.data['course_classes'] if cc['enrolled_count'] > cc['max_students']]
+    if overflowing:
+        raise RuntimeError(
+            "CRITICAL ERROR: Sharded enrollment overfilled course classes!\n"
+            f"  Course classes over capacity: {len(overflowing)} "
+            f"(e.g. {overflowing[0]['course_class_code']}: {overflowing[0]['enrolled_count']}/{overflowing[0]['max_students']})"
+        )
+    
+    stats['enrolled_students'] = len(enrolled_student_ids)
+    stats['not_enrolled'] = processed_students - len(enrolled_student_ids)
+    self.add_statement(f"-- Enrollment shards: {len(shards)} (reconciled from leftover seats: {reconciled_count})")
 
     # SPECIAL HANDLING FOR ALL TEST STUDENTS: Enroll in exactly 6 courses in summer 2024-2025
     # Process each test student
@@ -436,10 +687,7 @@ def create_student_enrollments(self):
                 
                 if test_student_class:
                     curriculum_id = test_student_class.get('curriculum_id')
-                    curriculum_subject_ids = set()
-                    for cd in self.data.get('curriculum_details', []):
-                        if cd['curriculum_id'] == curriculum_id:
-                            curriculum_subject_ids.add(cd['subject_id'])
+                    curriculum_subject_ids = self.curriculum_index.subjects_for(curriculum_id)
                     
                     # Get all courses in summer 2024-2025
                     summer_courses = [c for c in self.data['courses'] 
@@ -450,24 +698,14 @@ def create_student_enrollments(self):
                     non_curriculum_courses = [c for c in summer_courses if c['subject_id'] not in curriculum_subject_ids]
                     
                     # Get test student's existing enrollments in summer 2024-2025
-                    test_student_summer_enrollments = [
-                        e for e in self.data['enrollments'] 
-                        if e['student_id'] == test_student_id 
-                        and e['semester_id'] == summer_2024_2025_semester['semester_id']
-                    ]
-                    test_student_summer_course_ids = {e['course_id'] for e in test_student_summer_enrollments}
+                    test_student_summer_course_ids = student_semester_courses[(test_student_id, summer_2024_2025_semester['semester_id'])]
                     
                     # FIXED: Track all subjects the test student is already enrolled in (across all semesters)
-                    test_student_enrolled_subjects = set()
-                    for e in self.data['enrollments']:
-                        if e['student_id'] == test_student_id:
-                            course_for_enrollment = next((c for c in self.data['courses'] if c['course_id'] == e['course_id']), None)
-                            if course_for_enrollment:
-                                test_student_enrolled_subjects.add(course_for_enrollment['subject_id'])
+                    test_student_enrolled_subjects = enrolled_subjects_by_student[test_student_id]
                     
                     # Target: EXACTLY 6 courses total in summer (force enrollment if needed)
                     target_count = 6
-                    current_count = len(test_student_summer_enrollments)
+                    current_count = len(test_student_summer_course_ids)
                     needed_count = max(0, target_count - current_count)
                     
                     if needed_count > 0:
@@ -477,7 +715,8 @@ def create_student_enrollments(self):
                         # FIXED: Also exclude courses where subject is already enrolled
                         available_courses = [c for c in summer_courses 
                                            if c['course_id'] not in test_student_summer_course_ids
-                                           and c['subject_id'] not in test_student_enrolled_subjects]
+                                           and c['subject_id'] not in test_student_enrolled_subjects
+                                           and prerequisites_met(test_student_id, c)]
                         
                         # Prioritize curriculum courses first, then any other courses
                         curriculum_available = [c for c in available_courses if c['subject_id'] in curriculum_subject_ids]
@@ -505,30 +744,7 @@ def create_student_enrollments(self):
                                     continue
                                 
                                 # Check for schedule conflicts with existing test student enrollments
-                                has_conflict = False
-                                test_student_summer_existing = [
-                                    e for e in self.data['enrollments']
-                                    if e['student_id'] == test_student_id and e['semester_id'] == course['semester_id']
-                                ]
-                                
-                                for existing_enrollment in test_student_summer_existing:
-                                    existing_cc = next((c for c in self.data['course_classes']
-                                                      if c['course_class_id'] == existing_enrollment['course_class_id']), None)
-                                    if not existing_cc:
-                                        continue
-                                    
-                                    # Check if days and periods overlap
-                                    cc_days = cc.get('days', [])
-                                    existing_days = existing_cc.get('days', [])
-                                    for day in cc_days:
-                                        if day in existing_days:
-                                            # Same day - check if periods overlap (STRICT: any overlap is a conflict)
-                                            if not (cc['end_period'] <= existing_cc['start_period'] or
-                                                   cc['start_period'] >= existing_cc['end_period']):
-                                                has_conflict = True
-                                                break
-                                    if has_conflict:
-                                        break
+                                has_conflict = has_schedule_conflict(test_student_id, cc)
                                 
                                 if not has_conflict:
                                     # For test student, allow enrollment even if class is full (force enrollment)
@@ -538,43 +754,15 @@ def create_student_enrollments(self):
                                     break
                             
                             if assigned_course_class:
-                                enrollment_key = (test_student_id, assigned_course_class['course_class_id'])
-                                enrolled_combinations.add(enrollment_key)
-                                
-                                enrollment_id = self.generate_uuid()
-                                
-                                enrollment_rows.append([
-                                    enrollment_id,
-                                    test_student_id,
-                                    assigned_course_class['course_class_id'],
-                                    course['semester_start'],
-                                    'registered',  # Summer 2024-2025 is current/ongoing
-                                    None, None
-                                ])
-                                
-                                self.data['enrollments'].append({
-                                    'enrollment_id': enrollment_id,
-                                    'student_id': test_student_id,
-                                    'course_class_id': assigned_course_class['course_class_id'],
-                                    'course_id': course['course_id'],
-                                    'semester_id': course['semester_id'],
-                                    'credits': course['credits'],
-                                    'enrollment_date': course['semester_start'],
-                                    'status': 'registered'
-                                })
-                                
-                                stats['total_enrollments'] += 1
+                                # Summer 2024-2025 is current/ongoing
+                                add_enrollment(test_student_id, course, assigned_course_class, 'registered')
                                 self.add_statement(f"-- TEST STUDENT: Enrolled in {course['subject_code']} for summer 2024-2025")
                             else:
                                 self.add_statement(f"-- WARNING: Could not enroll test student in {course['subject_code']} - schedule conflict with existing courses")
                         
                         # Verify final count
-                        final_summer_enrollments = [
-                            e for e in self.data['enrollments'] 
-                            if e['student_id'] == test_student_id 
-                            and e['semester_id'] == summer_2024_2025_semester['semester_id']
-                        ]
-                        self.add_statement(f"-- TEST STUDENT: Total enrollments in summer 2024-2025: {len(final_summer_enrollments)}")
+                        final_summer_count = len(student_semester_courses[(test_student_id, summer_2024_2025_semester['semester_id'])])
+                        self.add_statement(f"-- TEST STUDENT: Total enrollments in summer 2024-2025: {final_summer_count}")
 
     # PHASE 1.5: BACKFILL ENROLLMENTS FOR SUMMER 2024-2025 COURSE CLASSES WITH 0 ENROLLMENTS
     # Ensure that summer 2024-2025 course classes have at least some enrollments
@@ -595,15 +783,11 @@ def create_student_enrollments(self):
     
     if summer_2024_2025_semester:
         # Find course classes in summer 2024-2025 with 0 enrollments
-        # Count actual enrollments from enrollment data to be accurate
-        enrollments_by_course_class = defaultdict(int)
-        for e in self.data['enrollments']:
-            enrollments_by_course_class[e['course_class_id']] += 1
-        
+        # Actual enrollment counts come from the index maintained by mark_enrolled
         summer_course_classes = []
         for cc in self.data['course_classes']:
             if cc['semester_id'] == summer_2024_2025_semester['semester_id']:
-                actual_enrollments = enrollments_by_course_class.get(cc['course_class_id'], 0)
+                actual_enrollments = section_enrollment_counts.get(cc['course_class_id'], 0)
                 if actual_enrollments == 0:
                     summer_course_classes.append(cc)
         
@@ -612,7 +796,7 @@ def create_student_enrollments(self):
         backfill_count = 0
         for cc in summer_course_classes:
             # Find the course for this course class
-            course = next((c for c in self.data['courses'] if c['course_id'] == cc['course_id']), None)
+            course = courses_by_id.get(cc['course_id'])
             if not course:
                 self.add_statement(f"-- WARNING: Course not found for course_class_id: {cc['course_class_id'][:8]}...")
                 continue
@@ -625,29 +809,16 @@ def create_student_enrollments(self):
             # 2. They're already enrolled in another section (allow multiple sections for summer)
             potential_students = []
             for student in self.data['students']:
-                class_id = student['class_id']
-                cls = next((c for c in self.data['classes'] if c['class_id'] == class_id), None)
-                if not cls:
+                if student['class_id'] not in self.curriculum_index.class_curriculum:
                     continue
                 
                 # Check if course is in student's curriculum (preferred)
-                curriculum_id = cls.get('curriculum_id')
-                in_curriculum = False
-                if curriculum_id:
-                    curriculum_subject_ids = set()
-                    for cd in self.data.get('curriculum_details', []):
-                        if cd['curriculum_id'] == curriculum_id:
-                            curriculum_subject_ids.add(cd['subject_id'])
-                    in_curriculum = course['subject_id'] in curriculum_subject_ids
+                in_curriculum = course['subject_id'] in self.curriculum_index.subjects_for_class(student['class_id'])
                 
                 # For summer 2024-2025, prioritize students with course in curriculum,
                 # but also allow others if needed
                 # Check if student is already enrolled in THIS specific course class
-                already_enrolled_this_class = any(
-                    e['student_id'] == student['student_id'] and 
-                    e['course_class_id'] == cc['course_class_id']
-                    for e in self.data['enrollments']
-                )
+                already_enrolled_this_class = (student['student_id'], cc['course_class_id']) in enrolled_combinations
                 if not already_enrolled_this_class:
                     # Prioritize students with course in curriculum
                     priority = 1 if in_curriculum else 2
@@ -678,11 +849,7 @@ def create_student_enrollments(self):
                 # Last resort: try ALL students, regardless of curriculum
                 for student in self.data['students']:
                     # Only check if already enrolled in this specific class
-                    already_enrolled_this_class = any(
-                        e['student_id'] == student['student_id'] and 
-                        e['course_class_id'] == cc['course_class_id']
-                        for e in self.data['enrollments']
-                    )
+                    already_enrolled_this_class = (student['student_id'], cc['course_class_id']) in enrolled_combinations
                     if not already_enrolled_this_class:
                         students_to_try.append(student)
                 random.shuffle(students_to_try)
@@ -693,72 +860,20 @@ def create_student_enrollments(self):
                     continue
                 
                 # FIXED: Check if student is already enrolled in same subject
-                student_enrolled_subjects = set()
-                for e in self.data['enrollments']:
-                    if e['student_id'] == student['student_id']:
-                        course_for_enrollment = next((c for c in self.data['courses'] if c['course_id'] == e['course_id']), None)
-                        if course_for_enrollment:
-                            student_enrolled_subjects.add(course_for_enrollment['subject_id'])
-                
-                if course['subject_id'] in student_enrolled_subjects:
+                if course['subject_id'] in enrolled_subjects_by_student[student['student_id']]:
                     continue  # Skip if student already enrolled in this subject
                 
+                if not prerequisites_met(student['student_id'], course):
+                    prerequisite_blocked += 1
+                    continue
+                
                 # Check for actual schedule conflicts (same day, overlapping time)
                 # STRICT: No overlaps allowed - students cannot be in two places at once
-                has_conflict = False
-                student_semester_enrollments = [
-                    e for e in self.data['enrollments']
-                    if e['student_id'] == student['student_id'] and e['semester_id'] == cc['semester_id']
-                ]
-                
-                for enrollment in student_semester_enrollments:
-                    existing_cc = next((c for c in self.data['course_classes'] 
-                                      if c['course_class_id'] == enrollment['course_class_id']), None)
-                    if not existing_cc:
-                        continue
-                    
-                    # Check if days and periods overlap
-                    cc_days = cc.get('days', [])
-                    existing_days = existing_cc.get('days', [])
-                    
-                    for day in cc_days:
-                        if day in existing_days:
-                            # Same day - check if periods overlap (STRICT: any overlap is a conflict)
-                            if not (cc['end_period'] < existing_cc['start_period'] or 
-                                   cc['start_period'] > existing_cc['end_period']):
-                                has_conflict = True
-                                break
-                        if has_conflict:
-                            break
-                    if has_conflict:
-                        break
+                has_conflict = has_schedule_conflict(student['student_id'], cc)
                 
                 if not has_conflict:
-                    enrolled_combinations.add(enrollment_key)
+                    add_enrollment(student['student_id'], course, cc, 'registered')
                     cc['enrolled_count'] += 1
-                    
-                    enrollment_id = self.generate_uuid()
-                    enrollment_rows.append([
-                        enrollment_id,
-                        student['student_id'],
-                        cc['course_class_id'],
-                        course['semester_start'],
-                        'registered',
-                        None, None
-                    ])
-                    
-                    self.data['enrollments'].append({
-                        'enrollment_id': enrollment_id,
-                        'student_id': student['student_id'],
-                        'course_class_id': cc['course_class_id'],
-                        'course_id': course['course_id'],
-                        'semester_id': course['semester_id'],
-                        'credits': course['credits'],
-                        'enrollment_date': course['semester_start'],
-                        'status': 'registered'
-                    })
-                    
-                    stats['total_enrollments'] += 1
                     enrolled_in_backfill += 1
                     backfill_count += 1
             
@@ -770,60 +885,18 @@ def create_student_enrollments(self):
                     enrollment_key = (student['student_id'], cc['course_class_id'])
                     if enrollment_key in enrolled_combinations:
                         continue
+                    if course['subject_id'] in enrolled_subjects_by_student[student['student_id']]:
+                        continue
+                    if not prerequisites_met(student['student_id'], course):
+                        prerequisite_blocked += 1
+                        continue
                     
                     # Check for conflicts (strict)
-                    has_conflict = False
-                    student_semester_enrollments = [
-                        e for e in self.data['enrollments']
-                        if e['student_id'] == student['student_id'] and e['semester_id'] == cc['semester_id']
-                    ]
-                    
-                    for enrollment in student_semester_enrollments:
-                        existing_cc = next((c for c in self.data['course_classes'] 
-                                          if c['course_class_id'] == enrollment['course_class_id']), None)
-                        if not existing_cc:
-                            continue
-                        
-                        cc_days = cc.get('days', [])
-                        existing_days = existing_cc.get('days', [])
-                        
-                        for day in cc_days:
-                            if day in existing_days:
-                                if not (cc['end_period'] < existing_cc['start_period'] or 
-                                       cc['start_period'] > existing_cc['end_period']):
-                                    has_conflict = True
-                                    break
-                            if has_conflict:
-                                break
-                        if has_conflict:
-                            break
+                    has_conflict = has_schedule_conflict(student['student_id'], cc)
                     
                     if not has_conflict:
-                        enrolled_combinations.add(enrollment_key)
+                        add_enrollment(student['student_id'], course, cc, 'registered')
                         cc['enrolled_count'] += 1
-                        
-                        enrollment_id = self.generate_uuid()
-                        enrollment_rows.append([
-                            enrollment_id,
-                            student['student_id'],
-                            cc['course_class_id'],
-                            course['semester_start'],
-                            'registered',
-                            None, None
-                        ])
-                        
-                        self.data['enrollments'].append({
-                            'enrollment_id': enrollment_id,
-                            'student_id': student['student_id'],
-                            'course_class_id': cc['course_class_id'],
-                            'course_id': course['course_id'],
-                            'semester_id': course['semester_id'],
-                            'credits': course['credits'],
-                            'enrollment_date': course['semester_start'],
-                            'status': 'registered'
-                        })
-                        
-                        stats['total_enrollments'] += 1
                         enrolled_in_backfill += 1
                         backfill_count += 1
                         self.add_statement(f"-- ✓ Found student after expanding search - enrolled in {course['subject_code']}")
@@ -835,88 +908,77 @@ def create_student_enrollments(self):
                 self.add_statement(f"-- ✗ CRITICAL FAILURE: Could not backfill {course['subject_code']} - no students available at all!")
         
         # Recalculate enrollments after backfill
-        final_enrollments_by_course_class = defaultdict(int)
-        for e in self.data['enrollments']:
-            final_enrollments_by_course_class[e['course_class_id']] += 1
-        
         remaining_empty = len([cc for cc in summer_course_classes 
-                              if final_enrollments_by_course_class.get(cc['course_class_id'], 0) == 0])
+                              if section_enrollment_counts.get(cc['course_class_id'], 0) == 0])
         
         self.add_statement(f"-- Total backfilled enrollments: {backfill_count}")
         self.add_statement(f"-- Remaining course classes with 0 enrollments: {remaining_empty}")
 
     # PHASE 2: CREATE DRAFT GRADES
+    # UPDATED: Grades are drawn per course class in batches by the grade engine
     self.add_statement(f"\n-- Creating draft grades for current semester courses...")
     self.add_statement(f"-- FIXED: ALL summer 2024-2025 enrollments get attendance and midterm grades")
     
+    enrollments_by_course_class = defaultdict(list)
     for enrollment in self.data['enrollments']:
-        course_class_id = enrollment['course_class_id']
-        cc = next((c for c in self.data['course_classes'] if c['course_class_id'] == course_class_id), None)
-        if not cc:
+        enrollments_by_course_class[enrollment['course_class_id']].append(enrollment)
+    
+    fixed_student_ids = {s['student_id'] for s in self.data['students'] if s.get('is_fixed', False)}
+    
+    # Grade ranges come from [enrollment], per-subject difficulty from [grade_distributions]
+    grade_engine = GradeEngine(self.enrollment_config, self.spec_data.get('grade_distributions', []),
+                               self.data['subjects'])
+    
+    for cc in self.data['course_classes']:
+        enrollments = enrollments_by_course_class.get(cc['course_class_id'])
+        if not enrollments:
             continue
         
         grade_status = cc.get('grade_submission_status', 'draft')
         # Current date: November 13, 2025 (end of Summer 2025)
-        from datetime import datetime
-        current_date = datetime(2025, 11, 13).date()
-        
-        # Summer 2025: midterm phase completed (has approved attendance + midterm grades)
-        is_summer_2025 = (cc['start_year'] == 2025 and cc['semester_type'] == 'summer')
-        
+        # Summer 2025 should NOT get draft grades - it has approved midterm grades already
         # Only Fall 2025 is truly "current" with draft grades
         is_current = (cc['start_year'] == 2025 and cc['semester_type'] == 'fall')
+        if not is_current or grade_status not in ('draft', 'pending'):
+            continue
         
-        # Summer 2025 should NOT get draft grades - it has approved midterm grades already
+        subject_id = courses_by_id[cc['course_id']]['subject_id']
+        n = len(enrollments)
+        rolls = grade_engine.random(n)
+        attendance = grade_engine.draw('attendance', n, subject_id)
+        midterm = grade_engine.draw('midterm', n, subject_id)
+        fixed_attendance = fixed_midterm = None
+        if grade_status == 'draft' and any(e['student_id'] in fixed_student_ids for e in enrollments):
+            fixed_attendance = grade_engine.draw('attendance', n, subject_id, low=7.5, high=9.5)
+            fixed_midterm = grade_engine.draw('midterm', n, subject_id, low=6.5, high=9.0)
+        notes = grade_engine.choices(GRADE_NOTES, n)
         
-        if is_current and grade_status in ('draft', 'pending'):
-            student = next((s for s in self.data['students'] if s['student_id'] == enrollment['student_id']), None)
-            is_fixed = student.get('is_fixed', False) if student else False
-            
-            draft_grade_id = self.generate_uuid()
-            
+        for idx, enrollment in enumerate(enrollments):
             attendance_draft = None
             midterm_draft = None
-            final_draft = None
             
             if grade_status == 'pending':
-                # Only Fall 2025 should have pending draft grades
-                rand = random.random()
-                if rand < 0.85:
-                    attendance_draft = round(random.uniform(att_min, att_max), 2)
-                    midterm_draft = round(random.uniform(mid_min, mid_max), 2)
-                    final_draft = None
-                else:
-                    attendance_draft = round(random.uniform(att_min, att_max), 2)
-                    midterm_draft = None
-                    final_draft = None
+                # Only Fall 2025 should have pending draft grades: 85% attendance + midterm, rest attendance only
+                attendance_draft = attendance[idx]
+                if rolls[idx] < 0.85:
+                    midterm_draft = midterm[idx]
+            elif enrollment['student_id'] in fixed_student_ids:
+                attendance_draft = fixed_attendance[idx]
+                midterm_draft = fixed_midterm[idx]
+            elif rolls[idx] < 0.40:
+                attendance_draft = attendance[idx]
+                midterm_draft = midterm[idx]
+            elif rolls[idx] < 0.70:
+                attendance_draft = attendance[idx]
             
-            elif grade_status == 'draft':
-                # Only Fall 2025 should have draft grades
-                if is_fixed:
-                    attendance_draft = round(random.uniform(7.5, 9.5), 2)
-                    midterm_draft = round(random.uniform(6.5, 9.0), 2)
-                    final_draft = None
-                else:
-                    # For Fall 2025, use random distribution
-                    rand = random.random()
-                    if rand < 0.40:
-                        attendance_draft = round(random.uniform(att_min, att_max), 2)
-                        midterm_draft = round(random.uniform(mid_min, mid_max), 2)
-                        final_draft = None
-                    elif rand < 0.70:
-                        attendance_draft = round(random.uniform(att_min, att_max), 2)
-                        midterm_draft = None
-                        final_draft = None
-            
-            if attendance_draft is not None or midterm_draft is not None or final_draft is not None:
-                grade_note = generate_random_grade_note()
+            if attendance_draft is not None or midterm_draft is not None:
                 draft_grade_rows.append([
-                    draft_grade_id,
+                    self.generate_uuid(),
                     enrollment['enrollment_id'],
                     attendance_draft,
                     midterm_draft,
-                    final_draft,
-                    grade_note,
+                    None,
+                    notes[idx],
                     None
                 ])
                 stats['with_draft_grades'] += 1
@@ -924,16 +986,17 @@ def create_student_enrollments(self):
     # PHASE 3: CREATE GRADE VERSIONS AND DETAILS
     self.add_statement(f"\n-- Creating grade versions for approved/pending submissions...")
     
-    enrollments_by_course_class = defaultdict(list)
-    for enrollment in self.data['enrollments']:
-        enrollments_by_course_class[enrollment['course_class_id']].append(enrollment)
+    semesters_by_id = {s['semester_id']: s for s in self.data['semesters']}
+    
+    # Approved complete grades per (student, semester) as (credits, course total), collected
+    # while the details are drawn and materialized as student_semester_summary afterwards
+    graded_courses = defaultdict(list)
     
     for cc in self.data['course_classes']:
         grade_status = cc.get('grade_submission_status', 'draft')
         
         # FIXED: Include Summer 2024-2025 even if status is 'draft'
-        semester = next((s for s in self.data['semesters'] 
-                        if s['semester_id'] == cc['semester_id']), None)
+        semester = semesters_by_id.get(cc['semester_id'])
         
         is_summer_2024_2025 = False
         if semester:
@@ -986,79 +1049,103 @@ def create_student_enrollments(self):
             'status': grade_status
         })
         
-        for enrollment in enrollments:
-            grade_detail_id = self.generate_uuid()
-            
-            # Determine grade type based on semester timing
-            # Get the actual semester for this course class
-            semester = next((s for s in self.data['semesters'] 
-                            if s['semester_id'] == cc['semester_id']), None)
-
-            if not semester:
-                continue
-
-            # Summer 2024-2025: academic year 2024-2025 ending in November 2025
-            is_summer_2024_2025 = (
-                semester['semester_type'] == 'summer' and 
-                semester.get('start_year') == 2024 and 
-                semester.get('end_year') == 2025
-            )
-
-            # Past semesters (fully completed with all grades)
-            is_past = (
-                (semester.get('start_year', 0) < 2024) or 
-                (semester.get('start_year') == 2024 and semester['semester_type'] in ('fall', 'spring')) or
-                (semester.get('start_year') == 2025 and semester['semester_type'] == 'spring')
-            )
-
-            # Current semesters
-            is_fall_2025 = (semester.get('start_year') == 2025 and semester['semester_type'] == 'fall')
-
-            attendance = None
-            midterm = None
-            final = None
-
-            if grade_status == 'approved':
-                if is_past:
-                    # Completed semesters: full grades (attendance + midterm + final)
-                    attendance = round(random.uniform(att_min, att_max), 2)
-                    midterm = round(random.uniform(max(mid_min, 5.5), mid_max), 2)
-                    final = round(random.uniform(max(fin_min, 6.0), fin_max), 2)
-                elif is_summer_2024_2025:
-                    # Summer 2024-2025: midterm phase completed (attendance + midterm only, NO final)
-                    attendance = round(random.uniform(att_min, att_max), 2)
-                    midterm = round(random.uniform(mid_min, mid_max), 2)
-                    final = None  # NO final grades yet for Summer 2024-2025
-                elif is_fall_2025:
-                    # Fall 2025: shouldn't have approved grades yet, but handle if needed
-                    attendance = round(random.uniform(att_min, att_max), 2)
-                    midterm = round(random.uniform(mid_min, mid_max), 2)
-                    final = None
-
-            elif grade_status == 'pending':
-                if is_past:
-                    # Past semesters pending approval: full grades
-                    attendance = round(random.uniform(att_min, att_max), 2)
-                    midterm = round(random.uniform(max(mid_min, 5.5), mid_max), 2)
-                    final = round(random.uniform(max(fin_min, 6.0), fin_max), 2)
-                elif is_summer_2024_2025 or is_fall_2025:
-                    # Current semesters pending: attendance + midterm only
-                    attendance = round(random.uniform(att_min, att_max), 2)
-                    midterm = round(random.uniform(mid_min, mid_max), 2)
-                    final = None
-            
+        if not semester:
+            continue
+        
+        # Determine grade type based on semester timing (same for every enrollment of the class)
+        # Past semesters (fully completed with all grades)
+        is_past = (
+            (semester.get('start_year', 0) < 2024) or 
+            (semester.get('start_year') == 2024 and semester['semester_type'] in ('fall', 'spring')) or
+            (semester.get('start_year') == 2025 and semester['semester_type'] == 'spring')
+        )
+        
+        # Current semesters
+        is_fall_2025 = (semester.get('start_year') == 2025 and semester['semester_type'] == 'fall')
+        
+        # Columns the whole class gets as (field, lower bound) for attendance, midterm, final;
+        # None = not graded yet
+        if is_past and grade_status in ('approved', 'pending'):
+            # Completed semesters: full grades (attendance + midterm + final), passing scores
+            columns = (('attendance', None), ('midterm', 5.5), ('final', 6.0))
+        elif (is_summer_2024_2025 or is_fall_2025) and grade_status in ('approved', 'pending'):
+            # Summer 2024-2025 / Fall 2025: midterm phase only, NO final grades yet
+            columns = (('attendance', None), ('midterm', None), None)
+        else:
+            columns = (None, None, None)
+        
+        subject_id = courses_by_id[cc['course_id']]['subject_id']
+        n = len(enrollments)
+        drawn = [[None] * n if column is None else grade_engine.draw(column[0], n, subject_id, low=column[1])
+                 for column in columns]
+        notes = grade_engine.choices(GRADE_NOTES, n)
+        
+        for enrollment, attendance, midterm, final, note in zip(enrollments, *drawn, notes):
             grade_detail_rows.append([
-                grade_detail_id,
+                self.generate_uuid(),
                 grade_version_id,
                 enrollment['enrollment_id'],
                 attendance,
                 midterm,
                 final,
-                generate_random_grade_note()
+                note
             ])
+        
+        if columns[0] is not None:
+            stats['with_official_grades'] += n
+        
+        if grade_status == 'approved' and columns[2] is not None:
+            credits = courses_by_id[cc['course_id']]['credits']
+            att_weight, mid_weight, fin_weight = GRADE_WEIGHTS
+            for enrollment, attendance, midterm, final in zip(enrollments, *drawn):
+                total = round(att_weight * attendance + mid_weight * midterm + fin_weight * final, 2)
+                graded_courses[(enrollment['student_id'], cc['semester_id'])].append((credits, total))
+
+    # PHASE 4: STUDENT SEMESTER SUMMARIES (credits + GPA per student per semester, cumulative in semester order)
+    self.add_statement(f"\n-- Creating student semester summaries...")
+    
+    registered_credits = defaultdict(int)
+    for enrollment in self.data['enrollments']:
+        registered_credits[(enrollment['student_id'], enrollment['semester_id'])] += enrollment['credits']
+    
+    summary_rows = []
+    student_semesters = defaultdict(list)
+    for student_id, semester_id in registered_credits:
+        student_semesters[student_id].append(semester_id)
+    
+    for student_id, semester_ids in student_semesters.items():
+        semester_ids.sort(key=lambda sem_id: semester_bounds[sem_id][0])
+        cumulative_credits = 0
+        cumulative_points_10 = 0.0
+        cumulative_points_4 = 0.0
+        cumulative_earned = 0
+        for semester_id in semester_ids:
+            graded = graded_courses.get((student_id, semester_id), [])
+            graded_credits = sum(credits for credits, _ in graded)
+            points_10 = sum(credits * total for credits, total in graded)
+            points_4 = sum(credits * grade_point(total) for credits, total in graded)
+            earned_credits = sum(credits for credits, total in graded if total >= PASSING_GRADE)
+            
+            cumulative_credits += graded_credits
+            cumulative_points_10 += points_10
+            cumulative_points_4 += points_4
+            cumulative_earned += earned_credits
             
-            if attendance is not None or midterm is not None or final is not None:
-                stats['with_official_grades'] += 1
+            summary_rows.append([
+                self.generate_uuid(),
+                student_id,
+                semester_id,
+                registered_credits[(student_id, semester_id)],
+                graded_credits,
+                earned_credits,
+                round(points_10 / graded_credits, 2) if graded_credits else None,
+                round(points_4 / graded_credits, 2) if graded_credits else None,
+                cumulative_earned,
+                round(cumulative_points_10 / cumulative_credits, 2) if cumulative_credits else None,
+                round(cumulative_points_4 / cumulative_credits, 2) if cumulative_credits else None
+            ])
+    
+    self.add_statement(f"-- Student semester summaries: {len(summary_rows)}")
 
     stats['no_grades_yet'] = stats['total_enrollments'] - stats['with_draft_grades'] - stats['with_official_grades']
 
@@ -1072,6 +1159,8 @@ def create_student_enrollments(self):
     self.add_statement(f"-- Total enrollments: {stats['total_enrollments']}")
     self.add_statement(f"-- Normal enrollments: {stats['total_enrollments'] - forced_enrollment_count}")
     self.add_statement(f"-- Forced enrollments (seniors): {forced_enrollment_count}")
+    self.add_statement(f"-- Forced enrollments with a schedule clash (no clash-free section left): {forced_clash_count}")
+    self.add_statement(f"-- Blocked by unmet prerequisites: {prerequisite_blocked}")
     self.add_statement(f"-- Enrollment rate: ~70% of available courses")
     self.add_statement(f"-- Enrollment includes:")
     self.add_statement(f"--   - Past semesters (start_year < 2024): all types (fall, spring, summer)")
@@ -1105,6 +1194,13 @@ def create_student_enrollments(self):
                         ['grade_detail_id', 'grade_version_id', 'enrollment_id',
                          'attendance_grade', 'midterm_grade', 'final_grade', 'grade_note'],
                         grade_detail_rows)
+    
+    if summary_rows:
+        self.bulk_insert('student_semester_summary',
+                        ['summary_id', 'student_id', 'semester_id', 'registered_credits',
+                         'graded_credits', 'earned_credits', 'semester_gpa_10', 'semester_gpa_4',
+                         'cumulative_earned_credits', 'cumulative_gpa_10', 'cumulative_gpa_4'],
+                        summary_rows)
 
 from modules.base_generator import SQLDataGenerator
 SQLDataGenerator.create_student_enrollments = create_student_enrollments
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Exam timetabling
+Exams run in four fixed, non-overlapping 2-hour slots a day, so a (date, slot) pair is
+an exam bucket and a room's day is a 4-bit mask: (room_id, date) -> used slots.
+- ExamTimetabler colours the course classes into buckets first (DSatur over the graph of
+  classes sharing students), so no student sits two exams at once
+- ExamRoomAllocator then seats each bucket's classes, largest first, in the tightest free exam
+  room (first-fit decreasing), splitting a class over several rooms when none is big enough
+- ExamRoomOccupancy / ProctorRoster track the bookings: one proctor per room, free of both a
+  weekly teaching mask per (semester, instructor) and a per-(instructor, date) slot mask
+"""
+
+import random
+from bisect import bisect_left
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+
+from .calendar_dimension import clock_to_period
+from .timetable import period_mask
+
+# Exam time slots (hour, minute, duration_minutes)
+EXAM_SLOTS = [
+    (7, 30, 120),   # 7:30 AM, 2 hours
+    (10, 0, 120),   # 10:00 AM, 2 hours
+    (13, 30, 120),  # 1:30 PM, 2 hours
+    (16, 0, 120),   # 4:00 PM, 2 hours
+]
+
+# Rooms exams are held in (every room if a campus has none of these)
+EXAM_ROOM_TYPES = ('exam', 'classroom', 'lecture_hall')
+
+
+def exam_buckets(exam_dates):
+    """Every (date, slot_idx) of an exam window"""
+    return [(exam_date, slot_idx) for exam_date in exam_dates for slot_idx in range(len(EXAM_SLOTS))]
+
+
+class ExamTimetabler:
+    """
+    DSatur colouring of course classes into (date, slot_idx) exam buckets
+    - domains: course_class_id -> candidate buckets (its semester's exam window)
+    - Two classes are adjacent when they share a student (in-memory enrollments) and sit in the
+      same exam window (windows: course_class_id -> semester_id; separate windows never clash)
+    - capacity / sizes: seats one bucket offers at once and students per class (default 1 each,
+      i.e. capacity counts exams)
+    The most saturated class (most distinct bucket colours among its neighbours) is coloured
+    next, into its least-loaded bucket no neighbour uses. When none is left, the neighbours
+    blocking a bucket are moved to other clash-free buckets of theirs; only if no bucket can be
+    cleared that way is the one with the fewest clashing neighbours taken (counted in `clashes`).
+    """
+
+    def __init__(self, domains, enrollments, capacity, sizes=None, windows=None):
+        self.domains = domains
+        self.domain_sets = {cc_id: set(buckets) for cc_id, buckets in domains.items()}
+        self.capacity = capacity
+        self.sizes = sizes or {}
+        self.colors = {}
+        self.load = defaultdict(int)
+        self.clashes = 0
+
+        windows = windows or {}
+        # Dicts as insertion-ordered sets: ids are uuid4 strings, so set order would change from
+        # run to run and with it which neighbours get recoloured and the tiebreak draws
+        classes_by_student = defaultdict(dict)  # (student_id, window) -> course_class_ids
+        for enrollment in enrollments:
+            cc_id = enrollment['course_class_id']
+            if cc_id in domains:
+                classes_by_student[(enrollment['student_id'], windows.get(cc_id))][cc_id] = None
+        self.neighbors = defaultdict(dict)
+        for course_class_ids in classes_by_student.values():
+            for cc_id in course_class_ids:
+                self.neighbors[cc_id].update(course_class_ids)
+        for cc_id, neighbors in self.neighbors.items():
+            neighbors.pop(cc_id, None)
+
+    def taken(self, cc_id):
+        """Buckets already used by coloured neighbours"""
+        return {self.colors[nb] for nb in self.neighbors[cc_id] if nb in self.colors}
+
+    def options(self, cc_id):
+        """Buckets cc_id can sit in without clashing: its own colour first, then least loaded"""
+        taken = self.taken(cc_id)
+        current = self.colors.get(cc_id)
+        size = self.sizes.get(cc_id, 1)
+        free = [b for b in self.domains[cc_id]
+                if b not in taken and b != current and self.load[b] + size <= self.capacity]
+        free.sort(key=self.load.__getitem__)
+        return ([current] if current is not None else []) + free
+
+    def assign(self, cc_id, bucket):
+        size = self.sizes.get(cc_id, 1)
+        current = self.colors.get(cc_id)
+        if current is not None:
+            self.load[current] -= size
+        self.colors[cc_id] = bucket
+        self.load[bucket] += size
+
+    def clear_bucket(self, cc_id, bucket):
+        """
+        Move every coloured neighbour of cc_id out of `bucket` into one of its own clash-free
+        buckets, so cc_id can take it. Returns the moved classes, or None (nothing moved).
+        """
+        size = self.sizes.get(cc_id, 1)
+        moved = []
+        for nb in self.neighbors[cc_id]:
+            if self.colors.get(nb) != bucket:
+                continue
+            target = next((b for b in self.options(nb) if b != bucket), None)
+            if target is None:
+                break
+            self.assign(nb, target)
+            moved.append(nb)
+        else:
+            if self.load[bucket] + size <= self.capacity:
+                return moved
+        for nb in moved:  # Roll back
+            self.assign(nb, bucket)
+        return None
+
+    def color(self):
+        """course_class_id -> (date, slot_idx) for every class with a non-empty domain"""
+        saturation = {cc_id: set() for cc_id in self.domains}
+        heap = [(0, -len(self.neighbors[cc_id]), random.random(), cc_id)
+                for cc_id, buckets in self.domains.items() if buckets]
+        heapify(heap)
+        while heap:
+            neg_saturation, neg_degree, tiebreak, cc_id = heappop(heap)
+            if cc_id in self.colors or -neg_saturation != len(saturation[cc_id]):
+                continue  # Stale entry - re-pushed with a higher saturation
+            options = self.options(cc_id)
+            recoloured = []
+            if options:
+                bucket = options[0]
+            else:
+                clashing = defaultdict(int)
+                for nb in self.neighbors[cc_id]:
+                    if nb in self.colors:
+                        clashing[self.colors[nb]] += 1
+                candidates = sorted(self.domains[cc_id], key=lambda b: (clashing[b], self.load[b]))
+                for bucket in candidates:
+                    moved = self.clear_bucket(cc_id, bucket)
+                    if moved is not None:
+                        recoloured = moved
+                        break
+                else:
+                    bucket = candidates[0]
+                    self.clashes += clashing[bucket]
+            self.assign(cc_id, bucket)
+            # New colours raise the saturation of uncoloured neighbours
+            for coloured in [cc_id] + recoloured:
+                new_bucket = self.colors[coloured]
+                for nb in self.neighbors[coloured]:
+                    if nb not in self.colors and new_bucket in self.domain_sets[nb] and new_bucket not in saturation[nb]:
+                        saturation[nb].add(new_bucket)
+                        heappush(heap, (-len(saturation[nb]), -len(self.neighbors[nb]), random.random(), nb))
+        return self.colors
+
+
+class ExamRoomOccupancy:
+    """(room_id, date) -> bitmask of booked exam slots"""
+
+    def __init__(self):
+        self.slots = defaultdict(int)
+
+    def is_free(self, room_id, exam_date, slot_idx):
+        return not self.slots[(room_id, exam_date)] & (1 << slot_idx)
+
+    def book(self, room_id, exam_date, slot_idx):
+        self.slots[(room_id, exam_date)] |= 1 << slot_idx
+
+
+class ExamRoomAllocator:
+    """
+    Exam rooms sorted by capacity; fit() bisects to the first room that seats the class and
+    walks up to the first free one (tightest fit). With the classes of a slot offered largest
+    first this is first-fit decreasing: big rooms are not used up by small classes.
+    """
+
+    def __init__(self, rooms):
+        exam_rooms = [r for r in rooms if r.get('room_type') in EXAM_ROOM_TYPES] or list(rooms)
+        self.rooms = sorted(exam_rooms, key=lambda r: r['capacity'])
+        self.capacities = [r['capacity'] for r in self.rooms]
+        self.total_capacity = sum(self.capacities)
+
+    def fit(self, occupancy, exam_date, slot_idx, size):
+        """
+        Free rooms seating `size` students in this (date, slot): the tightest single room, else the
+        largest free rooms until everyone is seated (a split exam); None if the slot cannot seat them
+        """
+        start = bisect_left(self.capacities, size)
+        for room in self.rooms[start:]:
+            if occupancy.is_free(room['room_id'], exam_date, slot_idx):
+                return [room]
+        rooms = []
+        seated = 0
+        for room in reversed(self.rooms[:start]):
+            if occupancy.is_free(room['room_id'], exam_date, slot_idx):
+                rooms.append(room)
+                seated += room['capacity']
+                if seated >= size:
+                    return rooms
+        return None
+
+
+def slot_periods(slot_idx):
+    """(start_period, end_period) an exam slot covers - a 2-hour exam is 2 periods"""
+    start_period = clock_to_period(EXAM_SLOTS[slot_idx][0])
+    return start_period, start_period + 1
+
+
+def exam_mask(weekday_code, slot_idx):
+    """Weekly timetable mask of one exam slot on the given weekday"""
+    return period_mask([weekday_code], *slot_periods(slot_idx))
+
+
+class ProctorRoster:
+    """
+    Proctor availability for exam slots
+    - teaching: semester_id -> instructor_id -> weekly (weekday, period) mask of their course classes
+    - proctoring: (instructor_id, date) -> bitmask of exam slots already assigned
+    """
+
+    def __init__(self, course_classes):
+        self.teaching = defaultdict(lambda: defaultdict(int))
+        for cc in course_classes:
+            if cc.get('instructor_id'):
+                self.teaching[cc['semester_id']][cc['instructor_id']] |= period_mask(
+                    cc['days'], cc['start_period'], cc['end_period'])
+        self.proctoring = defaultdict(int)
+
+    def is_free(self, semester_id, instructor_id, exam_date, slot_idx, teaching_mask):
+        """teaching_mask: the exam's (weekday, periods) - see exam_mask()"""
+        return (not self.teaching[semester_id][instructor_id] & teaching_mask
+                and not self.proctoring[(instructor_id, exam_date)] & (1 << slot_idx))
+
+    def book(self, instructor_id, exam_date, slot_idx):
+        self.proctoring[(instructor_id, exam_date)] |= 1 << slot_idx
+
+    def release(self, instructor_id, exam_date, slot_idx):
+        self.proctoring[(instructor_id, exam_date)] &= ~(1 << slot_idx)
@@ -139,19 +139,8 @@ def create_payments(self):
         if is_test_student:
             test_student_payment_count += 1
         
-        # Payment date: random within semester
-        semester = next((s for s in self.data['semesters'] if s['semester_id'] == semester_id), None)
-        if semester:
-            sem_start = semester['start_date']
-            sem_end = semester['end_date']
-            if isinstance(sem_start, str):
-                sem_start = datetime.strptime(sem_start, '%Y-%m-%d').date()
-            if isinstance(sem_end, str):
-                sem_end = datetime.strptime(sem_end, '%Y-%m-%d').date()
-            
-            payment_date = sem_start + timedelta(days=random.randint(0, (sem_end - sem_start).days))
-        else:
-            payment_date = date.today()
+        # Payment date: random within semester (calendar dimension)
+        payment_date = self.calendar.random_semester_date(semester_id) or date.today()
         
         # Create payment record
         payment_enrollment_rows.append([
@@ -212,9 +201,7 @@ def create_payments(self):
         payment_id = self.generate_uuid()
         
         # Payment date: random within first 3 months of insurance period
-        insurance_start = insurance['start_date']
-        if isinstance(insurance_start, str):
-            insurance_start = datetime.strptime(insurance_start, '%Y-%m-%d').date()
+        insurance_start = self.calendar.as_date(insurance['start_date'])
         
         payment_date = insurance_start + timedelta(days=random.randint(0, 90))
         
@@ -0,0 +1,103 @@
+"""
+Batch grade engine
+Scores are drawn one column per course class (all attendance grades of a section,
+then all midterm grades, ...) instead of one random.uniform() per field per enrollment.
+Ranges come from the [enrollment] spec section; per-subject difficulty comes from
+[grade_distributions] and is applied to the whole column, so it costs nothing per row.
+"""
+
+import random
+
+try:
+    import numpy as np
+except ImportError:  # Batch draws are optional; fall back to the random module
+    np = None
+
+# Field -> ([enrollment] min key, max key, default min, default max)
+GRADE_FIELDS = {
+    'attendance': ('attendance_min', 'attendance_max', 7.0, 10.0),
+    'midterm': ('midterm_min', 'midterm_max', 5.0, 9.5),
+    'final': ('final_min', 'final_max', 5.0, 9.5),
+}
+
+# Difficulty only shapes exam scores; attendance stays uniform over its range
+DIFFICULTY_FIELDS = ('midterm', 'final')
+
+# Distribution -> number of parameters (all on the unit interval, scaled to the field range)
+DISTRIBUTIONS = {'uniform': 0, 'beta': 2, 'normal': 2}
+
+
+class GradeEngine:
+    """
+    Per-subject score distributions over the [enrollment] grade ranges
+    - draw(field, n, subject_id) -> list of n scores rounded to 2 decimals
+    - [grade_distributions] rows: SubjectCode | beta | a | b  or  SubjectCode | normal | mean | std
+      (mean/std as a fraction of the range); '*' sets the default for unlisted subjects
+    """
+
+    def __init__(self, enrollment_config, distribution_lines, subjects):
+        self.ranges = {}
+        for field, (min_key, max_key, default_min, default_max) in GRADE_FIELDS.items():
+            self.ranges[field] = (float(enrollment_config.get(min_key, default_min)),
+                                  float(enrollment_config.get(max_key, default_max)))
+
+        subject_ids = {s['subject_code']: s['subject_id'] for s in subjects}
+        self.default = ('uniform',)
+        self.by_subject = {}
+        for line in distribution_lines:
+            parts = [p.strip() for p in line.split('|')]
+            code, kind = parts[0], parts[1].lower()
+            if kind not in DISTRIBUTIONS or len(parts) != 2 + DISTRIBUTIONS[kind]:
+                raise RuntimeError(
+                    "CRITICAL ERROR: Invalid [grade_distributions] row!\n"
+                    f"  Row: {line}\n"
+                    f"  Expected: SubjectCode | uniform  or  SubjectCode | beta|normal | p1 | p2"
+                )
+            dist = (kind,) + tuple(float(p) for p in parts[2:])
+            if code == '*':
+                self.default = dist
+            elif code in subject_ids:
+                self.by_subject[subject_ids[code]] = dist
+
+        self.rng = np.random.default_rng(random.getrandbits(64)) if np is not None else None
+
+    def distribution(self, field, subject_id):
+        if field not in DIFFICULTY_FIELDS:
+            return ('uniform',)
+        return self.by_subject.get(subject_id, self.default)
+
+    def draw(self, field, n, subject_id=None, low=None, high=None):
+        """n scores for one field; low/high tighten the configured range (e.g. passed courses)"""
+        lo, hi = self.ranges[field]
+        lo = lo if low is None else max(lo, low)
+        hi = hi if high is None else min(hi, high)
+        kind, *params = self.distribution(field, subject_id)
+
+        if self.rng is not None:
+            if kind == 'beta':
+                unit = self.rng.beta(params[0], params[1], n)
+            elif kind == 'normal':
+                unit = np.clip(self.rng.normal(params[0], params[1], n), 0.0, 1.0)
+            else:
+                unit = self.rng.random(n)
+            return np.round(lo + (hi - lo) * unit, 2).tolist()
+
+        if kind == 'beta':
+            unit = [random.betavariate(params[0], params[1]) for _ in range(n)]
+        elif kind == 'normal':
+            unit = [min(1.0, max(0.0, random.gauss(params[0], params[1]))) for _ in range(n)]
+        else:
+            unit = [random.random() for _ in range(n)]
+        return [round(lo + (hi - lo) * u, 2) for u in unit]
+
+    def random(self, n):
+        """n uniforms in [0, 1) for per-row branching (which fields a row gets)"""
+        if self.rng is not None:
+            return self.rng.random(n).tolist()
+        return [random.random() for _ in range(n)]
+
+    def choices(self, options, n):
+        """n picks from options (grade notes), drawn in one batch"""
+        if self.rng is not None:
+            return [options[i] for i in self.rng.integers(0, len(options), n).tolist()]
+        return random.choices(options, k=n)
@@ -0,0 +1,75 @@
+"""
+Instructor load balancing
+Per semester, every instructor pool (department, faculty, whole staff) is a min-heap
+keyed by teaching load in periods/week. pick() pops the least-loaded instructor whose
+timetable mask is free for the requested slot, so sections and exam proctoring spread
+evenly instead of piling onto whoever random.choice() happens to return.
+"""
+
+import random
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+
+
+class InstructorLoadBalancer:
+    """Least-loaded free instructor per (semester, pool); loads are shared across pools"""
+
+    def __init__(self, timetable):
+        self.timetable = timetable
+        self.loads = defaultdict(lambda: defaultdict(int))  # semester_id -> instructor_id -> periods/week
+        self.heaps = {}                                      # (semester_id, pool_key) -> [(load, tiebreak, instructor_id)]
+
+    def _heap(self, semester_id, pool_key, pool):
+        key = (semester_id, pool_key)
+        heap = self.heaps.get(key)
+        if heap is None:
+            loads = self.loads[semester_id]
+            # Random tiebreak so equally loaded instructors are not always taken in list order
+            heap = [(loads[i['instructor_id']], random.random(), i['instructor_id']) for i in pool]
+            heapify(heap)
+            self.heaps[key] = heap
+        return heap
+
+    def pick(self, semester_id, pool_key, pool, mask, free=None):
+        """
+        Least-loaded instructor of the pool who is free for `mask`, or None
+        - free: optional instructor_id -> bool check used instead of the timetable mask
+          (exam proctoring, which is booked per date rather than per week)
+        """
+        heap = self._heap(semester_id, pool_key, pool)
+        loads = self.loads[semester_id]
+        semester_timetable = self.timetable.semester(semester_id)
+        busy = []
+        chosen = None
+        while heap:
+            load, tiebreak, instructor_id = heappop(heap)
+            if load != loads[instructor_id]:
+                # Stale entry (load grew through another pool) - reinsert with the current load
+                heappush(heap, (loads[instructor_id], tiebreak, instructor_id))
+                continue
+            busy.append((load, tiebreak, instructor_id))
+            if free(instructor_id) if free is not None else semester_timetable.instructor_free(instructor_id, mask):
+                chosen = instructor_id
+                break
+        for entry in busy:
+            heappush(heap, entry)
+        return chosen
+
+    def add_load(self, semester_id, instructor_id, periods):
+        """A growing load leaves heap entries too shallow, so they are corrected lazily when popped"""
+        self.loads[semester_id][instructor_id] += periods
+
+    def remove_load(self, semester_id, instructor_id, periods):
+        """
+        A shrinking load cannot be corrected lazily (the stale entry would sit too deep), so the
+        semester's heaps are rebuilt - only used when bookings are undone, which is rare
+        """
+        loads = self.loads[semester_id]
+        loads[instructor_id] -= periods
+        for (heap_semester_id, pool_key), heap in self.heaps.items():
+            if heap_semester_id == semester_id:
+                heap[:] = [(loads[i], tiebreak, i) for load, tiebreak, i in heap]
+                heapify(heap)
+
+    def load(self, semester_id, instructor_id):
+        return self.loads[semester_id][instructor_id]
@@ -1,7 +1,19 @@
 from .config import *
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+import hashlib
+import json
 import random
 import os
 
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
 class MediaScanner:
     """Scans media folders and tracks available files"""
     def __init__(self, media_base_path):
@@ -20,6 +32,8 @@ class MediaScanner:
             'room_pics': [],
             'regulations': []
         }
+        # 'folder/content hash' -> [relative paths], only for groups with more than one file
+        self.duplicates = {}
         self.scan_files()
     
     def scan_files(self):
@@ -44,7 +58,7 @@ class MediaScanner:
         for root, dirs, files in os.walk(profile_path):
             for file in files:
                 if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                    self.files['profile_pics'].append(file)
+                    self.files['profile_pics'].append(os.path.join(root, file))
         
         if not self.files['profile_pics']:
             raise FileNotFoundError(f"CRITICAL: No image files found!\n"
@@ -66,12 +80,13 @@ class MediaScanner:
         for root, dirs, files in os.walk(course_docs_path):
             for file in files:
                 file_lower = file.lower()
+                file_path = os.path.join(root, file)
                 if file_lower.endswith('.pdf'):
-                    self.files['course_docs']['pdf'].append(file)
+                    self.files['course_docs']['pdf'].append(file_path)
                 elif file_lower.endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                    self.files['course_docs']['images'].append(file)
+                    self.files['course_docs']['images'].append(file_path)
                 elif file_lower.endswith(('.xls', '.xlsx', '.xlsm')):
-                    self.files['course_docs']['excel'].append(file)
+                    self.files['course_docs']['excel'].append(file_path)
         
         total_course_files = (len(self.files['course_docs']['pdf']) + 
                              len(self.files['course_docs']['images']) + 
@@ -95,7 +110,7 @@ class MediaScanner:
             for root, dirs, files in os.walk(room_pics_path):
                 for file in files:
                     if file.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                        self.files['room_pics'].append(file)
+                        self.files['room_pics'].append(os.path.join(root, file))
             print(f"    ✓ Found {len(self.files['room_pics'])} room pictures\n")
         else:
             print(f"    ⊘ Not found (optional)\n")
@@ -107,10 +122,122 @@ class MediaScanner:
             for root, dirs, files in os.walk(regulations_path):
                 for file in files:
                     if file.lower().endswith('.pdf'):
-                        self.files['regulations'].append(file)
+                        self.files['regulations'].append(os.path.join(root, file))
+        
+        self.deduplicate_files()
         
         print(f"{'='*70}\n")
     
+    def load_manifest(self):
+        """Load cached content hashes (relative path -> {size, mtime_ns, sha256})"""
+        manifest_path = os.path.join(self.media_base_path, MEDIA_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return {}
+    
+    def save_manifest(self, entries):
+        """Write content hashes and the duplicate report back to the manifest"""
+        manifest_path = os.path.join(self.media_base_path, MEDIA_MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({'files': entries, 'duplicates': self.duplicates},
+                          f, ensure_ascii=False, indent=2, sort_keys=True)
+        except OSError as e:
+            print(f"    ⚠ Could not write media manifest: {e}")
+    
+    def hash_files(self, paths):
+        """
+        Hash files on a thread pool, reusing manifest hashes for files whose
+        size and mtime are unchanged. Returns (relative path -> sha256, manifest entries)
+        """
+        cached = self.load_manifest()
+        entries = {}
+        to_hash = []
+        
+        for path in paths:
+            rel_path = os.path.relpath(path, self.media_base_path).replace(os.sep, '/')
+            stat = os.stat(path)
+            entry = cached.get(rel_path)
+            if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+                entries[rel_path] = entry
+            else:
+                entries[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                to_hash.append((rel_path, path))
+        
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=MEDIA_HASH_WORKERS) as pool:
+                digests = pool.map(hash_file, [path for _, path in to_hash])
+                for (rel_path, _), digest in zip(to_hash, digests):
+                    entries[rel_path]['sha256'] = digest
+        
+        print(f"    ✓ Hashed {len(to_hash)} files ({len(paths) - len(to_hash)} reused from manifest)")
+        return {rel_path: entry['sha256'] for rel_path, entry in entries.items()}, entries
+    
+    def deduplicate_files(self):
+        """
+        Collapse files with identical content to one canonical file per media folder
+        (each top-level folder is uploaded to its own bucket). The canonical file is the
+        first relative path in sorted order. Replaces the collected paths in self.files
+        with canonical file names, so generated URLs only reference the deduplicated set.
+        """
+        print(f"[*] Hashing media content")
+        
+        categories = []
+        for key, value in self.files.items():
+            if isinstance(value, dict):
+                categories.extend((key, sub) for sub in value)
+            else:
+                categories.append((key, None))
+        
+        all_paths = []
+        for key, sub in categories:
+            all_paths.extend(self.files[key][sub] if sub else self.files[key])
+        
+        hashes, entries = self.hash_files(all_paths)
+        
+        # Group by (top-level folder, content hash)
+        groups = defaultdict(list)
+        for rel_path, digest in hashes.items():
+            groups[(rel_path.split('/', 1)[0], digest)].append(rel_path)
+        
+        canonical = {}
+        self.duplicates = {}
+        for (folder, digest), rel_paths in groups.items():
+            rel_paths.sort()
+            for rel_path in rel_paths:
+                canonical[rel_path] = rel_paths[0]
+            if len(rel_paths) > 1:
+                # The same content can repeat in several folders; keep one group per folder
+                self.duplicates[f"{folder}/{digest}"] = rel_paths
+        
+        removed = 0
+        for key, sub in categories:
+            paths = self.files[key][sub] if sub else self.files[key]
+            kept = []
+            for path in paths:
+                rel_path = os.path.relpath(path, self.media_base_path).replace(os.sep, '/')
+                if canonical[rel_path] != rel_path:
+                    removed += 1
+                    continue
+                kept.append(os.path.basename(path))
+            if sub:
+                self.files[key][sub] = kept
+            else:
+                self.files[key] = kept
+        
+        if self.duplicates:
+            print(f"    ✓ Collapsed {removed} duplicate files into {len(self.duplicates)} canonical files:")
+            for group_key, rel_paths in sorted(self.duplicates.items(), key=lambda item: item[1][0]):
+                print(f"      {rel_paths[0]} <- {', '.join(rel_paths[1:])}")
+        else:
+            print(f"    ✓ No duplicate files found")
+        
+        self.save_manifest(entries)
+    
     def get_random_file(self, category, subcategory=None):
         """Get a random file from a category"""
         if subcategory:
@@ -122,6 +249,17 @@ class MediaScanner:
             return random.choice(files)
         return None
     
+    def get_random_files(self, category, count, subcategory=None):
+        """Get `count` random files (with replacement) from a category, or Nones if empty"""
+        if subcategory:
+            files = self.files.get(category, {}).get(subcategory, [])
+        else:
+            files = self.files.get(category, [])
+        
+        if files:
+            return random.choices(files, k=count)
+        return [None] * count
+    
     def build_url(self, bucket_key, filename):
         """Build Supabase storage URL"""
         bucket_path = MEDIA_BUCKETS.get(bucket_key)
@@ -21,15 +21,25 @@ def create_schedule_changes(self):
         cancelled_week = random.randint(1, 12)
         makeup_week = random.randint(13, 16)
         
-        # Makeup date
-        makeup_date = cc['semester_start'] + timedelta(weeks=makeup_week)
+        # Use original day/time or adjust
+        day_of_week = cc['days'][0]  # Use first day
+        
+        # UPDATED: Makeup date is the class weekday of the makeup week (calendar dimension),
+        # kept inside the semester for short (summer) terms; the makeup stays after the cancellation
+        weeks = self.calendar.weeks_in_semester(cc['semester_id'])
+        if weeks:
+            cancelled_week = min(cancelled_week, max(weeks - 1, 1))
+            makeup_week = max(min(makeup_week, weeks), cancelled_week + 1)
+        makeup_date = self.calendar.date_for(cc['semester_id'], makeup_week, day_of_week)
+        if makeup_date is None:
+            # FIXED: Semester without calendar dates (start_date after end_date): count weeks from its own start
+            semester_start = self.calendar.as_date(cc['semester_start'])
+            days_until_class = (day_of_week - 2 - semester_start.weekday()) % 7
+            makeup_date = semester_start + timedelta(weeks=makeup_week - 1, days=days_until_class)
         
         # Different room for makeup
         makeup_room = random.choice(self.data['rooms'])
         
-        # Use original day/time or adjust
-        day_of_week = cc['days'][0]  # Use first day
-        
         schedule_change_rows.append([
             schedule_change_id,
             cc['course_class_id'],
@@ -624,13 +634,9 @@ def create_documents(self):
             # Generate varied upload dates throughout the semester
             upload_date = None
             if course_start and course_end:
-                # Convert string dates to datetime objects if needed
-                if isinstance(course_start, str):
-                    from datetime import datetime as dt
-                    course_start = dt.strptime(course_start, '%Y-%m-%d').date()
-                if isinstance(course_end, str):
-                    from datetime import datetime as dt
-                    course_end = dt.strptime(course_end, '%Y-%m-%d').date()
+                # Convert string dates to date objects if needed (parsed once per distinct string)
+                course_start = self.calendar.as_date(course_start)
+                course_end = self.calendar.as_date(course_end)
                 
                 # Generate random date within semester with varied hours/minutes
                 total_days = (course_end - course_start).days
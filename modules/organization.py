@@ -1,22 +1,39 @@
 import random
+from collections import defaultdict
 from datetime import datetime, date, timedelta
 from .config import *
+from .people_accounts import plan_department_staffing
+from .calendar_dimension import AcademicCalendar, to_next_monday, to_next_sunday, to_prev_monday
 
 # NOTE: create_faculties_and_departments is defined in people_accounts.py
 # This module only contains functions that depend on faculties/departments existing
 
 def update_instructor_faculty_assignments(self):
+    """
+    UPDATED: Faculties follow each instructor's department; instructors without one
+    are spread by estimated department load instead of uniformly at random
+    """
     self.add_statement("\n-- ==================== ASSIGNING INSTRUCTORS TO FACULTIES ====================")
     
     if not self.data['faculties'] or not self.data['instructors']:
         raise RuntimeError("Cannot assign instructors to faculties: missing faculties or instructors")
     
     update_statements = []
+    unassigned = [i for i in self.data['instructors'] if not i.get('department_id')]
+    planned = iter(plan_department_staffing(self, len(unassigned)))
+    faculty_by_department = {d['department_id']: d['faculty_id'] for d in self.data['departments']}
     
     for instructor in self.data['instructors']:
-        faculty = random.choice(self.data['faculties'])
+        if instructor.get('department_id'):
+            faculty_id = faculty_by_department[instructor['department_id']]
+        else:
+            dept = next(planned)
+            faculty_id = dept['faculty_id'] if dept else random.choice(self.data['faculties'])['faculty_id']
+            if dept:
+                instructor['department_id'] = dept['department_id']
+        instructor['faculty_id'] = faculty_id
         update_statements.append(
-            f"UPDATE instructor SET faculty_id = '{faculty['faculty_id']}' "
+            f"UPDATE instructor SET faculty_id = '{faculty_id}' "
             f"WHERE instructor_id = '{instructor['instructor_id']}';"
         )
     
@@ -35,27 +52,7 @@ def create_academic_years_and_semesters(self):
     - Summer 2024-2025 ends on 11/20/2025
     - Fall 2025 starts on 11/24/2025, registration starts on 11/8/2025
     """
-    from datetime import timedelta, date, datetime
-    
-    def to_next_monday(d):
-        """Move to next Monday if not already Monday"""
-        days_ahead = (7 - d.weekday()) % 7
-        if days_ahead == 0:
-            return d
-        return d + timedelta(days=days_ahead)
-    
-    def to_next_sunday(d):
-        """Move to next Sunday if not already Sunday"""
-        days_ahead = (6 - d.weekday()) % 7
-        if days_ahead == 0:
-            return d
-        return d + timedelta(days=days_ahead)
-    
-    def to_prev_monday(d):
-        """Move to previous Monday if not already Monday"""
-        if d.weekday() == 0:
-            return d
-        return d - timedelta(days=d.weekday())
+    # Monday/Sunday alignment helpers live in calendar_dimension
     
     self.add_statement("\n-- ==================== ACADEMIC YEARS & SEMESTERS ====================")
     self.add_statement("-- Registration starts 10-15 days before semester (Monday)")
@@ -194,6 +191,9 @@ def create_academic_years_and_semesters(self):
                      'start_date', 'end_date', 'registration_start_date', 'registration_end_date', 
                      'semester_status'], 
                     sem_rows)
+    
+    # Date dimension shared by every later phase (emitted by create_calendar_dates)
+    self.calendar = AcademicCalendar(self.data['semesters'])
 
 def create_training_systems(self):
     self.add_statement("\n-- ==================== TRAINING SYSTEMS ====================")
@@ -286,6 +286,14 @@ def create_curriculum_details(self):
                 "Subjects must have is_general=True/False for curriculum mapping to work"
             )
     
+    # UPDATED: General / per-department subject lists are built once, not per curriculum
+    general_subjects = [s for s in self.data['subjects'] if s['is_general'] == True]
+    specialized_by_department = defaultdict(list)
+    for s in self.data['subjects']:
+        if s['is_general'] == False:
+            specialized_by_department[s.get('department_id')].append(s)
+    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
     for curriculum in self.data['curricula']:
         dept_id = curriculum['department_id']
         
@@ -293,13 +301,10 @@ def create_curriculum_details(self):
         dept_subjects = []
         
         # Add ALL general subjects (every curriculum needs these)
-        general_subjects = [s for s in self.data['subjects'] if s['is_general'] == True]
         dept_subjects.extend(general_subjects)
         
         # Add specialized subjects for THIS department only
-        specialized_subjects = [s for s in self.data['subjects'] 
-                              if s['is_general'] == False 
-                              and s.get('department_id') == dept_id]
+        specialized_subjects = specialized_by_department.get(dept_id, [])
         dept_subjects.extend(specialized_subjects)
         
         if not dept_subjects:
@@ -353,6 +358,8 @@ def create_curriculum_details(self):
                         'academic_year_index': academic_year_index,
                         'semester_index': semester_index
                     })
+                    self.curriculum_index.add(curriculum['curriculum_id'], subject['subject_id'],
+                                              academic_year_index, semester_index)
                     
                     curriculum_detail_rows.append([
                         curriculum_detail_id,
@@ -360,7 +367,7 @@ def create_curriculum_details(self):
                         subject['subject_id'],
                         academic_year_index,
                         semester_index,
-                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                        created_at,
                         None,
                         admin_id,
                         None,
@@ -376,6 +383,9 @@ def create_curriculum_details(self):
     
     self.add_statement(f"-- Generated {len(curriculum_detail_rows)} curriculum details")
     
+    # Materialized curriculum -> subjects index shared by courses / enrollments
+    self.curriculum_index.freeze()
+    
     self.bulk_insert('curriculum_detail',
                     ['curriculum_detail_id', 'curriculum_id', 'subject_id',
                      'academic_year_index', 'semester_index',
@@ -474,6 +484,9 @@ def create_classes(self):
         'end_academic_year_id',
         'class_status'
     ], class_rows)
+    
+    # class_id -> curriculum lookups for every later phase
+    self.curriculum_index.register_classes(self.data['classes'])
 
 # Register functions
 from modules.base_generator import SQLDataGenerator
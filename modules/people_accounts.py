@@ -1,8 +1,78 @@
+import os
 import random
 import base64
+from collections import defaultdict
 from datetime import date
 from .config import *
 
+try:
+    import numpy as np
+except ImportError:  # Vectorized generation is optional; fall back to per-row loops
+    np = None
+
+
+def draw_person_columns(rng, count, names, birth_years):
+    """
+    Draw person attributes column-wise with NumPy.
+    `names` = (first_names, middle_names, last_names_male, last_names_female),
+    `birth_years` = int array of length `count`.
+    Returns a dict of Python lists ready to be zipped into rows.
+    Phone numbers / citizen ids are not drawn here - they come from self.unique_ids.
+    """
+    first_names, middle_names, last_names_male, last_names_female = names
+    
+    is_male = rng.integers(0, 2, size=count).astype(bool)
+    first_idx = rng.integers(0, len(first_names), size=count)
+    middle_idx = rng.integers(0, len(middle_names), size=count)
+    # Last-name pools differ by gender: scale one uniform draw into each pool
+    last_u = rng.random(count)
+    last_male_idx = (last_u * len(last_names_male)).astype(np.int64)
+    last_female_idx = (last_u * len(last_names_female)).astype(np.int64)
+    
+    # Same DOB range as the loop path: month 1-12, day 1-28
+    months = rng.integers(0, 12, size=count)
+    days = rng.integers(0, 28, size=count)
+    dob = ((np.asarray(birth_years) - 1970).astype('datetime64[Y]').astype('datetime64[M]')
+           + months).astype('datetime64[D]') + days
+    
+    full_names = [
+        f"{first_names[f]} {middle_names[m]} {last_names_male[lm] if male else last_names_female[lf]}"
+        for f, m, lm, lf, male in zip(first_idx.tolist(), middle_idx.tolist(),
+                                      last_male_idx.tolist(), last_female_idx.tolist(),
+                                      is_male.tolist())
+    ]
+    
+    return {
+        'gender': ['male' if male else 'female' for male in is_male.tolist()],
+        'full_name': full_names,
+        'date_of_birth': dob.tolist(),
+    }
+
+
+def apply_generated_passwords(self, user_rows):
+    """
+    Replace the 'hashed_pwd'/'salt' placeholders of generated user_account rows with
+    real HMAC-SHA512 hashes when [test_accounts] hash_generated_passwords is enabled.
+    generated_salt: shared reuses salt_base64 (one hash for everyone), random gives each user its own salt.
+    """
+    if not user_rows or self.test_config.get('hash_generated_passwords', 'false').lower() != 'true':
+        return
+    
+    password = self.test_config.get('generated_password', self.test_config.get('password', '123456'))
+    if self.test_config.get('generated_salt', 'shared').lower() == 'random':
+        salts = [os.urandom(16) for _ in user_rows]
+    else:
+        salts = [base64.b64decode(self.test_config.get('salt_base64', 'MTExMQ=='))] * len(user_rows)
+    
+    hashes = self.create_password_hashes([(password, salt) for salt in salts])
+    salt_strings = {}
+    for row, salt, password_hash in zip(user_rows, salts, hashes):
+        if salt not in salt_strings:
+            salt_strings[salt] = base64.b64encode(salt).decode('utf-8')
+        row[3] = password_hash
+        row[4] = salt_strings[salt]
+
+
 def create_fixed_test_accounts(self):
     self.add_statement("\n-- ==================== FIXED TEST ACCOUNTS ====================")
     
@@ -126,7 +196,9 @@ def create_fixed_test_accounts(self):
             self.data['instructors'].append({
                 'instructor_id': instructor_id, 
                 'person_id': person_id,
-                'full_name': instructor_config.get('full_name')
+                'full_name': instructor_config.get('full_name'),
+                'faculty_id': faculty_id,
+                'department_id': None
             })
             
             account_name = config_key.replace('_config', '').replace('test_', '')
@@ -223,6 +295,12 @@ def create_fixed_test_accounts(self):
             
             self.add_statement(f"-- {role_name.upper()} ({account_name}): person={person_id}, user={user_id}, admin={admin_id}")
     
+    # Reserve fixed identities so generated people can never collide with them
+    usernames = {row[1]: row[2] for row in user_rows}
+    for row in person_rows:
+        self.unique_ids.reserve_person(email=row[4], phone=row[5], citizen_id=row[6],
+                                       username=usernames.get(row[0]))
+    
     # Insert all fixed accounts
     self.bulk_insert('person', 
                     ['person_id', 'full_name', 'date_of_birth', 'gender', 'email', 
@@ -246,7 +324,69 @@ def create_fixed_test_accounts(self):
                         ['admin_id', 'person_id', 'admin_code', 'position', 'admin_status'], 
                         admin_rows)
 
+def estimate_department_load(self):
+    """
+    Teaching hours each department will carry, estimated straight from the spec
+    (staff are created before subjects/curricula exist): for every class in
+    [class_curricula], add theory + practice hours of each specialized subject
+    to the department that owns it in [department_subjects].
+    General subjects have no owner and are taught from the shared pool.
+    """
+    dept_by_name = {d['department_name']: d['department_id'] for d in self.data['departments']}
+    
+    subject_owner = {}  # subject_code -> (department_id, hours)
+    for line in self.spec_data.get('department_subjects', []):
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) < 6 or parts[0] not in dept_by_name:
+            continue
+        subject_owner[parts[2]] = (dept_by_name[parts[0]], int(parts[4]) + int(parts[5]))
+    
+    load = {d['department_id']: 0 for d in self.data['departments']}
+    for line in self.spec_data.get('class_curricula', []):
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) < 4:
+            continue
+        for code in (c.strip() for c in parts[3].split(',')):
+            if code in subject_owner:
+                dept_id, hours = subject_owner[code]
+                load[dept_id] += hours
+    
+    return load
+
+
+def plan_department_staffing(self, num_instructors):
+    """
+    Split `num_instructors` across departments in proportion to their estimated
+    load (largest-remainder rounding). Returns one department dict per instructor.
+    """
+    departments = self.data['departments']
+    if not departments or num_instructors <= 0:
+        return [None] * max(num_instructors, 0)
+    
+    load = estimate_department_load(self)
+    total_load = sum(load.values())
+    if total_load == 0:
+        # No curricula in spec - fall back to an even split
+        load = {d['department_id']: 1 for d in departments}
+        total_load = len(departments)
+    
+    quotas = [num_instructors * load[d['department_id']] / total_load for d in departments]
+    counts = [int(q) for q in quotas]
+    by_remainder = sorted(range(len(departments)), key=lambda i: quotas[i] - counts[i], reverse=True)
+    for i in by_remainder[:num_instructors - sum(counts)]:
+        counts[i] += 1
+    
+    plan = [dept for dept, count in zip(departments, counts) for _ in range(count)]
+    random.shuffle(plan)
+    return plan
+
+
 def create_regular_staff(self):
+    """
+    UPDATED: Instructors are generated in bulk and spread over departments in
+    proportion to the teaching load each department will have
+    ([staff] faculty_assignment: balanced | random)
+    """
     self.add_statement("\n-- ==================== REGULAR INSTRUCTORS ====================")
     self.add_statement("-- NOTE: Only 5 fixed admin accounts exist (no regular admins)")
     
@@ -255,56 +395,95 @@ def create_regular_staff(self):
     last_names_male = self.names_config.get('last_names_male', '').split(', ')
     last_names_female = self.names_config.get('last_names_female', '').split(', ')
     
-    person_rows = []
-    user_rows = []
-    instructor_rows = []
     instructor_role_id = self.role_id_map.get('Instructor')
     num_instructors = int(self.staff_config.get('regular_instructors', 12))
+    if num_instructors <= 0:
+        return
     
-    for i in range(num_instructors):
-        gender = random.choice(['male', 'female'])
-        last_pool = last_names_male if gender == 'male' else last_names_female
-        
-        person_id = self.generate_uuid()
-        full_name = f"{random.choice(first_names)} {random.choice(middle_names)} {random.choice(last_pool)}"
-        email = f"gv{i+1:02d}@edu.vn"
-        phone = f"0{random.randint(300000000, 999999999)}"
-        dob = date(random.randint(1970, 1990), random.randint(1, 12), random.randint(1, 28))
-        citizen_id = f"{random.randint(100000000000, 999999999999)}"
-        
-        profile_pic = self.media_scanner.get_random_file('profile_pics')
-        profile_pic_url = self.media_scanner.build_url('profile_pics', profile_pic) if profile_pic else None
-        
-        person_rows.append([person_id, full_name, dob, gender, email, phone, citizen_id, 
-                        'TP Hồ Chí Minh', profile_pic_url])
-        
-        user_id = self.generate_uuid()
-        username = f"gv{i+1:02d}"
-        user_rows.append([user_id, person_id, username, 'hashed_pwd', 'salt', 
-                        instructor_role_id, 'instructor', 'active'])
-        
-        instructor_id = self.generate_uuid()
-        degree = random.choice(['PhD', 'Master', 'Bachelor', 'Engineer'])
-        specialization = random.choice(['Công nghệ thông tin', 'Kinh tế', 'Kỹ thuật', 'Khoa học'])
-        hire_date = date(random.randint(2010, 2020), random.randint(1, 12), 1)
-        
-        # Assign to a random faculty
-        faculty_id = random.choice(self.data['faculties'])['faculty_id'] if self.data['faculties'] else None
-        
-        instructor_rows.append([instructor_id, person_id, f"GV{i+1:04d}", degree, 
-                            specialization, faculty_id, hire_date, 'active'])
+    # Department (and therefore faculty) for every instructor
+    if self.staff_config.get('faculty_assignment', 'balanced').lower() == 'random':
+        departments = [random.choice(self.data['departments']) if self.data['departments'] else None
+                       for _ in range(num_instructors)]
+    else:
+        departments = plan_department_staffing(self, num_instructors)
+    
+    # Person attributes, drawn column-wise
+    if np is not None:
+        rng = np.random.default_rng(random.getrandbits(64))
+        columns = draw_person_columns(
+            rng, num_instructors,
+            (first_names, middle_names, last_names_male, last_names_female),
+            rng.integers(1970, 1991, size=num_instructors)
+        )
+    else:
+        genders = random.choices(['male', 'female'], k=num_instructors)
+        columns = {
+            'gender': genders,
+            'full_name': [
+                f"{random.choice(first_names)} {random.choice(middle_names)} "
+                f"{random.choice(last_names_male if g == 'male' else last_names_female)}"
+                for g in genders
+            ],
+            'date_of_birth': [date(random.randint(1970, 1990), random.randint(1, 12), random.randint(1, 28))
+                              for _ in range(num_instructors)],
+        }
+    
+    person_ids = self.generate_uuids(num_instructors)
+    user_ids = self.generate_uuids(num_instructors)
+    instructor_ids = self.generate_uuids(num_instructors)
+    logins = self.unique_ids.logins.take('gv', 2, num_instructors)
+    phones = self.unique_ids.phone.take(num_instructors)
+    citizen_ids = self.unique_ids.citizen_id.take(num_instructors)
+    
+    profile_pics = self.media_scanner.get_random_files('profile_pics', num_instructors)
+    pic_urls = {pic: self.media_scanner.build_url('profile_pics', pic) for pic in set(profile_pics) if pic}
+    
+    degrees = random.choices(['PhD', 'Master', 'Bachelor', 'Engineer'], k=num_instructors)
+    specializations = random.choices(['Công nghệ thông tin', 'Kinh tế', 'Kỹ thuật', 'Khoa học'], k=num_instructors)
+    hire_dates = [date(random.randint(2010, 2020), random.randint(1, 12), 1) for _ in range(num_instructors)]
+    
+    person_rows = [
+        [pid, name, dob, gender, email, phone, citizen, 'TP Hồ Chí Minh', pic_urls.get(pic)]
+        for pid, name, dob, gender, (_, email), phone, citizen, pic in zip(
+            person_ids, columns['full_name'], columns['date_of_birth'], columns['gender'],
+            logins, phones, citizen_ids, profile_pics)
+    ]
+    user_rows = [
+        [uid, pid, username, 'hashed_pwd', 'salt', instructor_role_id, 'instructor', 'active']
+        for uid, pid, (username, _) in zip(user_ids, person_ids, logins)
+    ]
+    instructor_rows = []
+    
+    for i, (instructor_id, person_id, dept) in enumerate(zip(instructor_ids, person_ids, departments)):
+        faculty_id = dept['faculty_id'] if dept else None
+        instructor_rows.append([instructor_id, person_id, f"GV{i+1:04d}", degrees[i],
+                            specializations[i], faculty_id, hire_dates[i], 'active'])
         
         self.data['instructors'].append({
             'instructor_id': instructor_id, 
             'person_id': person_id, 
-            'full_name': full_name
+            'full_name': columns['full_name'][i],
+            'faculty_id': faculty_id,
+            'department_id': dept['department_id'] if dept else None
         })
     
+    # Log the resulting staffing per department
+    load = estimate_department_load(self)
+    staff_per_dept = defaultdict(int)
+    for dept in departments:
+        if dept:
+            staff_per_dept[dept['department_id']] += 1
+    self.add_statement(f"-- {num_instructors} instructors, assignment per department:")
+    for dept in self.data['departments']:
+        self.add_statement(f"--   {dept['department_name']}: {staff_per_dept[dept['department_id']]} instructors "
+                           f"(load {load.get(dept['department_id'], 0)} hours)")
+    
     self.bulk_insert('person', 
                     ['person_id', 'full_name', 'date_of_birth', 'gender', 'email', 
                     'phone_number', 'citizen_id', 'address', 'profile_picture'], 
                     person_rows)
     
+    apply_generated_passwords(self, user_rows)
     self.bulk_insert('user_account', 
                     ['user_id', 'person_id', 'username', 'password_hash', 'password_salt', 
                     'role_id', 'role_name', 'account_status'], 
@@ -418,50 +597,112 @@ def create_students(self):
     status_counts = {status: 0 for status, _ in enrollment_statuses}
     
     # Regular students
-    for cls in self.data['classes']:
-        for i in range(students_per_class):
-            gender = random.choice(['male', 'female'])
-            last_pool = last_names_male if gender == 'male' else last_names_female
-            
-            person_id = self.generate_uuid()
-            full_name = f"{random.choice(first_names)} {random.choice(middle_names)} {random.choice(last_pool)}"
-            birth_year = cls['start_year'] - 18
-            dob = date(birth_year, random.randint(1, 12), random.randint(1, 28))
-            email = f"sv{global_counter:05d}@edu.vn"
-            phone = f"0{random.randint(300000000, 999999999)}"
-            citizen_id = f"{random.randint(100000000000, 999999999999)}"
-            
-            profile_pic = self.media_scanner.get_random_file('profile_pics')
-            profile_pic_url = self.media_scanner.build_url('profile_pics', profile_pic) if profile_pic else None
-            
-            person_rows.append([person_id, full_name, dob, gender, email, phone, citizen_id, 
-                            'TP Hồ Chí Minh', profile_pic_url])
-            
-            user_id = self.generate_uuid()
-            username = f"sv{global_counter:05d}"
-            user_rows.append([user_id, person_id, username, 'hashed_pwd', 'salt', 
-                            student_role_id, 'student', 'active'])
-            
-            student_id = self.generate_uuid()
-            student_code = f"SV{global_counter:06d}"
-            
-            # Get random enrollment status with weighted distribution
-            enrollment_status = get_random_enrollment_status()
-            status_counts[enrollment_status] += 1
-            
-            student_rows.append([student_id, person_id, student_code, cls['class_id'], enrollment_status])
-            
+    use_vectorized = np is not None and self.students_config.get('vectorized', 'true').lower() == 'true'
+    
+    if use_vectorized and self.data['classes'] and students_per_class > 0:
+        # UPDATED: Column-wise generation - every attribute is drawn as a NumPy array
+        # for the whole population at once, then rows are assembled in bulk
+        classes = self.data['classes']
+        total = len(classes) * students_per_class
+        rng = np.random.default_rng(random.getrandbits(64))
+        
+        class_idx = np.repeat(np.arange(len(classes)), students_per_class)
+        start_years = np.array([c['start_year'] for c in classes], dtype=np.int64)
+        columns = draw_person_columns(
+            rng, total,
+            (first_names, middle_names, last_names_male, last_names_female),
+            start_years[class_idx] - 18
+        )
+        
+        status_names = [status for status, _ in enrollment_statuses]
+        status_weights = np.array([weight for _, weight in enrollment_statuses], dtype=float)
+        status_idx = rng.choice(len(status_names), size=total, p=status_weights / status_weights.sum())
+        for idx, count in zip(*np.unique(status_idx, return_counts=True)):
+            status_counts[status_names[idx]] += int(count)
+        statuses = [status_names[idx] for idx in status_idx.tolist()]
+        
+        # Resolve each distinct picture to its URL once
+        profile_pics = self.media_scanner.get_random_files('profile_pics', total)
+        pic_urls = {pic: self.media_scanner.build_url('profile_pics', pic) for pic in set(profile_pics) if pic}
+        
+        person_ids = self.generate_uuids(total)
+        user_ids = self.generate_uuids(total)
+        student_ids = self.generate_uuids(total)
+        counters = range(global_counter, global_counter + total)
+        logins = self.unique_ids.logins.take('sv', 5, total)
+        phones = self.unique_ids.phone.take(total)
+        citizen_ids = self.unique_ids.citizen_id.take(total)
+        class_list = [classes[idx] for idx in class_idx.tolist()]
+        
+        person_rows.extend(
+            [pid, name, dob, gender, email, phone, citizen, 'TP Hồ Chí Minh', pic_urls.get(pic)]
+            for pid, name, dob, gender, (_, email), phone, citizen, pic in zip(
+                person_ids, columns['full_name'], columns['date_of_birth'], columns['gender'],
+                logins, phones, citizen_ids, profile_pics)
+        )
+        user_rows.extend(
+            [uid, pid, username, 'hashed_pwd', 'salt', student_role_id, 'student', 'active']
+            for uid, pid, (username, _) in zip(user_ids, person_ids, logins)
+        )
+        for sid, pid, n, cls, status in zip(student_ids, person_ids, counters, class_list, statuses):
+            student_code = f"SV{n:06d}"
+            student_rows.append([sid, pid, student_code, cls['class_id'], status])
             self.data['students'].append({
-                'student_id': student_id,
-                'person_id': person_id,
+                'student_id': sid,
+                'person_id': pid,
                 'student_code': student_code,
                 'class_id': cls['class_id'],
                 'class_start_year': cls['start_year'],
-                'enrollment_status': enrollment_status,
+                'enrollment_status': status,
                 'is_fixed': False
             })
-            
-            global_counter += 1
+        
+        global_counter += total
+    else:
+        # Per-row fallback when NumPy is not installed (or vectorized: false)
+        for cls in self.data['classes']:
+            for i in range(students_per_class):
+                gender = random.choice(['male', 'female'])
+                last_pool = last_names_male if gender == 'male' else last_names_female
+            
+                person_id = self.generate_uuid()
+                full_name = f"{random.choice(first_names)} {random.choice(middle_names)} {random.choice(last_pool)}"
+                birth_year = cls['start_year'] - 18
+                dob = date(birth_year, random.randint(1, 12), random.randint(1, 28))
+                username, email = self.unique_ids.logins.next('sv', 5)
+                phone = self.unique_ids.phone.next()
+                citizen_id = self.unique_ids.citizen_id.next()
+            
+                profile_pic = self.media_scanner.get_random_file('profile_pics')
+                profile_pic_url = self.media_scanner.build_url('profile_pics', profile_pic) if profile_pic else None
+            
+                person_rows.append([person_id, full_name, dob, gender, email, phone, citizen_id, 
+                                'TP Hồ Chí Minh', profile_pic_url])
+            
+                user_id = self.generate_uuid()
+                user_rows.append([user_id, person_id, username, 'hashed_pwd', 'salt', 
+                                student_role_id, 'student', 'active'])
+            
+                student_id = self.generate_uuid()
+                student_code = f"SV{global_counter:06d}"
+            
+                # Get random enrollment status with weighted distribution
+                enrollment_status = get_random_enrollment_status()
+                status_counts[enrollment_status] += 1
+            
+                student_rows.append([student_id, person_id, student_code, cls['class_id'], enrollment_status])
+            
+                self.data['students'].append({
+                    'student_id': student_id,
+                    'person_id': person_id,
+                    'student_code': student_code,
+                    'class_id': cls['class_id'],
+                    'class_start_year': cls['start_year'],
+                    'enrollment_status': enrollment_status,
+                    'is_fixed': False
+                })
+            
+                global_counter += 1
     
     # Count fixed students
     num_fixed = len([s for s in self.data['students'] if s.get('is_fixed')])
@@ -480,6 +721,8 @@ def create_students(self):
                         'phone_number', 'citizen_id', 'address', 'profile_picture'], 
                         person_rows)
     
+    apply_generated_passwords(self, user_rows)
+    
     if user_rows:
         self.bulk_insert('user_account', 
                         ['user_id', 'person_id', 'username', 'password_hash', 'password_salt', 
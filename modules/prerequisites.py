@@ -0,0 +1,55 @@
+"""
+Subject prerequisite DAG
+Each subject gets one bit; a subject's prerequisites are a mask, so
+"prerequisites satisfied" is a single AND against a student's completed-subjects bitset
+"""
+
+from collections import defaultdict, deque
+
+
+class PrerequisiteGraph:
+    """Built from self.data['subjects'] ('prerequisite_subject_id' may be None)"""
+
+    def __init__(self, subjects):
+        self.bits = {s['subject_id']: 1 << idx for idx, s in enumerate(subjects)}
+        self.masks = defaultdict(int)          # subject_id -> OR of prerequisite bits
+        dependents = defaultdict(list)         # prerequisite -> subjects that require it
+        indegree = {s['subject_id']: 0 for s in subjects}
+
+        for s in subjects:
+            prereq_id = s.get('prerequisite_subject_id')
+            if prereq_id and prereq_id in self.bits:
+                self.masks[s['subject_id']] |= self.bits[prereq_id]
+                dependents[prereq_id].append(s['subject_id'])
+                indegree[s['subject_id']] += 1
+
+        # Kahn's algorithm - stable with respect to subject order
+        order = []
+        queue = deque(sid for sid, deg in indegree.items() if deg == 0)
+        while queue:
+            sid = queue.popleft()
+            order.append(sid)
+            for dep in dependents[sid]:
+                indegree[dep] -= 1
+                if indegree[dep] == 0:
+                    queue.append(dep)
+
+        if len(order) != len(indegree):
+            cyclic = [s['subject_code'] for s in subjects if indegree[s['subject_id']] > 0]
+            raise RuntimeError(
+                "CRITICAL ERROR: Subject prerequisites contain a cycle!\n"
+                f"  Subjects involved: {', '.join(cyclic)}"
+            )
+
+        self.topo_order = order
+        self.topo_rank = {sid: rank for rank, sid in enumerate(order)}
+
+    def bit(self, subject_id):
+        return self.bits.get(subject_id, 0)
+
+    def has_prerequisites(self, subject_id):
+        return self.masks.get(subject_id, 0) != 0
+
+    def satisfied(self, subject_id, completed_mask):
+        mask = self.masks.get(subject_id, 0)
+        return completed_mask & mask == mask
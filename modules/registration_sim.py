@@ -0,0 +1,219 @@
+"""
+Registration-rush simulator for the Fall 2025 registration window
+Every generated student opens a session at the same moment and registers for their
+Fall 2025 wish list, one course after another, against an in-memory seat store.
+- Wish lists follow the enrollment eligibility rules (cohort curriculum courses plus
+  ~20% of electives, prerequisites completed - see modules/enrollments.py)
+- Open sections: Fall 2025 sections of subjects the student does not already hold
+  (the generator's no-duplicate-subject rule - see RELEASED_STATUSES)
+- Seats use optimistic concurrency on max_students: a registration reads
+  (enrolled, version), waits one simulated database round trip, then commits only if
+  the version is unchanged. mode='naive' writes without the version check, which is
+  what over-enrolls sections under load.
+"""
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+from .enrollments import StudentRecords, cohort_courses, semester_bucket
+from .timetable import period_mask
+
+# A subject held with any other status (registered, completed) is not offered again, as in
+# create_student_enrollments. NOTE: sql/test/query_available_courses.sql excludes
+# 'enrolled' / 'completed' / 'passed' instead, but the student_enrollment CHECK only allows
+# registered / dropped / completed / cancelled, so that query lets registered subjects through.
+RELEASED_STATUSES = ('dropped', 'cancelled')
+
+SIMULATION_MODES = ('occ', 'naive')
+
+
+class SeatStore:
+    """Enrolled count and version per course class; commit() is a compare-and-swap"""
+
+    def __init__(self, course_classes):
+        self.max_students = {cc['course_class_id']: cc['max_students'] for cc in course_classes}
+        self.enrolled = {course_class_id: 0 for course_class_id in self.max_students}
+        self.versions = {course_class_id: 0 for course_class_id in self.max_students}
+        self.commit_conflicts = defaultdict(int)  # course_class_id -> commits rejected (version moved)
+
+    def read(self, course_class_id):
+        return self.enrolled[course_class_id], self.versions[course_class_id]
+
+    def commit(self, course_class_id, version):
+        """Take a seat only if nobody committed since `version` was read"""
+        if self.versions[course_class_id] != version:
+            self.commit_conflicts[course_class_id] += 1
+            return False
+        if self.enrolled[course_class_id] >= self.max_students[course_class_id]:
+            return False
+        self.enrolled[course_class_id] += 1
+        self.versions[course_class_id] += 1
+        return True
+
+    def write_unchecked(self, course_class_id):
+        """Check-then-write without a version check (the capacity check was done on a stale read)"""
+        self.enrolled[course_class_id] += 1
+        self.versions[course_class_id] += 1
+        return True
+
+    def over_enrolled(self):
+        """course_class_id -> seats taken beyond max_students"""
+        return {course_class_id: enrolled - self.max_students[course_class_id]
+                for course_class_id, enrolled in self.enrolled.items()
+                if enrolled > self.max_students[course_class_id]}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+class RegistrationSimulator:
+    """
+    Replays a Fall 2025 registration rush from a generator that has run create_student_enrollments
+    - concurrency: student sessions in flight at once
+    - latency_ms: mean simulated round trip between reading a seat count and committing
+    - max_retries: commit attempts per section after a version conflict
+    """
+
+    def __init__(self, generator, mode='occ', concurrency=500, latency_ms=5.0, max_retries=5, seed=0):
+        if mode not in SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode: {mode} (expected one of {', '.join(SIMULATION_MODES)})")
+        self.mode = mode
+        self.concurrency = concurrency
+        self.latency = latency_ms / 1000.0
+        self.max_retries = max_retries
+        self.rng = random.Random(seed)
+
+        data = generator.data
+        self.sections = [cc for cc in data['course_classes']
+                         if cc['start_year'] == 2025 and cc['semester_type'] == 'fall']
+        self.sections_by_course = defaultdict(list)
+        for cc in self.sections:
+            self.sections_by_course[cc['course_id']].append(cc)
+        self.store = SeatStore(self.sections)
+
+        # Student history outside the window: completed subjects and prerequisite bitsets
+        courses_by_id = {c['course_id']: c for c in data['courses']}
+        course_classes_by_id = {cc['course_class_id']: cc for cc in data['course_classes']}
+        section_masks = {cc['course_class_id']: period_mask(cc['days'], cc['start_period'], cc['end_period'])
+                         for cc in data['course_classes']}
+        semester_bounds = {s['semester_id']: (s['start_date'], s['end_date']) for s in data['semesters']}
+        self.records = StudentRecords(generator.prerequisites, semester_bounds, section_masks)
+        held_subjects = defaultdict(set)
+        for enrollment in data['enrollments']:
+            cc = course_classes_by_id[enrollment['course_class_id']]
+            if cc['start_year'] == 2025 and cc['semester_type'] == 'fall':
+                continue  # The window being replayed
+            course = courses_by_id[enrollment['course_id']]
+            self.records.mark(enrollment['student_id'], course, cc)
+            if enrollment['status'] not in RELEASED_STATUSES:
+                held_subjects[enrollment['student_id']].add(course['subject_id'])
+
+        # Wish lists: what create_student_enrollments would offer each student in Fall 2025
+        fall_courses = {'fall_2025': [c for c in data['courses'] if semester_bucket(c) == 'fall_2025']}
+        curriculum_index = generator.curriculum_index
+        cohorts = {}
+        self.wish_lists = []
+        for student in data['students']:
+            curriculum_id = curriculum_index.class_curriculum.get(student['class_id'])
+            curriculum_subject_ids = curriculum_index.subjects_for(curriculum_id)
+            if not curriculum_subject_ids:
+                continue
+            key = (curriculum_id, student['class_start_year'])
+            if key not in cohorts:
+                cohorts[key] = cohort_courses(fall_courses, curriculum_subject_ids, student['class_start_year'])['fall_2025']
+            curriculum_courses, elective_courses = cohorts[key]
+            electives = [c for c in elective_courses if self.rng.random() < 0.2]
+            wished = [c for c in curriculum_courses + electives
+                      if c['subject_id'] not in held_subjects[student['student_id']]
+                      and c['course_id'] in self.sections_by_course
+                      and self.records.prerequisites_met(student['student_id'], c)]
+            if wished:
+                self.rng.shuffle(wished)
+                self.wish_lists.append((student['student_id'], wished))
+        self.rng.shuffle(self.wish_lists)  # Arrival order
+
+        self.latencies = []
+        self.outcomes = defaultdict(int)
+        self.commit_attempts = 0
+        self.retries = 0
+
+    def round_trip(self):
+        return self.rng.expovariate(1.0 / self.latency) if self.latency > 0 else 0
+
+    async def register(self, student_id, course):
+        """One registration request: first conflict-free section that still has a seat"""
+        saw_full = False
+        saw_conflict = False
+        sections = self.sections_by_course[course['course_id']]
+        for cc in self.rng.sample(sections, len(sections)):
+            course_class_id = cc['course_class_id']
+            if self.records.has_schedule_conflict(student_id, cc):
+                saw_conflict = True
+                continue
+            for _ in range(self.max_retries + 1):
+                enrolled, version = self.store.read(course_class_id)
+                if enrolled >= self.store.max_students[course_class_id]:
+                    saw_full = True
+                    break
+                await asyncio.sleep(self.round_trip())
+                self.commit_attempts += 1
+                if self.mode == 'naive':
+                    committed = self.store.write_unchecked(course_class_id)
+                else:
+                    committed = self.store.commit(course_class_id, version)
+                if committed:
+                    self.records.mark(student_id, course, cc)
+                    return 'registered'
+                self.retries += 1
+            else:
+                return 'retries_exhausted'
+        if saw_full:
+            return 'full'
+        return 'schedule_conflict' if saw_conflict else 'no_section'
+
+    async def session(self, student_id, wished, gate):
+        async with gate:
+            for course in wished:
+                start = time.perf_counter()
+                outcome = await self.register(student_id, course)
+                self.latencies.append(time.perf_counter() - start)
+                self.outcomes[outcome] += 1
+
+    async def run(self):
+        gate = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self.session(student_id, wished, gate) for student_id, wished in self.wish_lists))
+
+    def simulate(self):
+        """Run the rush and return the report dict"""
+        start = time.perf_counter()
+        asyncio.run(self.run())
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(self.latencies)
+        over_enrolled = self.store.over_enrolled()
+        conflicts = self.store.commit_conflicts
+        hottest = sorted(conflicts.items(), key=lambda item: -item[1])[:5]
+        codes = {cc['course_class_id']: cc['course_class_code'] for cc in self.sections}
+        return {
+            'mode': self.mode,
+            'students': len(self.wish_lists),
+            'sections': len(self.sections),
+            'requests': len(latencies),
+            'outcomes': dict(self.outcomes),
+            'elapsed': elapsed,
+            'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+            'registrations_per_second': self.outcomes['registered'] / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'commit_attempts': self.commit_attempts,
+            'commit_conflicts': sum(conflicts.values()),
+            'retries': self.retries,
+            'hottest_sections': [(codes[course_class_id], count) for course_class_id, count in hottest],
+            'over_enrolled_sections': len(over_enrolled),
+            'over_enrolled_seats': sum(over_enrolled.values()),
+        }
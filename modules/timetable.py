@@ -0,0 +1,130 @@
+"""
+Weekly timetable occupancy
+Every (weekday, period) of a week is one bit:
+    bit = (weekday_code - 2) * PERIODS_PER_DAY + (period - 1)
+so a room's or instructor's week in a semester is a single int, and a section
+fits a room / instructor when (occupied & section_mask) == 0
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+PERIODS_PER_DAY = 12
+
+# Day combinations for scheduling (weekday codes, Monday = 2)
+DAY_COMBINATIONS = [
+    [2, 4],    # Mon, Wed
+    [3, 5],    # Tue, Thu
+    [2, 5],    # Mon, Thu
+    [3, 6],    # Tue, Fri
+    [4, 6],    # Wed, Fri
+    [2, 3],    # Mon, Tue
+    [4, 5],    # Wed, Thu
+    [5, 6],    # Thu, Fri
+]
+
+# Time slots (start_period, end_period)
+TIME_SLOTS = [
+    (1, 5),
+    (6, 9),
+    (10, 12)
+]
+
+
+def period_mask(days, start_period, end_period):
+    """Bitmask of the given weekdays, periods start_period..end_period inclusive"""
+    run = ((1 << (end_period - start_period + 1)) - 1) << (start_period - 1)
+    mask = 0
+    for day in days:
+        mask |= run << ((day - 2) * PERIODS_PER_DAY)
+    return mask
+
+
+# Room types sections are taught in; practice-heavy subjects go to labs first
+LECTURE_ROOM_TYPES = ('classroom', 'lecture_hall')
+PRACTICE_ROOM_TYPES = ('computer_lab', 'laboratory')
+
+
+# Every (days, time_slot) a section can be placed in, with its mask
+SCHEDULE_PATTERNS = [
+    (days, time_slot, period_mask(days, *time_slot))
+    for days in DAY_COMBINATIONS
+    for time_slot in TIME_SLOTS
+]
+
+
+class SemesterTimetable:
+    """Room and instructor occupancy masks for one semester"""
+
+    def __init__(self):
+        self.rooms = defaultdict(int)
+        self.instructors = defaultdict(int)
+
+    def room_free(self, room_id, mask):
+        return not self.rooms[room_id] & mask
+
+    def instructor_free(self, instructor_id, mask):
+        return not self.instructors[instructor_id] & mask
+
+    def book(self, room_id, instructor_id, mask):
+        self.rooms[room_id] |= mask
+        self.instructors[instructor_id] |= mask
+
+
+class TimetableEngine:
+    """semester_id -> SemesterTimetable"""
+
+    def __init__(self):
+        self.semesters = defaultdict(SemesterTimetable)
+
+    def semester(self, semester_id):
+        return self.semesters[semester_id]
+
+
+class RoomAllocator:
+    """
+    Rooms indexed by type, each type sorted by capacity.
+    find() bisects to the first room that holds the section and walks up to the
+    first free one, so the tightest-fitting free room is picked per time slot.
+    """
+
+    def __init__(self, rooms):
+        self.by_type = defaultdict(list)
+        for room in sorted(rooms, key=lambda r: r['capacity']):
+            self.by_type[room['room_type']].append(room)
+        self.capacities = {rtype: [r['capacity'] for r in typed] for rtype, typed in self.by_type.items()}
+
+    def room_type_groups(self, practice_heavy):
+        """Preferred teaching types, the other teaching types, then anything else as a last resort"""
+        preferred, secondary = ((PRACTICE_ROOM_TYPES, LECTURE_ROOM_TYPES) if practice_heavy
+                                else (LECTURE_ROOM_TYPES, PRACTICE_ROOM_TYPES))
+        others = tuple(t for t in self.by_type if t not in preferred and t not in secondary)
+        return (preferred, secondary, others)
+
+    def find(self, semester_timetable, room_types, size, mask, allow_undersized=False):
+        """Tightest free room of the given types with capacity >= size (or the largest free one if allowed)"""
+        best = None
+        for rtype in room_types:
+            typed = self.by_type.get(rtype)
+            if not typed:
+                continue
+            start = bisect_left(self.capacities[rtype], size)
+            for room in typed[start:]:
+                if semester_timetable.room_free(room['room_id'], mask):
+                    if best is None or room['capacity'] < best['capacity']:
+                        best = room
+                    break
+        if best is not None or not allow_undersized:
+            return best
+
+        for rtype in room_types:
+            typed = self.by_type.get(rtype)
+            if not typed:
+                continue
+            start = bisect_left(self.capacities[rtype], size)
+            for room in reversed(typed[:start]):
+                if semester_timetable.room_free(room['room_id'], mask):
+                    if best is None or room['capacity'] > best['capacity']:
+                        best = room
+                    break
+        return best
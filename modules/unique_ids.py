@@ -0,0 +1,108 @@
+import random
+from math import gcd
+
+
+class UniqueSequence:
+    """
+    Collision-free random-looking numbers from [low, high).
+    The i-th draw is low + (a*i + b) mod size with gcd(a, size) == 1, which is a
+    permutation of the range - every draw is O(1) and no value repeats until the
+    range is exhausted. Values claimed elsewhere (fixed accounts) are reserved and skipped.
+    """
+
+    def __init__(self, name, low, high, prefix='', width=0):
+        self.name = name
+        self.low = low
+        self.size = high - low
+        self.prefix = prefix
+        self.width = width
+        self.reserved = set()
+        self.index = 0
+        self.a = None
+        self.b = None
+
+    def _init_permutation(self):
+        # Drawn lazily so the permutation follows any random.seed() set before generation
+        a = random.randrange(self.size // 3, self.size)
+        while gcd(a, self.size) != 1:
+            a += 1
+        self.a = a
+        self.b = random.randrange(self.size)
+
+    def format(self, number):
+        return f"{self.prefix}{number:0{self.width}d}"
+
+    def reserve(self, value):
+        """Mark an externally chosen value (e.g. from specs.txt) as taken"""
+        if not value or not value.startswith(self.prefix):
+            return
+        digits = value[len(self.prefix):]
+        if not digits.isdigit() or len(digits) != self.width:
+            return
+        number = int(digits)
+        if self.low <= number < self.low + self.size:
+            self.reserved.add(number)
+
+    def next(self):
+        if self.a is None:
+            self._init_permutation()
+        while True:
+            if self.index >= self.size:
+                raise RuntimeError(f"Unique {self.name} range exhausted ({self.size} values)")
+            number = self.low + (self.a * self.index + self.b) % self.size
+            self.index += 1
+            if number not in self.reserved:
+                return self.format(number)
+
+    def take(self, count):
+        return [self.next() for _ in range(count)]
+
+
+class UniqueEmails:
+    """
+    Per-prefix counters for generated logins (sv00001, gv01, ...).
+    A login is only handed out if it is free both as an e-mail local part and as a username.
+    """
+
+    def __init__(self, domain='edu.vn'):
+        self.domain = domain
+        self.counters = {}
+        self.reserved = set()
+
+    def reserve(self, email=None, username=None):
+        if email:
+            local, _, domain = email.partition('@')
+            if domain == self.domain:
+                self.reserved.add(local)
+        if username:
+            self.reserved.add(username)
+
+    def next(self, prefix, width):
+        """Returns (username, email) for the next free number under `prefix`"""
+        number = self.counters.get(prefix, 0)
+        while True:
+            number += 1
+            local = f"{prefix}{number:0{width}d}"
+            if local not in self.reserved:
+                break
+        self.counters[prefix] = number
+        self.reserved.add(local)
+        return local, f"{local}@{self.domain}"
+
+    def take(self, prefix, width, count):
+        return [self.next(prefix, width) for _ in range(count)]
+
+
+class UniqueIdentifiers:
+    """Shared generators for every person created (students, instructors, fixed accounts)"""
+
+    def __init__(self):
+        # Phone: '0' + 9 digits (300000000-999999999), citizen_id: 12 digits
+        self.phone = UniqueSequence('phone_number', 300000000, 1000000000, prefix='0', width=9)
+        self.citizen_id = UniqueSequence('citizen_id', 100000000000, 1000000000000, width=12)
+        self.logins = UniqueEmails()
+
+    def reserve_person(self, email=None, phone=None, citizen_id=None, username=None):
+        self.logins.reserve(email=email, username=username)
+        self.phone.reserve(phone)
+        self.citizen_id.reserve(citizen_id)
@@ -0,0 +1,62 @@
+"""
+Registration-rush simulator - replays the Fall 2025 registration window in memory
+(no SQL file written); see modules/registration_sim.py
+
+Usage:
+    python simulate_registration.py [--mode occ|naive|both] [--concurrency 500] [--latency-ms 5]
+                                    [--retries 5] [--students-per-class 30] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+
+from modules.config import SPEC_FILE
+from modules.registration_sim import RegistrationSimulator, SIMULATION_MODES
+from benchmark_generation import build_generator, run_until_course_classes
+
+
+def print_report(report):
+    outcomes = report['outcomes']
+    print(f"\n[{report['mode']}] {report['students']} students, {report['sections']} Fall 2025 sections, "
+          f"{report['requests']} registration requests in {report['elapsed']:.2f}s")
+    print(f"  throughput:     {report['requests_per_second']:.0f} requests/s, "
+          f"{report['registrations_per_second']:.0f} registrations/s")
+    print(f"  latency:        p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms")
+    print(f"  outcomes:       " + ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items())))
+    print(f"  contention:     {report['commit_conflicts']} of {report['commit_attempts']} commits rejected "
+          f"({report['commit_conflicts'] / max(report['commit_attempts'], 1):.1%}), {report['retries']} retries")
+    if report['hottest_sections']:
+        print(f"  hottest:        " + ", ".join(f"{code} ({count})" for code, count in report['hottest_sections']))
+    print(f"  over-enrolled:  {report['over_enrolled_sections']} sections, "
+          f"{report['over_enrolled_seats']} seats beyond max_students")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fall 2025 registration-rush simulator")
+    parser.add_argument('--spec', default=SPEC_FILE)
+    parser.add_argument('--mode', choices=SIMULATION_MODES + ('both',), default='both')
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--students-per-class', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    students_overrides = {'students_per_class': str(args.students_per_class)} if args.students_per_class else None
+    generator = build_generator(args.spec, students_overrides=students_overrides)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_until_course_classes(generator)
+        generator.create_student_enrollments()
+
+    modes = SIMULATION_MODES if args.mode == 'both' else (args.mode,)
+    for mode in modes:
+        simulator = RegistrationSimulator(generator, mode=mode, concurrency=args.concurrency,
+                                          latency_ms=args.latency_ms, max_retries=args.retries, seed=args.seed)
+        print_report(simulator.simulate())
+
+
+if __name__ == "__main__":
+    main()
@@ -289,6 +289,32 @@ CREATE TABLE semester (
     CONSTRAINT CHK_semester_registration_before_start CHECK (registration_end_date <= start_date)
 );
 
+-- ============================================================
+-- CALENDAR DATE (Bảng chiều thời gian - join thay cho DATEPART)
+-- ============================================================
+CREATE TABLE calendar_date (
+    calendar_date DATE PRIMARY KEY,
+    weekday_code INT NOT NULL CHECK (weekday_code BETWEEN 2 AND 8),
+    is_weekend BIT NOT NULL DEFAULT 0,
+    semester_id UNIQUEIDENTIFIER NULL,
+    academic_year_id UNIQUEIDENTIFIER NULL,
+    week_of_semester INT NULL CHECK (week_of_semester > 0),
+    is_exam_day BIT NOT NULL DEFAULT 0,
+
+    CONSTRAINT FK_calendar_date_semester FOREIGN KEY (semester_id) 
+        REFERENCES semester(semester_id) ON DELETE NO ACTION,
+    CONSTRAINT FK_calendar_date_academic_year FOREIGN KEY (academic_year_id) 
+        REFERENCES academic_year(academic_year_id) ON DELETE NO ACTION
+);
+
+CREATE TABLE class_period (
+    period INT PRIMARY KEY CHECK (period BETWEEN 1 AND 12),
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+
+    CONSTRAINT CK_class_period_times CHECK (end_time > start_time)
+);
+
 CREATE TABLE division (
     division_id UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
     division_name NVARCHAR(200) NOT NULL,
@@ -732,6 +758,38 @@ CREATE TABLE enrollment_grade_detail (
     CONSTRAINT UQ_enrollment_grade_detail UNIQUE (grade_version_id, enrollment_id)
 );
 
+-- ============================================================
+-- STUDENT SEMESTER SUMMARY (Credits and GPA per student per semester, precomputed)
+-- ============================================================
+-- Course total = 0.1 * attendance + 0.3 * midterm + 0.6 * final (approved, complete grades only)
+-- GPA columns are credit-weighted; NULL when nothing is graded yet
+CREATE TABLE student_semester_summary (
+    summary_id UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
+    student_id UNIQUEIDENTIFIER NOT NULL,
+    semester_id UNIQUEIDENTIFIER NOT NULL,
+
+    registered_credits INT NOT NULL DEFAULT 0 CHECK (registered_credits >= 0),
+    graded_credits INT NOT NULL DEFAULT 0 CHECK (graded_credits >= 0),
+    earned_credits INT NOT NULL DEFAULT 0 CHECK (earned_credits >= 0),
+    semester_gpa_10 NUMERIC(4,2) NULL CHECK (semester_gpa_10 BETWEEN 0 AND 10),
+    semester_gpa_4 NUMERIC(3,2) NULL CHECK (semester_gpa_4 BETWEEN 0 AND 4),
+
+    -- Running totals over this and all earlier semesters
+    cumulative_earned_credits INT NOT NULL DEFAULT 0 CHECK (cumulative_earned_credits >= 0),
+    cumulative_gpa_10 NUMERIC(4,2) NULL CHECK (cumulative_gpa_10 BETWEEN 0 AND 10),
+    cumulative_gpa_4 NUMERIC(3,2) NULL CHECK (cumulative_gpa_4 BETWEEN 0 AND 4),
+
+    created_at DATETIME2 NOT NULL DEFAULT GETDATE(),
+    updated_at DATETIME2 NULL,
+
+    CONSTRAINT UQ_student_semester_summary UNIQUE (student_id, semester_id),
+    CONSTRAINT FK_student_semester_summary_student FOREIGN KEY (student_id)
+        REFERENCES student(student_id) ON DELETE CASCADE,
+    CONSTRAINT FK_student_semester_summary_semester FOREIGN KEY (semester_id)
+        REFERENCES semester(semester_id) ON DELETE NO ACTION,
+    CONSTRAINT CHK_student_semester_summary_credits CHECK (earned_credits <= graded_credits)
+);
+
 -- ============================================================
 -- SCHEDULE CHANGE
 -- ============================================================
@@ -1355,6 +1413,10 @@ CREATE INDEX IX_semester_semester_type ON semester(semester_type);
 CREATE INDEX IX_semester_dates ON semester(start_date, end_date);
 CREATE INDEX IX_semester_registration_dates ON semester(registration_start_date, registration_end_date);
 
+-- CALENDAR_DATE indexes
+CREATE INDEX IX_calendar_date_semester_week ON calendar_date(semester_id, week_of_semester, weekday_code);
+CREATE INDEX IX_calendar_date_exam_day ON calendar_date(semester_id) WHERE is_exam_day = 1;
+
 -- DIVISION indexes
 CREATE INDEX IX_division_division_code ON division(division_code);
 CREATE INDEX IX_division_dean_id ON division(dean_id) WHERE dean_id IS NOT NULL;
@@ -1438,6 +1500,9 @@ CREATE INDEX IX_enrollment_grade_version_approved_by ON enrollment_grade_version
 CREATE INDEX IX_enrollment_grade_detail_grade_version_id ON enrollment_grade_detail(grade_version_id);
 CREATE INDEX IX_enrollment_grade_detail_enrollment_id ON enrollment_grade_detail(enrollment_id);
 
+-- STUDENT_SEMESTER_SUMMARY indexes
+CREATE INDEX IX_student_semester_summary_semester_id ON student_semester_summary(semester_id);
+
 -- SCHEDULE_CHANGE indexes
 CREATE INDEX IX_schedule_change_course_class_id ON schedule_change(course_class_id);
 CREATE INDEX IX_schedule_change_makeup_room_id ON schedule_change(makeup_room_id) WHERE makeup_room_id IS NOT NULL;